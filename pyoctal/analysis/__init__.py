@@ -0,0 +1,3 @@
+"""
+Analysis of measured data. These functions do not talk to any instrument.
+"""
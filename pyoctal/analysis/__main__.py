@@ -0,0 +1,154 @@
+"""
+Batch analysis of measured spectra.
+
+Finds the result files in the given directories, runs the analysis stages
+on each file in a process pool and writes one row per file into a single
+table. Numbers in the file name (i.e. ring3.5.csv, 20.0A.csv) are kept in
+the "param" column.
+
+To run this script:
+    python -m pyoctal.analysis <dirs> [--pattern "**/*.csv"] [--stages ilr normalise resonance]
+                               [--output results.csv] [--jobs N] [--loss]
+"""
+from typing import Callable, Dict, List, Tuple
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from pyoctal.analysis.spectrum import (
+    load_spectrum,
+    normalise,
+    find_resonances,
+    insertion_loss,
+    extinction_ratio,
+)
+from pyoctal.utils.file_operations import export, exporters
+
+
+def _stage_normalise(wavelength: np.array, transmission: np.array, args) -> Tuple[np.array, Dict]:
+    return normalise(wavelength, transmission, deg=args.deg), {}
+
+def _stage_resonance(wavelength: np.array, transmission: np.array, args) -> Tuple[np.array, Dict]:
+    res = find_resonances(wavelength, transmission, prominence=args.prominence)
+    row = {"resonances": len(res["wavelength"])}
+    if row["resonances"]:
+        # report the deepest resonance
+        i = np.argmax(res["depth"])
+        row.update({f"resonance {key}": val[i] for key, val in res.items()})
+    return transmission, row
+
+def _stage_ilr(_: np.array, transmission: np.array, __) -> Tuple[np.array, Dict]:
+    return transmission, {
+        "insertion loss [dB]": insertion_loss(transmission),
+        "extinction ratio [dB]": extinction_ratio(transmission),
+    }
+
+stages: Dict[str, Callable] = {
+    "normalise": _stage_normalise,
+    "resonance": _stage_resonance,
+    "ilr": _stage_ilr,
+}
+
+_number = re.compile(r"[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def discover(dirs: List[Path], pattern: str) -> List[Path]:
+    """ Find all the result files matching the pattern in the directories. """
+    files = []
+    for folder in dirs:
+        files.extend(sorted(Path(folder).glob(pattern)))
+    return files
+
+def analyse_file(filename: Path, args) -> Tuple[Dict, Dict]:
+    """
+    Load one file and run all the stages on it.
+
+    Returns
+    -------
+    Dict
+        One row of the results
+    Dict
+        Time spent in each stage [s]
+    """
+    timing = {}
+    row = {"file": str(filename)}
+    numbers = _number.findall(filename.stem)
+    if numbers:
+        row["param"] = float(numbers[-1])
+
+    try:
+        start = time.perf_counter()
+        wavelength, transmission = load_spectrum(filename)
+        if args.loss:
+            transmission = -transmission
+        timing["load"] = time.perf_counter() - start
+
+        for name in args.stages:
+            start = time.perf_counter()
+            transmission, result = stages[name](wavelength, transmission, args)
+            row.update(result)
+            timing[name] = time.perf_counter() - start
+    except Exception as error: # pylint: disable=broad-except
+        # one bad file should not stop the batch
+        row["error"] = repr(error)
+    return row, timing
+
+def run(args) -> pd.DataFrame:
+    """ Analyse all the files in a process pool and write the consolidated table. """
+    files = discover(args.dirs, args.pattern)
+    if not files:
+        raise FileNotFoundError(f"No files match {args.pattern} in {', '.join(map(str, args.dirs))}.")
+
+    jobs = args.jobs or os.cpu_count()
+    # several files per task to amortise the inter-process overhead
+    chunksize = max(1, len(files)//(jobs*8))
+
+    rows = []
+    totals = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(partial(analyse_file, args=args), files, chunksize=chunksize)
+        for row, timing in tqdm(results, total=len(files), desc="Analysing"):
+            rows.append(row)
+            for name, val in timing.items():
+                totals[name] = totals.get(name, 0) + val
+    elapsed = time.perf_counter() - start
+
+    df = pd.DataFrame(rows)
+    output = export(df, args.output, fmt=args.format)
+
+    print(f"{len(files)} files in {elapsed:.2f} s with {jobs} processes -> {output}")
+    print(f"{'Stage':<12} {'Total [s]':>10} {'Per file [ms]':>14}")
+    for name, val in totals.items():
+        print(f"{name:<12} {val:>10.3f} {val/len(files)*1e+03:>14.3f}")
+    if "error" in df:
+        print(f"{df['error'].notna().sum()} files failed.")
+    return df
+
+def main():
+    """ Entry point."""
+    parser = ArgumentParser(prog="python -m pyoctal.analysis")
+    parser.add_argument("dirs", nargs="+", type=Path, help="Directories containing the results")
+    parser.add_argument("--pattern", default="**/*.csv", help="Glob pattern of the result files")
+    parser.add_argument("--stages", nargs="+", choices=stages.keys(),
+                        default=["ilr", "normalise", "resonance"], help="Analysis stages in order")
+    parser.add_argument("--output", type=Path, default=Path("analysis.csv"), help="Output table")
+    parser.add_argument("--format", choices=["excel", *exporters.keys()], default="csv",
+                        help="Format of the output table")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of processes (default: all cores)")
+    parser.add_argument("--loss", action="store_true", help="The files contain loss instead of transmission")
+    parser.add_argument("--deg", type=int, default=2, help="Degree of the normalisation baseline")
+    parser.add_argument("--prominence", type=float, default=3, help="Minimum resonance depth [dB]")
+
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Eye diagram analysis of NRZ waveforms.
+
+All functions take a time array and an amplitude array. The amplitude
+can be one record of shape (points,) or many acquisitions of shape
+(acquisitions, points) that share the same time array, as returned by
+Keysight86100D.acquire_waveforms. Nan samples are ignored.
+"""
+from typing import Tuple, Dict
+
+import numpy as np
+
+
+def _wrap(phase: np.array) -> np.array:
+    """ Wrap a phase in unit intervals to [-0.5, 0.5). """
+    return phase - np.floor(phase + 0.5)
+
+def crossing_times(t: np.array, y: np.array, threshold: float) -> np.array:
+    """
+    Find the times where the waveform crosses the threshold.
+
+    The crossing time is linearly interpolated between the two samples
+    on each side of the threshold.
+
+    Parameters
+    ----------
+    t: np.array
+        Time [s]
+    y: np.array
+        Amplitude
+    threshold: float
+        The decision threshold
+
+    Returns
+    -------
+    np.array
+        Crossing times [s] of all acquisitions
+    """
+    t = np.broadcast_to(t, y.shape)
+    y0, y1 = y[..., :-1], y[..., 1:]
+    idx = np.nonzero((y0 - threshold)*(y1 - threshold) < 0)
+    frac = (threshold - y0[idx])/(y1[idx] - y0[idx])
+    t0 = t[..., :-1][idx]
+    return t0 + frac*(t[..., 1:][idx] - t0)
+
+def crossing_phase(t: np.array, y: np.array, ui: float, threshold: float) -> Tuple[np.array, float]:
+    """
+    Get the phase of the crossings within a unit interval.
+
+    Returns
+    -------
+    np.array
+        Deviation of each crossing from the mean crossing [UI]
+    float
+        Mean crossing phase [UI] in [0, 1)
+    """
+    phase = crossing_times(t, y, threshold)/ui
+    # circular mean so that crossings around 0 and 1 UI are not split
+    angle = 2*np.pi*phase
+    mean = np.arctan2(np.mean(np.sin(angle)), np.mean(np.cos(angle)))/(2*np.pi) % 1
+    return _wrap(phase - mean), mean
+
+def eye_histogram(t: np.array, y: np.array, ui: float, bins: Tuple[int, int]=(200, 200),
+                  threshold: float=None, span: float=2) -> Tuple[np.array, np.array, np.array]:
+    """
+    Build the 2D eye histogram by folding all samples onto the unit interval.
+
+    The time axis is aligned so that the crossings are at 0.5 UI
+    (and 1.5 UI for a span of 2 UI) with the eye in between.
+
+    Parameters
+    ----------
+    t: np.array
+        Time [s]
+    y: np.array
+        Amplitude
+    ui: float
+        Unit interval [s]
+    bins: Tuple[int, int], default: (200, 200)
+        Number of bins along time and amplitude
+    threshold: float, default: None
+        Crossing threshold. If not provided, use the mean amplitude.
+    span: float, default: 2
+        Width of the eye diagram [UI]
+
+    Returns
+    -------
+    np.array
+        Counts with shape bins
+    np.array
+        Time bin edges [UI]
+    np.array
+        Amplitude bin edges
+    """
+    if threshold is None:
+        threshold = np.nanmean(y)
+    _, mean = crossing_phase(t, y, ui, threshold)
+
+    x = (np.broadcast_to(t, y.shape)/ui - mean + 0.5) % span
+    valid = np.isfinite(y)
+    return np.histogram2d(
+        x[valid], y[valid], bins=bins,
+        range=((0, span), (np.nanmin(y), np.nanmax(y)))
+    )
+
+def eye_levels(t: np.array, y: np.array, ui: float, threshold: float=None,
+               window: float=0.2) -> Tuple[float, float, float, float]:
+    """
+    Get the one and zero levels from the samples around the eye centre.
+
+    Parameters
+    ----------
+    window: float, default: 0.2
+        The width around the eye centre to take samples from [UI]
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        Zero level mean, zero level standard deviation,
+        one level mean, one level standard deviation
+    """
+    if threshold is None:
+        threshold = np.nanmean(y)
+    _, mean = crossing_phase(t, y, ui, threshold)
+
+    dist = _wrap(np.broadcast_to(t, y.shape)/ui - mean - 0.5)
+    samples = y[(np.abs(dist) <= window/2) & np.isfinite(y)]
+    ones = samples[samples > threshold]
+    zeros = samples[samples <= threshold]
+    return np.mean(zeros), np.std(zeros), np.mean(ones), np.std(ones)
+
+def eye_stats(t: np.array, y: np.array, ui: float, threshold: float=None,
+              window: float=0.2, dark: float=0) -> Dict:
+    """
+    Compute the eye statistics.
+
+    Parameters
+    ----------
+    t: np.array
+        Time [s]
+    y: np.array
+        Amplitude
+    ui: float
+        Unit interval [s]
+    threshold: float, default: None
+        Decision threshold. If not provided, use the mean amplitude.
+    window: float, default: 0.2
+        The width around the eye centre to take the levels from [UI]
+    dark: float, default: 0
+        Dark level subtracted from the levels for the extinction ratio
+
+    Returns
+    -------
+    Dict
+        one level, zero level, eye height, eye width [s], extinction ratio [dB],
+        Q-factor, rms jitter [s] and peak-to-peak jitter [s]
+    """
+    if threshold is None:
+        threshold = np.nanmean(y)
+    mu0, sigma0, mu1, sigma1 = eye_levels(t, y, ui, threshold=threshold, window=window)
+    dev, _ = crossing_phase(t, y, ui, threshold)
+    jitter_rms = np.std(dev)*ui
+
+    return {
+        "one level": mu1,
+        "zero level": mu0,
+        "eye height": (mu1 - 3*sigma1) - (mu0 + 3*sigma0),
+        "eye width": ui - 6*jitter_rms,
+        "extinction ratio": 10*np.log10((mu1 - dark)/(mu0 - dark)),
+        "q factor": (mu1 - mu0)/(sigma1 + sigma0),
+        "jitter rms": jitter_rms,
+        "jitter pp": np.ptp(dev)*ui,
+    }
@@ -0,0 +1,109 @@
+"""
+Analysis of transmission spectra, i.e. from the ILME or a wavelength sweep.
+
+The transmission is in dB, so the resonances of a ring are dips. Spectra
+saved as loss (positive dB) should be negated first.
+"""
+from typing import Dict, Tuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks, peak_widths
+
+try:
+    import pyarrow # pylint: disable=unused-import
+    _csv_engine = "pyarrow"
+except ImportError:
+    _csv_engine = "c"
+
+
+def load_spectrum(filename: Path) -> Tuple[np.array, np.array]:
+    """
+    Load the first two columns of a spectrum file as (wavelength, transmission).
+
+    CSV files are parsed with the pyarrow engine if it is installed.
+    Parquet, Feather and NPZ files written by file_operations.export are
+    also supported.
+    """
+    filename = Path(filename)
+    if filename.suffix.lower() == ".csv":
+        df = pd.read_csv(filename, usecols=[0, 1], engine=_csv_engine)
+    else:
+        # pylint: disable=import-outside-toplevel
+        from pyoctal.utils.file_operations import load_export
+        df = load_export(filename)[0].iloc[:, :2]
+    data = df.to_numpy(dtype=float)
+    return data[:, 0], data[:, 1]
+
+def normalise(wavelength: np.array, transmission: np.array, deg: int=2,
+              quantile: float=0.75) -> np.array:
+    """
+    Remove the grating coupler envelope from a spectrum.
+
+    A polynomial is fitted to the points above the quantile, which are
+    away from the resonances, and subtracted.
+
+    Parameters
+    ----------
+    wavelength: np.array
+        Wavelength
+    transmission: np.array
+        Transmission [dB]
+    deg: int, default: 2
+        Degree of the baseline polynomial
+    quantile: float, default: 0.75
+        Only the points above this quantile are used in the fit
+
+    Returns
+    -------
+    np.array
+        Normalised transmission [dB] with a baseline of 0 dB
+    """
+    upper = transmission >= np.quantile(transmission, quantile)
+    x = wavelength - wavelength.mean()
+    coeffs = np.polyfit(x[upper], transmission[upper], deg)
+    return transmission - np.polyval(coeffs, x)
+
+def find_resonances(wavelength: np.array, transmission: np.array,
+                    prominence: float=3) -> Dict[str, np.array]:
+    """
+    Find the resonance dips of a spectrum.
+
+    Parameters
+    ----------
+    wavelength: np.array
+        Wavelength, uniformly spaced
+    transmission: np.array
+        Transmission [dB]
+    prominence: float, default: 3
+        Minimum depth of a resonance [dB]
+
+    Returns
+    -------
+    Dict[str, np.array]
+        "wavelength", "depth" [dB], "fwhm" and "q" of each resonance
+    """
+    peaks, props = find_peaks(-transmission, prominence=prominence)
+    step = np.mean(np.diff(wavelength)) if len(wavelength) > 1 else 0
+    # full width at half of the dip depth in linear scale
+    linear = 10**(transmission/10)
+    widths = peak_widths(-linear, peaks, rel_height=0.5)[0] if len(peaks) else np.array([])
+    fwhm = widths*abs(step)
+    centre = wavelength[peaks]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = np.where(fwhm > 0, centre/fwhm, np.nan)
+    return {
+        "wavelength": centre,
+        "depth": props["prominences"],
+        "fwhm": fwhm,
+        "q": q,
+    }
+
+def insertion_loss(transmission: np.array) -> float:
+    """ Insertion loss [dB] at the maximum transmission. """
+    return float(-np.max(transmission))
+
+def extinction_ratio(transmission: np.array) -> float:
+    """ Extinction ratio [dB] between the maximum and minimum transmission. """
+    return float(np.max(transmission) - np.min(transmission))
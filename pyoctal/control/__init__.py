@@ -0,0 +1,3 @@
+"""
+Closed-loop control of the instruments, i.e. bias locking and tracking.
+"""
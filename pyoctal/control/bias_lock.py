@@ -0,0 +1,259 @@
+"""
+Lock an MZI to quadrature by feeding the detected power back to the heater.
+
+The actuator and the sensor are plain callables so any source and
+power meter can be used, i.e.
+    actuator: AgilentE3640A.set_volt, lambda v: NicsLabXPOW.set_volt_single(chan, v)
+    sensor: Agilent816xB.get_detect_pow, ThorlabsPM100.read_power
+
+e.g.
+    lock = QuadratureLock(pm.set_volt, mm.get_detect_pow, limits=(0, 4))
+    lock.calibrate(np.linspace(0, 4, 201))
+    telemetry = lock.run(duration=600)
+"""
+from typing import Callable, Dict, Tuple
+import time
+
+import numpy as np
+
+
+class QuadratureLock:
+    """
+    Hold an MZI at quadrature with a PI or a dither lock.
+
+    The loop runs as fast as the bus allows unless a period is given:
+    each iteration is one write to the actuator and one (PI) or three
+    (dither) sensor reads.
+
+    The controller is positional, bias = bias0 + kp*error + integral,
+    where bias0 is the quadrature bias found by calibrate and the error
+    is in volts. The integral follows the drift of the quadrature point.
+    It is clamped to the limits and does not integrate further into a
+    saturated output (anti-windup).
+
+    pi:
+        The power error is converted to a bias error with the slope at
+        quadrature measured in calibrate.
+    dither:
+        The bias is dithered by +-dither around the operating point. The
+        curvature of the transfer function, which is zero at quadrature,
+        is the error. It is normalised by the fringe amplitude, so the
+        lock does not move when the optical power drifts.
+
+    Parameters
+    ----------
+    actuate: Callable
+        Function that sets the bias [V]
+    sense: Callable
+        Function that returns the detected power
+    limits: Tuple[float, float]
+        Minimum and maximum bias [V]
+    mode: str, default: "pi"
+        "pi" or "dither"
+    kp: float, default: 0.5
+        Proportional gain (dimensionless). The loop oscillates from 1.
+    ki: float, default: 5
+        Integral gain [1/s]
+    dither: float, default: 0.01
+        Dither amplitude [V], dither mode only
+    period: float, default: 0
+        Minimum time per loop [s]. 0 runs as fast as possible.
+    readback: Callable, default: None
+        Function that reads back the actuator, i.e. (volt, curr)
+    readback_every: int, default: 100
+        Only read back once every this many loops to keep the loop fast.
+        The readback is decimated, not batched.
+    """
+    def __init__(self, actuate: Callable[[float], None], sense: Callable[[], float],
+                 limits: Tuple[float, float], mode: str="pi", kp: float=0.5, ki: float=5,
+                 dither: float=0.01, period: float=0, readback: Callable=None,
+                 readback_every: int=100):
+        if mode not in ("pi", "dither"):
+            raise ValueError(f"Unknown lock mode: {mode}. Choose pi or dither.")
+        self.actuate = actuate
+        self.sense = sense
+        self.limits = limits
+        self.mode = mode
+        self.kp = kp
+        self.ki = ki
+        self.dither = dither
+        self.period = period
+        self.readback = readback
+        self.readback_every = readback_every
+
+        self.bias0 = None # calibrated quadrature bias [V]
+        self.bias = None # operating point [V]
+        self.slope = None # dP/dV at quadrature
+        self.pmin = None
+        self.pmax = None
+        self._integral = 0
+        self._stop = False
+
+    @property
+    def setpoint(self) -> float:
+        """ Power at quadrature. """
+        return (self.pmax + self.pmin)/2
+
+    def calibrate(self, voltages: np.array, slope: int=-1) -> float:
+        """
+        Sweep the bias once to find the fringe and the quadrature point.
+
+        Parameters
+        ----------
+        voltages: np.array
+            Bias voltages to sweep [V]
+        slope: int, default: -1
+            Lock on a falling (-1) or rising (+1) side of the fringe
+
+        Returns
+        -------
+        float
+            The quadrature bias [V]
+        """
+        voltages = np.asarray(voltages)
+        powers = np.empty(len(voltages))
+        for i, volt in enumerate(voltages):
+            self.actuate(volt)
+            powers[i] = self.sense()
+
+        self.pmin, self.pmax = powers.min(), powers.max()
+        slopes = np.gradient(powers, voltages)
+        # crossings of the mid power on the requested side of a fringe
+        dev = powers - self.setpoint
+        idx = np.nonzero((dev[:-1]*dev[1:] <= 0) & (np.sign(slopes[:-1]) == np.sign(slope)))[0]
+        if not len(idx):
+            raise ValueError("No quadrature point found. Sweep over at least half a fringe.")
+        i = idx[np.argmax(np.abs(slopes[idx]))]
+        frac = dev[i]/(dev[i] - dev[i + 1]) if dev[i] != dev[i + 1] else 0
+        self.bias0 = voltages[i] + frac*(voltages[i + 1] - voltages[i])
+        self.bias = self.bias0
+        self.slope = (slopes[i] + slopes[i + 1])/2
+        self._integral = 0
+        self.actuate(self.bias)
+        return self.bias
+
+    def phase(self, power: np.array) -> np.array:
+        """ Phase [rad] of the fringe at the given power, pi/2 at quadrature. """
+        data = np.clip(2*(np.asarray(power) - self.pmin)/(self.pmax - self.pmin) - 1, -1, 1)
+        return np.arccos(data)
+
+    def _clip(self, bias: float) -> Tuple[float, bool]:
+        clipped = min(max(bias, self.limits[0] + self.dither*(self.mode == "dither")),
+                      self.limits[1] - self.dither*(self.mode == "dither"))
+        return clipped, clipped != bias
+
+    def _error(self) -> Tuple[float, float]:
+        """ Bias error [V] and the power at the operating point. """
+        if self.mode == "pi":
+            power = self.sense()
+            return (self.setpoint - power)/self.slope, power
+
+        # centre in the middle so that a linear drift cancels out
+        self.actuate(self.bias + self.dither)
+        upper = self.sense()
+        self.actuate(self.bias)
+        power = self.sense()
+        self.actuate(self.bias - self.dither)
+        lower = self.sense()
+        curvature = (upper + lower - 2*power)/self.dither**2
+        # for P = A/2*(1 + cos(a*V)) the curvature is -A/2*a^2*cos(a*V) and the
+        # slope at quadrature is A/2*a, so near quadrature the bias error is
+        # sign(slope)*curvature/(|slope|*a^2)
+        rate = 2*abs(self.slope)/(self.pmax - self.pmin)
+        error = np.sign(self.slope)*curvature/(abs(self.slope)*rate**2)
+        return error, power
+
+    def step(self, dt: float) -> Tuple[float, float]:
+        """
+        Run one iteration of the loop.
+
+        Returns
+        -------
+        float
+            Bias error [V]
+        float
+            Power at the operating point
+        """
+        error, power = self._error()
+        # the integral alone never drives the bias past the limits
+        integral = min(max(self._integral + self.ki*error*dt, self.limits[0] - self.bias0),
+                       self.limits[1] - self.bias0)
+        output = self.bias0 + self.kp*error + integral
+        bias, saturated = self._clip(output)
+        # anti-windup: do not integrate further into the saturation
+        if not saturated or (integral - self._integral)*(output - bias) < 0:
+            self._integral = integral
+        self.bias = bias
+        self.actuate(self.bias)
+        return error, power
+
+    def stop(self):
+        """ Stop the loop from another thread or a callback. """
+        self._stop = True
+
+    @property
+    def integral(self) -> float:
+        """ Integral term [V], the drift of the quadrature point since calibrate. """
+        return self._integral
+
+    def run(self, duration: float=None, steps: int=None, callback: Callable=None) -> Dict[str, np.array]:
+        """
+        Run the lock until the duration has passed, the number of steps
+        has been run or stop is called.
+
+        Parameters
+        ----------
+        duration: float, default: None
+            Time to run the lock for [s]
+        steps: int, default: None
+            Number of loop iterations
+        callback: Callable, default: None
+            Function called after every iteration as callback(i, telemetry_row)
+
+        Returns
+        -------
+        Dict[str, np.array]
+            Telemetry of every iteration: "time" [s], "dt" [s], "bias" [V],
+            "power", "error" [V], "phase" [rad], and "readback" if provided
+        """
+        if self.bias is None:
+            raise RuntimeError("Run calibrate before locking.")
+        self._stop = False
+        steps = steps or np.inf
+        duration = duration or np.inf
+
+        rows = {key: [] for key in ("time", "dt", "bias", "power", "error")}
+        readbacks = []
+        start = prev = time.perf_counter()
+        i = 0
+        while i < steps and prev - start < duration and not self._stop:
+            now = time.perf_counter()
+            dt = now - prev
+            prev = now
+            error, power = self.step(dt if i else 0)
+
+            row = {"time": now - start, "dt": dt, "bias": self.bias, "power": power, "error": error}
+            for key, val in row.items():
+                rows[key].append(val)
+            if self.readback is not None and i % self.readback_every == 0:
+                readbacks.append((i, self.readback()))
+            if callback is not None:
+                callback(i, row)
+            i += 1
+            if self.period:
+                time.sleep(max(0, self.period - (time.perf_counter() - now)))
+
+        telemetry = {key: np.array(val) for key, val in rows.items()}
+        telemetry["phase"] = self.phase(telemetry["power"])
+        if readbacks:
+            telemetry["readback index"] = np.array([idx for idx, _ in readbacks])
+            telemetry["readback"] = np.array([val for _, val in readbacks])
+        return telemetry
+
+    @staticmethod
+    def loop_stats(telemetry: Dict[str, np.array]) -> Dict[str, float]:
+        """ Loop rate [Hz], mean, jitter (std) and worst loop period [s]. """
+        dt = telemetry["dt"][1:]
+        if not len(dt):
+            return {"rate": 0, "mean": 0, "jitter": 0, "max": 0}
+        return {"rate": 1/dt.mean(), "mean": dt.mean(), "jitter": dt.std(), "max": dt.max()}
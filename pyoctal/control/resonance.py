@@ -0,0 +1,172 @@
+"""
+Follow a ring resonance with the tunable laser while the bias changes.
+
+Instead of a full search at every bias point, the tracker measures a
+few powers in a small window around the last estimate and moves the
+estimate to the centre of the fitted dip. A wide search is only run
+when the lock is lost.
+
+For a Lorentzian dip, 1/(baseline - power) is exactly a parabola in the
+detuning, so its vertex gives the centre even when the estimate is
+off by more than the window.
+
+e.g.
+    tracker = ResonanceTracker(mm, window=0.01)
+    tracker.acquire(1555.65, span=2)
+    for volt in voltages:
+        pm.set_volt(volt)
+        wavelength, power = tracker.update()
+"""
+from typing import Dict, Tuple
+import time
+
+import numpy as np
+
+from pyoctal.instruments.agilent816xB import Agilent816xB
+
+
+class ResonanceTracker:
+    """
+    Track the wavelength of a resonance dip with an Agilent 816xB.
+
+    Parameters
+    ----------
+    mm: Agilent816xB
+        Lightwave measurement system with the laser and the detector
+    window: float, default: 0.01
+        Half width of the dithered window [nm]. About half of the
+        resonance linewidth works best.
+    npts: int, default: 3
+        Number of powers measured in the window per update (odd)
+    max_shift: float, default: None
+        Maximum move of the estimate per update [nm]. Defaults to 2*window.
+    patience: int, default: 3
+        Number of failed updates in a row before the lock is lost
+    min_depth: float, default: 0.5
+        Minimum depth of the fitted dip, relative to the depth found by
+        the last wide search, to stay locked
+    span: float, default: 1
+        Span of the wide search [nm]
+    step: float, default: None
+        Step of the wide search [nm]. Defaults to window/2.
+    settle: float, default: 0
+        Time to wait after changing the wavelength [s]
+    """
+    def __init__(self, mm: Agilent816xB, window: float=0.01, npts: int=3,
+                 max_shift: float=None, patience: int=3, min_depth: float=0.5,
+                 span: float=1, step: float=None, settle: float=0):
+        self.mm = mm
+        self.window = window
+        self.offsets = np.linspace(-window, window, npts)
+        self.max_shift = max_shift or 2*window
+        self.patience = patience
+        self.min_depth = min_depth
+        self.span = span
+        self.step = step or window/2
+        self.settle = settle
+
+        self.wavelength = None # current estimate [nm]
+        self.baseline = None # off-resonance power
+        self.depth = None # dip depth found by the last wide search
+        self.failures = 0
+        self.searches = 0
+        self.history = {key: [] for key in ("wavelength", "power", "locked", "time")}
+
+    def _powers(self, wavelengths: np.array) -> np.array:
+        """ Detected power at each wavelength. """
+        powers = np.empty(len(wavelengths))
+        for i, wavelength in enumerate(wavelengths):
+            # the detector calibration wavelength does not need to follow a small window
+            self.mm.set_laser_wav(wavelength)
+            if self.settle:
+                time.sleep(self.settle)
+            powers[i] = self.mm.get_detect_pow()
+        return powers
+
+    def acquire(self, wavelength: float=None, span: float=None) -> float:
+        """
+        Search for the deepest dip around a wavelength.
+
+        Parameters
+        ----------
+        wavelength: float, default: None
+            Centre of the search [nm]. Defaults to the last estimate.
+        span: float, default: None
+            Span of the search [nm]. Defaults to the tracker span.
+
+        Returns
+        -------
+        float
+            The resonance wavelength [nm]
+        """
+        centre = self.wavelength if wavelength is None else wavelength
+        span = span or self.span
+        wavelengths = np.arange(centre - span/2, centre + span/2 + self.step/2, self.step)
+        powers = self._powers(wavelengths)
+        self.baseline = powers.max()
+        i = int(np.clip(np.argmin(powers), 1, len(powers) - 2))
+        coeffs = self._fit(np.array([-self.step, 0, self.step]), powers[i-1:i+2])
+        shift = 0 if coeffs is None else np.clip(-coeffs[1]/(2*coeffs[0]), -self.step, self.step)
+        self.wavelength = wavelengths[i] + shift
+        self.depth = self.baseline - powers[i]
+        self.failures = 0
+        self.searches += 1
+        return self.wavelength
+
+    def _fit(self, offsets: np.array, powers: np.array) -> np.array:
+        """ Fit a parabola to 1/(baseline - power), or None if it is not a dip. """
+        height = self.baseline - powers
+        if np.any(height <= 0):
+            return None
+        coeffs = np.polyfit(offsets, 1/height, 2)
+        return coeffs if coeffs[0] > 0 else None
+
+    def update(self) -> Tuple[float, float]:
+        """
+        Measure around the estimate and move it to the bottom of the dip.
+
+        Returns
+        -------
+        float
+            The resonance wavelength [nm]
+        float
+            The power at the resonance
+        """
+        if self.wavelength is None:
+            raise RuntimeError("Run acquire before tracking.")
+
+        wavelengths = self.wavelength + self.offsets
+        powers = self._powers(wavelengths)
+        coeffs = self._fit(self.offsets, powers)
+        locked = coeffs is not None
+        if locked:
+            shift = -coeffs[1]/(2*coeffs[0])
+            # depth of the dip at the fitted centre
+            depth = 1/np.polyval(coeffs, shift)
+            locked = abs(shift) <= self.max_shift and depth >= self.min_depth*self.depth
+            power = self.baseline - depth
+        if not locked:
+            # walk downhill towards the lowest point of the window
+            shift = self.offsets[np.argmin(powers)]
+            power = powers.min()
+
+        if locked:
+            self.failures = 0
+        else:
+            self.failures += 1
+        self.wavelength += float(np.clip(shift, -self.max_shift, self.max_shift))
+
+        if self.failures >= self.patience:
+            self.acquire()
+            locked = False
+            power = self._powers([self.wavelength])[0]
+
+        power = float(power)
+        for key, val in (("wavelength", self.wavelength), ("power", power),
+                         ("locked", locked), ("time", time.perf_counter())):
+            self.history[key].append(val)
+        return self.wavelength, power
+
+    def get_history(self) -> Dict[str, np.array]:
+        """ Estimates, powers, lock states and timestamps of all the updates. """
+        return {key: np.array(val) for key, val in self.history.items()}
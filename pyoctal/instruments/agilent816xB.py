@@ -151,6 +151,10 @@ class Agilent816xB(BaseInstrument):
         """ Get the detector power. """
         return self.query_float(f"read{self.sens_num}:channel{self.sens_chan}:power?")
 
+    def get_detect_avgtime(self) -> float:
+        """ Get the detector average time [s]. """
+        return self.query_float(f"{self.detect}:power:atime?")
+
     def get_trigno(self) -> int:
         """ Get the detector trigger number. """
         return int(self.query("source:channel:wavelength:sweep:exp?"))
@@ -515,15 +519,7 @@ class Agilent8163B(Agilent816xB):
     sens_chan: int, default: 1
         Sensor channel
     """
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-    def __init__(self, rm, src_num: int=1,
-=======
-    def __init__(self, rm: ResourceManager, src_num: int=1,
->>>>>>> Stashed changes
-=======
     def __init__(self, rm: ResourceManager, src_num: int=1,
->>>>>>> Stashed changes
                  src_chan: int=1, sens_num: int=2, sens_chan: int=1):
         super().__init__(
             rm=rm,
@@ -552,15 +548,7 @@ class Agilent8164B(Agilent816xB):
     sens_chan: int, default: 1
         Sensor channel
     """
-<<<<<<< Updated upstream
-<<<<<<< Updated upstream
-    def __init__(self, rm, src_num: int=0,
-=======
-    def __init__(self, rm: ResourceManager, src_num: int=0,
->>>>>>> Stashed changes
-=======
     def __init__(self, rm: ResourceManager, src_num: int=0,
->>>>>>> Stashed changes
                  src_chan: int=1, sens_num: int=2, sens_chan: int=1):
         super().__init__(
             rm=rm,
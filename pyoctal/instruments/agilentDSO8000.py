@@ -1,6 +1,11 @@
+from typing import Tuple, Dict
+from collections import namedtuple
+
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
+from pyoctal.utils.error import PARAM_OUT_OF_RANGE_ERR, COND_INVALID_ERR, error_message
 
 class AgilentDSO8000(BaseInstrument):
     """ 
@@ -14,9 +19,114 @@ class AgilentDSO8000(BaseInstrument):
         Pyvisa resource manager
     """
 
+    meas_slots = 5
+
     def __init__(self, rm: ResourceManager):
         super().__init__(rm=rm)
+        self._meas_set = None # measurements configured in the slots
+        self._meas_record = None
 
     def get_mag(self, chan: int) -> float:
         """ Get the magnitude of a channel. """
         return self.query_float(f"measure:vamplitude? channel{chan}")
+
+    def setup_meas_set(self, measurements: Dict):
+        """
+        Configure the measurements once for a set of measurements.
+
+        The configuration is cached, so calling this again with the same
+        measurements does not send anything.
+
+        Parameters
+        ----------
+        measurements: Dict
+            Name of each measurement and its (type, channel),
+            i.e. {"amp": ("vamplitude", 1), "rise": ("risetime", 1)}
+        """
+        measurements = dict(measurements)
+        if measurements == self._meas_set:
+            return
+        if len(measurements) > self.meas_slots:
+            raise ValueError(
+                f"Error code {PARAM_OUT_OF_RANGE_ERR:x}: {error_message[PARAM_OUT_OF_RANGE_ERR]}. \
+                Only {self.meas_slots} measurements can be shown at once."
+            )
+        self.write("measure:clear")
+        self.write("measure:statistics current") # only the current value of each result
+        for typ, chan in measurements.values():
+            self.write(f"measure:{typ} channel{chan}")
+        self._meas_set = measurements
+        self._meas_record = namedtuple("MeasurementSet", measurements.keys())
+
+    def get_meas_set(self):
+        """
+        Read all configured measurements in one compound query.
+
+        Each measurement is queried by its type and channel, so the
+        results are matched to the names regardless of the order that
+        measure:results? would report them in.
+        """
+        if self._meas_set is None:
+            raise ValueError(
+                f"Error code {COND_INVALID_ERR:x}: {error_message[COND_INVALID_ERR]}. \
+                Call setup_meas_set first."
+            )
+        cmd = ";:".join(f"measure:{typ}? channel{chan}" for typ, chan in self._meas_set.values())
+        return self._meas_record(*map(float, self.query(cmd).split(";")))
+
+    def digitize(self, chan: int):
+        """ Take one acquisition of a channel and wait until it is finished. """
+        self.write(f"digitize channel{chan}")
+        self.opc()
+
+    def set_wfm_source(self, chan: int):
+        """ Set the waveform source channel. """
+        self.write(f"waveform:source channel{chan}")
+
+    def set_wfm_format(self, fmt: str):
+        """ Set the waveform data format. """
+        self.value_check(fmt.lower(), ("ascii", "asc", "byte", "word", "binary", "bin"))
+        self.write(f"waveform:format {fmt}")
+
+    def set_wfm_byteorder(self, order: str):
+        """ Set the byte order of the binary waveform data. """
+        self.value_check(order.lower(), ("lsbfirst", "lsbf", "msbfirst", "msbf"))
+        self.write(f"waveform:byteorder {order}")
+
+    def get_wfm_preamble(self) -> Dict:
+        """ Get the waveform scaling information. """
+        rsp = self.query("waveform:preamble?").split(",")
+        keys = ("format", "type", "points", "count", "xinc", "xorg", "xref", "yinc", "yorg", "yref")
+        return dict(zip(keys, map(float, rsp[:len(keys)])))
+
+    def get_wfm_data(self) -> np.array:
+        """ Get the raw waveform data as 16-bit binary values. """
+        return self.query_binary_values("waveform:data?", datatype="h", container=np.array)
+
+    def get_waveform(self, chan: int, single: bool=True) -> Tuple[np.array, np.array]:
+        """
+        Get a waveform of a channel in one binary transfer.
+
+        Parameters
+        ----------
+        chan: int
+            The channel to read
+        single: bool, default: True
+            If true, take a new acquisition first.
+
+        Returns
+        -------
+        np.array
+            Time [s]
+        np.array
+            Voltage [V]
+        """
+        if single:
+            self.digitize(chan)
+        self.set_wfm_source(chan)
+        self.set_wfm_format("word")
+        self.set_wfm_byteorder("lsbfirst")
+        pre = self.get_wfm_preamble()
+        data = self.get_wfm_data()
+        xdata = (np.arange(len(data)) - pre["xref"])*pre["xinc"] + pre["xorg"]
+        return xdata, (data - pre["yref"])*pre["yinc"] + pre["yorg"]
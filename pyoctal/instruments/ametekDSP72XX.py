@@ -1,12 +1,82 @@
+from abc import ABC, abstractmethod
 import time
-from typing import Union, List, Tuple
+from typing import Union, List, Tuple, Dict
 
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
 from pyoctal.utils.error import PARAM_INVALID_ERR, error_message
 
-class AmetekDSP7230(BaseInstrument):
+class AmetekDSP72XX(BaseInstrument, ABC):
+    """
+    Ametek DSP72XX General Lock-In VISA Library.
+
+    The time constant and filter slope are cached when they are set so
+    that the settle time after an input change is known without a query.
+    Call start_settle when the input changes, do other work, and then
+    wait_settle only sleeps for whatever is left of the settle time.
+
+    The settle time is the time for the step response of the output
+    filter to reach 99% of its final value, which is 4.6, 6.6, 8.4 and
+    10.0 time constants for 6, 12, 18 and 24 dB/octave, rounded in
+    settle_factors. Fewer time constants are not enough for the steeper
+    slopes, i.e. after 5 time constants a 24 dB/octave filter is only
+    at 73% of the step.
+
+    Parameters
+    ----------
+    addr: str
+        The address of the instrument
+    rm:
+        Pyvisa resource manager
+    """
+    # time constants to settle within 1% of the final value for each slope [dB/octave]
+    settle_factors = {
+        6: 5,
+        12: 7,
+        18: 9,
+        24: 10,
+    }
+
+    def __init__(self, rm: ResourceManager):
+        super().__init__(rm=rm)
+        self._tc = None # time constant [s]
+        self._slope = None # filter slope [dB/octave]
+        self._settle_until = 0
+
+    @abstractmethod
+    def get_tc(self) -> float:
+        """ Get the time constant [s]. """
+
+    @abstractmethod
+    def get_slope(self) -> int:
+        """ Get the filter slope [dB/octave]. """
+
+    def get_settle_time(self) -> float:
+        """ Get the time [s] for the output to settle after an input change. """
+        if self._tc is None:
+            self._tc = self.get_tc()
+        if self._slope is None:
+            self._slope = self.get_slope()
+        return self.settle_factors[self._slope]*self._tc
+
+    def start_settle(self):
+        """ Mark that the input has changed and start counting the settle time. """
+        self._settle_until = time.perf_counter() + self.get_settle_time()
+
+    def is_settled(self) -> bool:
+        """ Check if the settle time since the last start_settle has passed. """
+        return time.perf_counter() >= self._settle_until
+
+    def wait_settle(self):
+        """ Wait for the remaining settle time since the last start_settle. """
+        remaining = self._settle_until - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+class AmetekDSP7230(AmetekDSP72XX):
     """
     Ametek DSP7230 DSP Lock-In Amplifier VISA Library.
 
@@ -17,10 +87,56 @@ class AmetekDSP7230(BaseInstrument):
     rm:
         Pyvisa resource manager
     """
+    _slope_dict = {
+    #   slope [dB/octave] : n
+        6: 0,
+        12: 1,
+        18: 2,
+        24: 3,
+    }
 
     def __init__(self, rm: ResourceManager):
         super().__init__(rm=rm)
 
+    def set_tc(self, tc: float):
+        """ Set the time constant [ms]. """
+        tconst_dict = {
+        #   time constant (ms) : n
+            1: 6,
+            2: 7,
+            5: 8,
+            10: 9,
+            20: 10,
+            50: 11,
+            1e+2: 12, # 100
+            2e+2: 13,
+            5e+2: 14,
+            1e+3: 15, # 1000
+            2e+3: 16,
+            5e+3: 17,
+            1e+4: 18, # 10000
+            2e+4: 19,
+        }
+
+        n = tconst_dict[tc]
+        self.write(f"tc {n}")
+        self._tc = tc*1e-03
+
+    def set_slope(self, slope: int):
+        """ Set the output filter slope [dB/octave]. """
+        n = self._slope_dict[slope]
+        self.write(f"slope {n}")
+        self._slope = slope
+
+    def get_tc(self) -> float:
+        """ Get the time constant [s]. """
+        return self.query_float("tc.")
+
+    def get_slope(self) -> int:
+        """ Get the filter slope [dB/octave]. """
+        n = self.query_int("slope")
+        return {v: k for k, v in self._slope_dict.items()}[n]
+
     def get_mag(self) -> float:
         """ Get the magnitude. """
         return self.query_float("mag.?")
@@ -33,7 +149,7 @@ class AmetekDSP7230(BaseInstrument):
         """ Get the module y voltage. """
         return self.query_float("y.?")
 
-class AmetekDSP7265(BaseInstrument):
+class AmetekDSP7265(AmetekDSP72XX):
     """
     Ametek DSP7265 DSP Lock-In VISA Library.
 
@@ -45,8 +161,39 @@ class AmetekDSP7265(BaseInstrument):
         Pyvisa resource manager
     """
 
-    def __init__(self, addr: str, rm):
-        super().__init__(rsc_addr=addr, rm=rm)
+    # curve buffer bit numbers used by cbd and dc commands (dual reference mode)
+    _curve_bits = {
+        "x1": 0,
+        "y1": 1,
+        "mag1": 2,
+        "pha1": 3,
+        "sen1": 4,
+        "adc1": 5,
+        "adc2": 6,
+        "adc3": 7,
+        "dac1": 8,
+        "dac2": 9,
+        "noise": 10,
+        "ratio": 11,
+        "logratio": 12,
+        "event": 13,
+        "x2": 16,
+        "y2": 17,
+        "mag2": 18,
+        "pha2": 19,
+        "sen2": 20,
+    }
+
+    _slope_dict = {
+    #   slope : n
+        6: 0,
+        12: 1,
+        18: 2,
+        24: 3,
+    }
+
+    def __init__(self, rm: ResourceManager):
+        super().__init__(rm=rm)
 
     # Set
     def set_mag(self, mag: float):
@@ -95,6 +242,7 @@ class AmetekDSP7265(BaseInstrument):
         # set both channels to the same time constant
         self.write(f"tc1 {n}")
         self.write(f"tc2 {n}")
+        self._tc = tc*1e-03
 
     def set_dual_sensitivity(self, sens: int):
         sens_dict = {
@@ -117,17 +265,48 @@ class AmetekDSP7265(BaseInstrument):
         self.write(f"sen2 {n}")
 
     def set_dual_slope(self, slope: int):
-        slope_dict = {
-        #   slope : n
-            6: 0,
-            12: 1,
-            18: 2,
-            24: 3,
-        }
+        n = self._slope_dict[slope]
+        # set both channels to the same slope
+        self.write(f"slope1 {n}")
+        self.write(f"slope2 {n}")
+        self._slope = slope
 
-        n = slope_dict[slope]
-        self.write(f"sen1 {n}")
-        self.write(f"sen2 {n}")
+    # Curve buffer
+    def set_curve_buffer(self, curves: Union[List, Tuple]):
+        """ Define which curves are stored in the curve buffer, i.e. ("mag1", "mag2"). """
+        mask = 0
+        for curve in curves:
+            self.value_check(curve.lower(), tuple(self._curve_bits.keys()))
+            mask |= 1 << self._curve_bits[curve.lower()]
+        self.write(f"cbd {mask}")
+
+    def set_curve_length(self, length: int):
+        """ Set the number of points stored per curve. """
+        self.value_check(length, (1, 100001))
+        self.write(f"len {length}")
+
+    def set_curve_interval(self, interval: int):
+        """ Set the curve storage interval [ms]. Must be a multiple of 5ms. """
+        self.write(f"str {interval}")
+
+    def start_curve(self):
+        """ Start the curve acquisition. """
+        self.write("td")
+
+    def stop_curve(self):
+        """ Halt the curve acquisition. """
+        self.write("hc")
+
+    def get_curve_status(self) -> Tuple[int, int, int, int]:
+        """ Get the curve acquisition status, sweeps, status byte and points acquired. """
+        rsp = self.query("m").split(",")
+        return tuple(map(int, rsp))
+
+    def get_curve(self, curve: str) -> np.array:
+        """ Get a stored curve in floating point format. """
+        self.value_check(curve.lower(), tuple(self._curve_bits.keys()))
+        rsp = self.query(f"dc. {self._curve_bits[curve.lower()]}")
+        return np.array(rsp.split(","), dtype=float)
 
 
     # get
@@ -147,6 +326,99 @@ class AmetekDSP7265(BaseInstrument):
         """ Get the equation 1. """
         return self.query_float("equ1.?")
 
+    def get_tc(self) -> float:
+        """ Get the time constant [s] of channel 1. """
+        return self.query_float("tc1.")
+
+    def get_slope(self) -> int:
+        """ Get the filter slope [dB/octave] of channel 1. """
+        n = self.query_int("slope1")
+        return {v: k for k, v in self._slope_dict.items()}[n]
+
+    def setup_curves(self, curves: Union[List, Tuple], npts: int, interval: float) -> int:
+        """
+        Stop any acquisition and set up the curve buffer.
+
+        Parameters
+        ----------
+        curves: Union[List, Tuple]
+            Curves to store, i.e. ("mag1", "mag2")
+        npts: int
+            Number of points per curve
+        interval: float
+            Storage interval [s]. Rounded to a multiple of 5ms.
+
+        Returns
+        -------
+        int
+            The storage interval that was set [ms]
+        """
+        interval_ms = max(5, int(round(interval*1e+03/5))*5)
+
+        self.stop_curve()
+        self.set_curve_buffer(curves)
+        self.set_curve_length(npts)
+        self.set_curve_interval(interval_ms)
+        return interval_ms
+
+    def acquire_curves(self, curves: Union[List, Tuple], npts: int, interval: float,
+                       settle: bool=False) -> Tuple[np.array, Dict]:
+        """
+        Acquire curves with the internal curve buffer and fetch them in bulk.
+
+        The lock-in stores the points at its own storage interval, so there
+        is one round trip per curve instead of one per point.
+
+        Parameters
+        ----------
+        curves: Union[List, Tuple]
+            Curves to store, i.e. ("mag1", "mag2")
+        npts: int
+            Number of points per curve
+        interval: float
+            Storage interval [s]. Rounded to a multiple of 5ms.
+        settle: bool, default: False
+            If true, wait for the remaining settle time since start_settle first.
+
+        Returns
+        -------
+        np.array
+            Timestamps of the stored points [s]
+        Dict
+            Stored points of each curve
+        """
+        interval_ms = self.setup_curves(curves, npts, interval)
+
+        if settle:
+            self.wait_settle()
+
+        self.start_curve()
+        time.sleep(npts*interval_ms*1e-03)
+
+        # wait until the acquisition is finished
+        while self.get_curve_status()[0]:
+            time.sleep(interval_ms*1e-03)
+
+        timestamps = np.arange(npts)*interval_ms*1e-03
+        return timestamps, {curve: self.get_curve(curve)[:npts] for curve in curves}
+
+    def get_avgv_ch_buf(self, chan: int, duration: float, wait: float,
+                        settle: bool=False) -> float:
+        """
+        Obtain the averaged voltage value of a channel with the curve buffer.
+
+        This has the same averaging semantics as get_avgv_ch but the points
+        are sampled by the lock-in itself.
+        """
+        if chan not in (1, 2):
+            raise ValueError(
+                f"Error code {PARAM_INVALID_ERR:x}: {error_message[PARAM_INVALID_ERR]}. Channel should be 1 or 2"
+            )
+        points = int(duration/wait)
+        curve = f"mag{chan}"
+        _, data = self.acquire_curves((curve,), npts=points, interval=wait, settle=settle)
+        return np.mean(data[curve])
+
     def get_avgv_ch(self, chan: int, duration: float, wait: float) -> float:
         """ Obtain the averaged voltage value of a channel """
         points = int(duration/wait)
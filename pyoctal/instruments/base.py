@@ -62,7 +62,7 @@ class DeviceID:
         return self._vendor
     @property
     def modelno(self):
-        return self._vendor
+        return self._modelno
     @property
     def serialno(self):
         return self._serialno
@@ -151,6 +151,10 @@ class BaseInstrument:
         """ Write a command that sets a List of binary values. """
         self._instr.write_binary_values(cmd, **kwargs)
 
+    def write_raw(self, message: bytes):
+        """ Write raw bytes without adding the termination character. """
+        self._instr.write_raw(message)
+
     def query(self, cmd) -> str:
         """ Query command. """
         return self._instr.query(cmd).rstrip()
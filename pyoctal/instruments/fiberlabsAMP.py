@@ -2,6 +2,7 @@ from typing import Union, List
 import time
 import sys
 
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
@@ -95,40 +96,56 @@ class FiberlabsAMP(BaseInstrument):
             raise ValueError(f"Error code {PARAM_INVALID_ERR:x}: {error_message[PARAM_INVALID_ERR]}. Only Channel 1 can be set to ALC")
         self.write(f"setmod:,{chan},{mode}")
 
-    def set_curr_smart(self, mode: str, val: float):
-        """ 
-        Smarter way of setting current or power.
+    def get_chan_targets(self, mode: str, val: float) -> List:
+        """
+        Figure out what each channel setting should be from the total
+        current or power that you want to set.
 
-        Figure out what each channel current setting should be
-        from the current that you want to set.
+        Channels below the boundary are set to maximum, the channel at the
+        boundary is set to the remainder and the channels above are set to 0.
         """
         if mode == "ACC":
-            func = self.set_curr
             chan_max = self.chan_curr_max
         elif mode == "ALC":
-            func = self.set_power
             chan_max = self.chan_power_max
+        else:
+            raise ValueError(f"Error code {PARAM_INVALID_ERR:x}: {error_message[PARAM_INVALID_ERR]}. Mode should be ACC or ALC")
 
         boundary = val//chan_max + 1
-        val = val%chan_max
-
-        for chan in range(1, 5):
-            if chan < boundary:
-                 # set channels below the boundary to maximum
-                func(chan, chan_max)
-            elif chan == boundary:
-                # set channel at the boundary to the correct current
-                func(chan, val)
-            else:
-                # set channels above the boundary to 0mA
-                func(chan, 0)
-        
-            # make sure the last set channel is stabalised
-            self.wait_till_curr_is_stabalised(chan=chan)
+        chans = np.arange(1, 5)
+        targets = np.where(chans < boundary, chan_max, 0.0)
+        targets[chans == boundary] = val%chan_max
+        return targets.tolist()
+
+    def set_chans(self, mode: str, vals: List):
+        """
+        Set the current [mA] or power [mW] of all channels before waiting
+        for any of them to stabilise.
+        """
+        if mode == "ACC":
+            cmds = [f"setacc,{chan},{val}" for chan, val in enumerate(vals, start=1)]
+        elif mode == "ALC":
+            cmds = [f"setalc,{chan},{watt_to_dbm(val)}" for chan, val in enumerate(vals, start=1)]
+        else:
+            raise ValueError(f"Error code {PARAM_INVALID_ERR:x}: {error_message[PARAM_INVALID_ERR]}. Mode should be ACC or ALC")
+        # the returned strings have no termination character, so every
+        # command is read back before the next one is sent
+        for cmd in cmds:
+            self.write(cmd)
+
+    def set_curr_smart(self, mode: str, val: float):
+        """ 
+        Smarter way of setting current or power.
+
+        Figure out what each channel current setting should be
+        from the current that you want to set, set all channels
+        and then wait for them to stabilise together.
+        """
+        self.set_chans(mode, self.get_chan_targets(mode, val))
+        self.wait_till_all_curr_is_stabalised()
 
     def set_all_curr(self, curr: float):
-        for chan in range(1, 5):
-            self.set_curr(chan=chan, curr=curr)
+        self.set_chans("ACC", [curr]*4)
 
     def set_curr(self, chan: int, curr: float):
         """ Set the temporary setting of the current for ACC [mW]. """
@@ -213,3 +230,31 @@ class FiberlabsAMP(BaseInstrument):
             diff = new - prev
             prev = new
             time.sleep(0.1)
+
+    def wait_till_all_curr_is_stabalised(self, scale_factor: float=0.1, abs_tol: float=1,
+                                         max_time: float=60):
+        """
+        Make sure that the amplifier output currents of all channels stabilise.
+
+        All channels are monitored with one query per iteration.
+
+        Parameters
+        ----------
+        scale_factor: float, default: 0.1
+            The relative difference between two readings to be stable
+        abs_tol: float, default: 1
+            The absolute difference [mA] between two readings to be stable,
+            so that channels set to 0 mA, which read back noise, are stable
+        max_time: float, default: 60
+            The maximum time [s] to wait for the currents to be stable
+        """
+        start = time.time()
+        prev = np.array(self.get_mon_pump_curr())
+        while True:
+            time.sleep(0.1)
+            new = np.array(self.get_mon_pump_curr())
+            if np.all(np.abs(new - prev) <= np.maximum(scale_factor*np.abs(prev), abs_tol)):
+                break
+            if time.time() - start > max_time:
+                raise TimeoutError("Timeout: Amplifier currents did not stabilise.")
+            prev = new
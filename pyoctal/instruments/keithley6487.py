@@ -1,3 +1,6 @@
+from typing import Tuple
+
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
@@ -16,6 +19,14 @@ class Keithley6487(BaseInstrument):
 
     def __init__(self, rm: ResourceManager):
         super().__init__(rm=rm)
+        self._zcor_range = None # range on which the zero correction was acquired
+        self._zch_setup = False # meas_curr_zch settings are in place
+
+    def reset(self):
+        """ Reset the instrument. This also discards the zero correction. """
+        self._zcor_range = None
+        self._zch_setup = False
+        super().reset()
 
     def initiate(self):
         """ Initiate a measurement. """
@@ -38,13 +49,24 @@ class Keithley6487(BaseInstrument):
 
     def set_detect_autorange(self, state: bool):
         """ Set the detector current autorange. """
+        # the range may change, so the zero correction is no longer valid
+        self._zcor_range = None
         self.write(f"sense:current:auto {state}")
 
     def set_detect_curr_range(self, crange: float):
         """ Set the detector current range. """
         self.value_check(crange, (-0.021, 0.021))
+        if crange != self._zcor_range:
+            # zero correction is only valid on the range it was acquired on
+            self._zcor_range = None
+        self._zch_setup = False
         self.write(f"sense:current:range {crange}")
 
+    def set_detect_nplc(self, nplc: float):
+        """ Set the detector integration time in number of power line cycles. """
+        self.value_check(nplc, (0.009, 60.1))
+        self.write(f"sense:current:nplcycles {nplc}")
+
     def set_detect_ohms_state(self, state: bool):
         """ Set the detector damping state. """
         self.write(f"sense:damping:ohms:state {state}")
@@ -85,11 +107,82 @@ class Keithley6487(BaseInstrument):
         self.write(f"system:zcheck:state {state}")
 
     def set_sys_zcor_state(self, state: bool):
+        if not state:
+            self._zcor_range = None
         self.write(f"system:zcorrect:state {state}")
 
     def set_sys_zcor_acq(self):
         self.write("system:zcorrect:acquire")
 
+    def set_sys_azero_state(self, state: bool):
+        """ Set the autozero state. """
+        self.write(f"system:azero {state}")
+
+    def set_display_state(self, state: bool):
+        """ Set the front panel display state. Turning it off speeds up readings. """
+        self.write(f"display:enable {state}")
+
+
+    ## Format Commands ######################################
+    def set_format_data(self, fmt: str):
+        """ Set the data format. """
+        self.value_check(fmt.lower(), ("ascii", "asc", "sreal", "sre", "real"))
+        self.write(f"format:data {fmt}")
+
+    def set_format_border(self, border: str):
+        """ Set the byte order of the binary data. """
+        self.value_check(border.lower(), ("normal", "norm", "swapped", "swap"))
+        self.write(f"format:border {border}")
+
+    def set_format_elements(self, elements: str):
+        """ Set the elements included in a reading i.e. "reading,time". """
+        self.write(f"format:elements {elements}")
+
+    def get_format_elements(self) -> str:
+        """ Get the elements included in a reading. """
+        return self.query("format:elements?").strip()
+
+
+    ## Trace/Trigger Commands ######################################
+    def set_trace_clear(self):
+        """ Clear the trace buffer. """
+        self.write("trace:clear")
+
+    def set_trace_points(self, pts: int):
+        """ Set the number of trace points. """
+        self.value_check(pts, (0.5, 3000.5)) # 1 to 3000
+        self.write(f"trace:points {pts}")
+
+    def set_trace_source(self, source: str):
+        """ Set the source of the trace. """
+        self.write(f"trace:feed {source}")
+
+    def set_trace_ctl(self, ctl: str):
+        """ Set trace control. """
+        self.value_check(ctl.lower(), ("never", "next"))
+        self.write(f"trace:feed:control {ctl}")
+
+    def set_trig_count(self, count: int):
+        """ Set trigger count. """
+        self.value_check(count, (0.5, 2048.5)) # 1 to 2048
+        self.write(f"trigger:count {count}")
+
+    def set_trig_delay(self, delay: float):
+        """ Set trigger delay [s]. """
+        self.write(f"trigger:delay {delay}")
+
+    def get_trig_count(self) -> int:
+        """ Get trigger count. """
+        return int(self.query_float("trigger:count?"))
+
+    def get_trig_delay(self) -> float:
+        """ Get trigger delay [s]. """
+        return self.query_float("trigger:delay?")
+
+    def get_trace_data_binary(self) -> np.array:
+        """ Get all trace buffer data as single precision binary values. """
+        return self.query_binary_values("trace:data?", datatype="f", container=np.array)
+
 
     ## Measure Commands ######################################
     def meas_curr(self) -> float:
@@ -113,16 +206,36 @@ class Keithley6487(BaseInstrument):
         return float(data.split(",")[0])
     
 
-    def meas_curr_zch(self) -> float:
-        self.reset()
+    def zero_correct(self, crange: float=2e-09):
+        """
+        Acquire the zero correction on the given current range.
+
+        The acquired value is kept and reused until the range or the
+        autorange changes, the zero correction is disabled or the
+        instrument is reset, so calling this repeatedly is cheap.
+
+        Parameters
+        ----------
+        crange: float, default: 2e-09
+            The current range [A] to acquire the zero correction on
+        """
+        if self._zcor_range == crange:
+            return
         self.set_sys_zch_state(1) # Enable zero check.
-        self.set_detect_curr_range(crange=2e-09) # Select the 2nA range
+        self.set_detect_curr_range(crange=crange)
         self.initiate() # Trigger reading to be used as zero correction.
         self.set_sys_zcor_acq() # Use last reading taken as zero correct value.
         self.set_sys_zcor_state(1) # Perform zero correction.
-        self.set_detect_autorange(1) # Enable auto range.
-        self.set_sys_zcor_state(0) # Perform zero correction.
         self.set_sys_zch_state(0) # Disable zero check.
+        self._zcor_range = crange
+
+    def meas_curr_zch(self) -> float:
+        if not self._zch_setup:
+            self.reset()
+            self.zero_correct(crange=2e-09) # Select the 2nA range
+            self.set_detect_autorange(1) # Enable auto range.
+            self.set_sys_zcor_state(0) # Perform zero correction.
+            self._zch_setup = True
 
         data = self.read() # Trigger and return one reading.
         return float(data.split(",")[1])
@@ -145,6 +258,73 @@ class Keithley6487(BaseInstrument):
         data = self.read() # Trigger and return one reading.
         return float(data.split(",")[1].strip('OHM'))
 
+    def meas_curr_buffered(self, npts: int, crange: float=None,
+                      nplc: float=1.0, delay: float=0) -> Tuple[np.array, np.array]:
+        """
+        Take a buffered current measurement and return it in one binary transfer.
+
+        The readings are stored in the trace buffer at the instrument's own
+        reading rate, then fetched as single precision floats.
+
+        Parameters
+        ----------
+        npts: int
+            Number of readings to take (max 2048 per trigger count)
+        crange: float, default: None
+            The current range [A]. If provided, the zero correction is acquired
+            on this range (only once until the range changes).
+            If not provided, use autorange without zero correction.
+        nplc: float, default: 1.0
+            Integration time in number of power line cycles
+        delay: float, default: 0
+            Delay between each trigger [s]
+
+        Returns
+        -------
+        np.array
+            Current readings [A]
+        np.array
+            Timestamps of the readings [s]
+        """
+        # the settings below differ from the ones meas_curr_zch relies on
+        self._zch_setup = False
+        if crange is None:
+            self.set_detect_autorange(1)
+        else:
+            self.zero_correct(crange=crange)
+            self.set_detect_curr_range(crange=crange)
+        self.set_detect_nplc(nplc)
+
+        elements = self.get_format_elements()
+        count = self.get_trig_count()
+        trig_delay = self.get_trig_delay()
+        self.set_format_elements("reading,time")
+        self.set_format_data("sreal")
+        self.set_format_border("swapped") # little endian
+
+        self.set_trace_clear()
+        self.set_trace_points(npts)
+        self.set_trace_source("sense")
+        self.set_trace_ctl("next")
+        self.set_trig_delay(delay)
+        self.set_trig_count(npts)
+
+        try:
+            self.initiate()
+            self.opc() # wait until the buffer is filled
+            data = self.get_trace_data_binary()
+        finally:
+            self.set_trace_ctl("never")
+            self.set_format_data("ascii")
+            # meas_curr_zch and meas_resistance parse the default elements
+            self.set_format_elements(elements)
+            # read() based measurements expect one reading per trigger
+            self.set_trig_count(count)
+            self.set_trig_delay(trig_delay)
+
+        data = data.reshape(-1, 2)
+        return data[:,0], data[:,1]
+
 
 
 def main():
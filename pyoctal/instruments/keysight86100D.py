@@ -1,5 +1,6 @@
-from typing import Union
+from typing import Union, Tuple, Dict
 
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
@@ -112,6 +113,130 @@ class Keysight86100D(BaseInstrument):
     
 
 
+    # Waveform commands
+    def set_wfm_source(self, src: str):
+        """ Set the waveform source, i.e. channel1, histogram. """
+        self.write(f"waveform:source {src}")
+
+    def set_wfm_format(self, fmt: str):
+        """ Set the waveform data format. """
+        self.value_check(fmt.lower(), ("ascii", "asc", "byte", "word", "long"))
+        self.write(f"waveform:format {fmt}")
+
+    def set_wfm_byteorder(self, order: str):
+        """ Set the byte order of the binary waveform data. """
+        self.value_check(order.lower(), ("lsbfirst", "lsbf", "msbfirst", "msbf"))
+        self.write(f"waveform:byteorder {order}")
+
+    def get_wfm_preamble(self) -> Dict:
+        """ Get the waveform scaling information. """
+        rsp = self.query("waveform:preamble?").split(",")
+        keys = ("format", "type", "points", "count", "xinc", "xorg", "xref", "yinc", "yorg", "yref")
+        return dict(zip(keys, map(float, rsp[:len(keys)])))
+
+    def get_wfm_data(self, datatype: str="h") -> np.array:
+        """ Get the raw waveform data as binary values. """
+        return self.query_binary_values("waveform:data?", datatype=datatype, container=np.array)
+
+    def digitize(self):
+        """ Take one acquisition and wait until it is finished. """
+        self.write("digitize")
+        self.opc()
+
+    # Histogram commands
+    def set_hist_mode(self, mode: str):
+        """ Set the histogram mode. """
+        self.value_check(mode.lower(), ("vertical", "vert", "horizontal", "hor", "off"))
+        self.write(f"histogram:mode {mode}")
+
+    def set_hist_window(self, x1: float, x2: float, y1: float, y2: float):
+        """ Set the histogram window [s, V]. """
+        self.write(f"histogram:window:source {self.channel}")
+        self.write(f"histogram:window:x1position {x1}")
+        self.write(f"histogram:window:x2position {x2}")
+        self.write(f"histogram:window:y1position {y1}")
+        self.write(f"histogram:window:y2position {y2}")
+
+    # Complex functions
+    invalid_words = (31232, 32000, 32256) # hole, clipped low, clipped high
+
+    def _scale_wfm(self, data: np.array, pre: Dict) -> np.array:
+        """ Scale raw word data to volts. Holes and clipped samples are nan. """
+        ydata = (data - pre["yref"])*pre["yinc"] + pre["yorg"]
+        return np.where(np.isin(data, self.invalid_words), np.nan, ydata)
+
+    def get_waveform(self, src: str=None) -> Tuple[np.array, np.array]:
+        """
+        Get a waveform in one binary transfer.
+
+        Parameters
+        ----------
+        src: str, default: None
+            The waveform source. If not provided, use the instrument channel.
+
+        Returns
+        -------
+        np.array
+            Time [s]
+        np.array
+            Amplitude. Holes and clipped samples are nan.
+        """
+        self.set_wfm_source(src or self.channel)
+        self.set_wfm_format("word")
+        self.set_wfm_byteorder("lsbfirst")
+        pre = self.get_wfm_preamble()
+        data = self.get_wfm_data()
+        xdata = (np.arange(len(data)) - pre["xref"])*pre["xinc"] + pre["xorg"]
+        return xdata, self._scale_wfm(data, pre)
+
+    def acquire_waveforms(self, num: int, src: str=None) -> Tuple[np.array, np.array]:
+        """
+        Take repeated acquisitions into a preallocated array.
+
+        The preamble is only queried once, so each acquisition is one
+        digitize and one binary transfer.
+
+        Returns
+        -------
+        np.array
+            Time [s] shared by all acquisitions
+        np.array
+            Amplitude with shape (num, points)
+        """
+        self.digitize()
+        xdata, first = self.get_waveform(src)
+        pre = self.get_wfm_preamble()
+
+        ydata = np.empty((num, len(first)))
+        ydata[0] = first
+        for i in range(1, num):
+            self.digitize()
+            ydata[i] = self._scale_wfm(self.get_wfm_data(), pre)
+        return xdata, ydata
+
+    def get_histogram(self, mode: str="vertical") -> Tuple[np.array, np.array]:
+        """
+        Get the histogram counts in one binary transfer.
+
+        The histogram window should be set with set_hist_window first.
+
+        Returns
+        -------
+        np.array
+            Bin positions [V] for a vertical histogram, [s] for a horizontal one
+        np.array
+            Counts of each bin
+        """
+        self.set_hist_mode(mode)
+        self.set_wfm_source("histogram")
+        self.set_wfm_format("long")
+        self.set_wfm_byteorder("lsbfirst")
+        pre = self.get_wfm_preamble()
+        counts = self.get_wfm_data(datatype="i")
+        bins = (np.arange(len(counts)) - pre["xref"])*pre["xinc"] + pre["xorg"]
+        return bins, counts
+
+
 class KeysightFlexDCA(BaseInstrument):
     """
     Keysight FlexDCA for controlling 86100D Wide-Bandwidth Oscilloscope VISA Library.
@@ -1,5 +1,6 @@
-from typing import Union
+from typing import Union, List, Tuple
 
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
@@ -86,4 +87,138 @@ class KeysightE8257D(BaseInstrument):
     # Power 
     def set_output_power(self, power: float):
         """ Get the output power [dBm]. """
-        self.write(f"power:level:immediate:amplitude {power}dBm")
\ No newline at end of file
+        self.write(f"power:level:immediate:amplitude {power}dBm")
+
+    def set_power_mode(self, mode: str):
+        """ Set power mode. """
+        self.value_check(mode.lower(), ("fixed", "fix", "sweep", "swe", "list"))
+        self.write(f"power:mode {mode}")
+
+    def set_output_state(self, state: Union[bool, str]):
+        """ Set the RF output state. """
+        self.write(f"output:state {state}")
+
+    # List/step sweep
+    @staticmethod
+    def _to_list(values: Union[List, Tuple, np.array]) -> str:
+        """ Format an array into a comma separated list in one go. """
+        return ",".join(np.char.mod("%.12g", np.asarray(values, dtype=float)))
+
+    def set_list_type(self, typ: str):
+        """ Set the sweep type to a list or a step sweep. """
+        self.value_check(typ.lower(), ("list", "step"))
+        self.write(f"list:type {typ}")
+
+    def set_list_freqs(self, freqs: Union[List, Tuple, np.array]):
+        """ Set the list of frequencies [GHz]. """
+        self.write(f"list:frequency {self._to_list(np.asarray(freqs)*1e+09)}")
+
+    def set_list_powers(self, powers: Union[List, Tuple, np.array]):
+        """ Set the list of output powers [dBm]. """
+        self.write(f"list:power {self._to_list(powers)}")
+
+    def set_list_dwells(self, dwells: Union[List, Tuple, np.array]):
+        """ Set the list of dwell times [s]. """
+        self.write(f"list:dwell {self._to_list(dwells)}")
+
+    def set_list_direction(self, direction: str):
+        """ Set the direction of the sweep. """
+        self.value_check(direction.lower(), ("up", "down"))
+        self.write(f"list:direction {direction}")
+
+    def set_list_mode(self, mode: str):
+        """ Set whether the sweep points advance automatically or manually. """
+        self.value_check(mode.lower(), ("auto", "manual", "man"))
+        self.write(f"list:mode {mode}")
+
+    def set_list_trig_source(self, src: str):
+        """ Set the trigger source that advances each point of the sweep. """
+        self.value_check(src.lower(), ("bus", "immediate", "imm", "external", "ext", "key"))
+        self.write(f"list:trigger:source {src}")
+
+    def set_trig_source(self, src: str):
+        """ Set the trigger source that starts the sweep. """
+        self.value_check(src.lower(), ("bus", "immediate", "imm", "external", "ext", "key"))
+        self.write(f"trigger:source {src}")
+
+    def set_step_points(self, pts: int):
+        """ Set the number of points of a step sweep. """
+        self.value_check(pts, (1, 65536))
+        self.write(f"sweep:points {pts}")
+
+    def set_step_dwell(self, dwell: float):
+        """ Set the dwell time of each point of a step sweep [s]. """
+        self.write(f"sweep:dwell {dwell}")
+
+    def set_init_cont_state(self, state: Union[bool, str]):
+        """ Set whether the sweep is continuously re-armed. """
+        self.write(f"initiate:continuous {state}")
+
+    def initiate(self):
+        """ Arm a single sweep. """
+        self.write("initiate:immediate")
+
+    def get_list_freq_points(self) -> int:
+        """ Get the number of points in the frequency list. """
+        return self.query_int("list:frequency:points?")
+
+    def setup_list_sweep(self, freqs: Union[List, Tuple, np.array], powers: Union[List, Tuple, np.array]=None,
+                         dwells: Union[List, Tuple, np.array]=None, point_trig: str="immediate"):
+        """
+        Upload a list sweep in bulk and arm it for triggering.
+
+        Parameters
+        ----------
+        freqs: Union[List, Tuple, np.array]
+            Frequencies [GHz]
+        powers: Union[List, Tuple, np.array], default: None
+            Output powers [dBm]. If a single value is provided, it is used for all points.
+            If not provided, use the current fixed power.
+        dwells: Union[List, Tuple, np.array], default: None
+            Dwell times [s]. If a single value is provided, it is used for all points.
+            If not provided, use the current dwell setting.
+        point_trig: str, default: "immediate"
+            Trigger source to advance each point. Use "ext" to advance the point
+            on a trigger from the detector, or "bus" to advance it with *TRG.
+        """
+        freqs = np.asarray(freqs, dtype=float)
+        self.set_init_cont_state(0)
+        self.set_list_type("list")
+        self.set_list_freqs(freqs)
+        if powers is not None:
+            self.set_list_powers(np.broadcast_to(powers, freqs.shape))
+            self.set_power_mode("list")
+        else:
+            # a power list from an earlier sweep would stay on otherwise
+            self.set_power_mode("fixed")
+        if dwells is not None:
+            self.set_list_dwells(np.broadcast_to(dwells, freqs.shape))
+        self.set_list_mode("auto")
+        self.set_list_trig_source(point_trig)
+        self.set_trig_source("immediate")
+        self.set_freq_mode("list")
+
+    def setup_step_sweep(self, fstart: float, fstop: float, pts: int,
+                         dwell: float, point_trig: str="immediate"):
+        """
+        Set up a linearly spaced step sweep between two frequencies [GHz].
+
+        The point advance trigger works the same as in setup_list_sweep.
+        """
+        self.set_init_cont_state(0)
+        self.set_list_type("step")
+        self.set_freq_start(fstart)
+        self.set_freq_stop(fstop)
+        self.set_step_points(pts)
+        self.set_step_dwell(dwell)
+        # a power list from an earlier list sweep would stay on otherwise
+        self.set_power_mode("fixed")
+        self.set_list_mode("auto")
+        self.set_list_trig_source(point_trig)
+        self.set_trig_source("immediate")
+        self.set_freq_mode("sweep")
+
+    def run_sweep(self):
+        """ Run a single list or step sweep that was set up and wait until it is finished. """
+        self.initiate()
+        self.opc()
@@ -7,6 +7,7 @@ from pathlib import Path
 from os import makedirs
 
 import numpy as np
+import pythoncom
 import win32com.client
 
 class BasePAS:
@@ -272,3 +273,19 @@ def export_to_omr(data, filename: Path):
     """ Export the data to an OMR file. """
     makedirs(filename.parent, exist_ok=True)
     data.Write(filename.absolute())
+
+
+def marshal_omr(data):
+    """
+    Marshal an OMR result so that it can be exported from another thread
+    with export_marshalled_omr.
+    """
+    return pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch, data._oleobj_)
+
+
+def export_marshalled_omr(stream, filename: Path):
+    """ Export an OMR result marshalled by marshal_omr to an OMR file. """
+    data = win32com.client.Dispatch(
+        pythoncom.CoGetInterfaceAndReleaseStream(stream, pythoncom.IID_IDispatch)
+    )
+    export_to_omr(data, filename)
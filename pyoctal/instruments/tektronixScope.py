@@ -1,4 +1,5 @@
-from typing import Tuple
+from typing import Tuple, Union, List, Dict
+from collections import namedtuple
 
 import numpy as np
 import matplotlib.pyplot as plot
@@ -21,11 +22,29 @@ class TektronixScope(BaseInstrument):
 
     def __init__(self, rm: ResourceManager):
         super().__init__(rm=rm)
+        self._preambles = {} # (ymult, yoff, yzero) of each source
+        self._xdata = None
+        self._meas_set = None # measurements configured in the slots
+        self._meas_record = None
 
     def set_scope_acq_state(self, state: bool):
         """ Set the acquire state. """
         self.write(f"acquire:state {state}")
 
+    def set_scope_acq_stopafter(self, mode: str):
+        """ Set whether to stop after a single sequence or run continuously. """
+        self.value_check(mode.lower(), ("runstop", "runst", "sequence", "seq"))
+        self.write(f"acquire:stopafter {mode}")
+
+    def get_scope_acq_state(self) -> bool:
+        """ Get the acquire state. """
+        return bool(int(self.query("acquire:state?")))
+
+    def get_scope_acq_stopafter(self) -> str:
+        """ Get whether the scope stops after a single sequence or runs continuously. """
+        # the last word, with or without the response header
+        return self.query("acquire:stopafter?").split()[-1]
+
     # Measurement
     def set_meas_source(self, src: str):
         """ Set measurement source number. """
@@ -39,6 +58,53 @@ class TektronixScope(BaseInstrument):
         """ Get measurement data. """
         return self.query("measurement:immed:value?")
 
+    meas_slots = 4
+
+    def set_meas_slot(self, slot: int, typ: str, src: str):
+        """ Set the type and source of a measurement slot and turn it on. """
+        self.write(f"measurement:meas{slot}:source {src}")
+        self.write(f"measurement:meas{slot}:type {typ}")
+        self.write(f"measurement:meas{slot}:state on")
+
+    def setup_meas_set(self, measurements: Dict):
+        """
+        Configure the measurement slots once for a set of measurements.
+
+        The configuration is cached, so calling this again with the same
+        measurements does not send anything.
+
+        Parameters
+        ----------
+        measurements: Dict
+            Name of each measurement and its (type, source),
+            i.e. {"amp": ("amplitude", "CH1"), "rise": ("rise", "CH1")}
+        """
+        measurements = dict(measurements)
+        if measurements == self._meas_set:
+            return
+        if len(measurements) > self.meas_slots:
+            raise ValueError(
+                f"Error code {PARAM_OUT_OF_RANGE_ERR:x}: {error_message[PARAM_OUT_OF_RANGE_ERR]}. \
+                Only {self.meas_slots} measurement slots are available."
+            )
+        self.write("header off")
+        for slot, (typ, src) in enumerate(measurements.values(), start=1):
+            self.set_meas_slot(slot, typ, src)
+        self._meas_set = measurements
+        self._meas_record = namedtuple("MeasurementSet", measurements.keys())
+
+    def get_meas_set(self):
+        """ Read all configured measurement slots in one compound query. """
+        if self._meas_set is None:
+            raise ValueError(
+                f"Error code {COND_INVALID_ERR:x}: {error_message[COND_INVALID_ERR]}. \
+                Call setup_meas_set first."
+            )
+        cmd = ";:".join(
+            f"measurement:meas{slot}:value?" for slot in range(1, len(self._meas_set) + 1)
+        )
+        return self._meas_record(*map(float, self.query(cmd).split(";")))
+
     # Wfmoutpre
     def get_wfmo_ymult(self) -> float:
         """ Get voltage scale. """
@@ -103,10 +169,31 @@ class TektronixScope(BaseInstrument):
         """ Set data source number. """
         self.write(f"data:source {src}")
 
+    def set_data_width(self, width: int):
+        """ Set the number of bytes per data point. """
+        self.write(f"data:width {width}")
+
+    def set_data_range(self, start: int, stop: int):
+        """ Set the first and last data points to transfer. """
+        self.write(f"data:start {start}")
+        self.write(f"data:stop {stop}")
+
+    def get_data_format(self) -> str:
+        """ Get data encoding format. """
+        return self.query("data:encdg?").split()[-1]
+
+    def get_data_width(self) -> int:
+        """ Get the number of bytes per data point. """
+        return int(self.query("data:width?").split()[-1])
+
     def get_curve(self):
         """ Get the curve data. """
         return self.query("curve?")
 
+    def get_curve_binary(self) -> np.array:
+        """ Get the curve data as 16-bit little endian binary. """
+        return self.query_binary_values("curve?", datatype="h", container=np.array)
+
     def read_data(self) -> np.array:
         """ Function for reading data and parsing binary into np array """
         data = self.get_curve()
@@ -173,3 +260,78 @@ class TektronixScope(BaseInstrument):
         self.set_meas_type(typ="Mean")
 
         return self.get_meas_data()
+
+
+    def clear_cache(self):
+        """ Forget the cached preambles and time base after the scope settings changed. """
+        self._preambles.clear()
+        self._xdata = None
+
+    def get_preamble(self, src: str) -> Tuple[float, float, float]:
+        """ Get the (ymult, yoff, yzero) of a source. The data source must already be set. """
+        if src not in self._preambles:
+            self._preambles[src] = (
+                self.get_wfmo_ymult(), self.get_wfmo_yoff(), self.get_wfmo_yzero()
+            )
+        return self._preambles[src]
+
+    def single(self):
+        """ Take a single acquisition and wait until it has stopped on the trigger. """
+        self.set_scope_acq_stopafter("sequence")
+        self.set_scope_acq_state(1)
+        self.opc()
+
+    def capture(self, sources: Union[List, Tuple]=("CH1", "CH2", "CH3", "CH4"),
+                single: bool=True) -> Tuple[np.array, np.array]:
+        """
+        Capture several sources from the same trigger.
+
+        The acquisition is stopped after a single trigger so that all sources
+        come from the same event, then each source is read in one binary
+        transfer. The preambles and the time base are cached, so repeated
+        captures only read the curves. Call clear_cache after changing the
+        vertical or horizontal settings.
+
+        The data encoding, the data width and the stop after mode are
+        restored afterwards, so get_data and plot_wfm still read ASCII.
+
+        Parameters
+        ----------
+        sources: Union[List, Tuple], default: ("CH1", "CH2", "CH3", "CH4")
+            Sources to read. One of CH1-4, REFA, REFB.
+        single: bool, default: True
+            If true, take a new single acquisition first. Otherwise read the
+            sources of the acquisition that is already stopped.
+
+        Returns
+        -------
+        np.array
+            Time [s]
+        np.array
+            Scaled data with shape (sources, record length)
+        """
+        encoding, width = self.get_data_format(), self.get_data_width()
+        stopafter = self.get_scope_acq_stopafter() if single else None
+        try:
+            if single:
+                self.single()
+
+            if self._xdata is None:
+                self._xdata = self.get_xdata()
+            # set every time in case the settings were changed in between
+            self.set_data_format("sri") # signed little endian
+            self.set_data_width(2)
+            self.set_data_range(1, len(self._xdata))
+
+            data = np.empty((len(sources), len(self._xdata)))
+            for i, src in enumerate(sources):
+                self.set_data_source(src)
+                ymult, yoff, yzero = self.get_preamble(src)
+                data[i] = (self.get_curve_binary()[:len(self._xdata)] - yoff)*ymult + yzero
+        finally:
+            self.write(f"data:encdg {encoding}")
+            self.set_data_width(width)
+            if stopafter is not None:
+                self.write(f"acquire:stopafter {stopafter}")
+
+        return self._xdata, data
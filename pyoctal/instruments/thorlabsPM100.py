@@ -21,6 +21,10 @@ class ThorlabsPM100(BaseInstrument):
         """ Read the PM power (as shown on the display). """
         return self.query("read?")
 
+    def read_power(self) -> float:
+        """ Read the PM power [W] in a single query. """
+        return self.query_float("read?")
+
     def meas_power(self) -> float:
         """ Measure the PM power (as shown on the display). """
         self.write("measure:power")
@@ -1,4 +1,7 @@
 from typing import Union, List, Tuple
+from collections import OrderedDict
+import hashlib
+
 import numpy as np
 
 from pyvisa import ResourceManager
@@ -18,8 +21,12 @@ class TTiTGF3162(BaseInstrument):
         Pyvisa resource manager
     """
 
+    arb_memchans = (1, 2, 3, 4)
+
     def __init__(self, rm: ResourceManager):
         super().__init__(rm=rm)
+        # waveform hash held by each arb memory slot, least recently used first
+        self._arb_cache = OrderedDict()
 
     def set_freq(self, freq: float):
         """ Set frequency in Hz. """
@@ -58,14 +65,53 @@ class TTiTGF3162(BaseInstrument):
         """ Load arbitrary waveform. """
         self.write(f"arbload arb{memchan}")
 
+    @staticmethod
+    def arb_payload(array: Union[List, Tuple, np.array]) -> bytes:
+        """ Convert values between -1 and 1 into big endian int16 bytes. """
+        values = np.clip(np.asarray(array, dtype=float)*pow(2, 15), -pow(2, 15), pow(2, 15) - 1)
+        return values.astype(">i2").tobytes()
+
     def set_arb_waveform(self, array: Union[List, Tuple], memchan: int):
         """ 
         Set arbitrary waveform.
         
         The array of values should be between -1 and 1 and the max length is 1024.
+        The waveform is only uploaded if the memory slot does not hold it already.
+        """
+        payload = self.arb_payload(array)
+        digest = hashlib.sha1(payload).hexdigest()
+        if self._arb_cache.get(memchan) != digest:
+            # definite length block: #<number of digits><number of bytes><data>
+            nbytes = str(len(payload))
+            header = f"arb{memchan} #{len(nbytes)}{nbytes}".encode()
+            self.write_raw(header + payload + self._write_termination.encode())
+            self._arb_cache[memchan] = digest
+        self._arb_cache.move_to_end(memchan)
+
+    def set_arb_cached(self, array: Union[List, Tuple]) -> int:
+        """
+        Output an arbitrary waveform, uploading it only on a cache miss.
+
+        If none of the arb memory slots hold the waveform, it is uploaded to an
+        empty slot or else to the least recently used one.
+
+        Returns
+        -------
+        int
+            The arb memory slot holding the waveform
         """
-        values = np.int16(array*pow(2, 15))
-        self.write_binary_values(f"arb{memchan}, {values}", is_big_endian=True, datatype='h')
+        digest = hashlib.sha1(self.arb_payload(array)).hexdigest()
+        memchan = next((chan for chan, val in self._arb_cache.items() if val == digest), None)
+        if memchan is None:
+            free = [chan for chan in self.arb_memchans if chan not in self._arb_cache]
+            memchan = free[0] if free else next(iter(self._arb_cache))
+        self.set_arb_waveform(array, memchan)
+        self.load_arb(memchan)
+        return memchan
+
+    def clear_arb_cache(self):
+        """ Forget which waveform each arb memory slot holds. """
+        self._arb_cache.clear()
 
     def set_arb_output(self):
         """ Set the waveform output to arbitrary. """
@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Tuple
 
+import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments.base import BaseInstrument
@@ -21,6 +22,10 @@ class NicsLabXPOW(BaseInstrument):
         self.max_curr = 300
         self.max_volt = 29
         self.channel_number = 8
+        # last values sent to each channel, nan if unknown
+        self._settings = {
+            key: np.full(self.channel_number, np.nan) for key in ("VOLT", "CURR", "SVR")
+        }
 
     @property
     def max_current(self):
@@ -42,36 +47,71 @@ class NicsLabXPOW(BaseInstrument):
     def set_volt_single(self, chan: int, volt: float):
         """ Set the laser voltage [V]. """
         self.write(f"CH:{chan}:VOLT:{volt}")
+        self._settings["VOLT"][chan-1] = volt
 
-    def set_volt_all(self, volts: List):
+    def set_volt_all(self, volts: List, changed_only: bool=False):
         """ Set the laser voltage [V] for all channels. """
-        for chan in range(self.channel_number):
-            self.set_volt_single(chan+1, volts[chan])
+        self._set_all("VOLT", volts, changed_only)
 
     def set_group_volt(self, chmin: int, chmax: int, volt: float):
         " Set output voltage for a group of channels. "
         self.write(f"CH:{chmin}-{chmax}:{volt}")
+        self._settings["VOLT"][chmin-1:chmax] = volt
 
-    def set_range_all(self, ranges: List):
-        for chan in range(self.channel_number):
-            self.write(f"CH:{chan+1}:SVR:{ranges[chan]}")
+    def set_range_all(self, ranges: List, changed_only: bool=False):
+        """ Set the voltage range for all channels. """
+        self._set_all("SVR", ranges, changed_only)
 
 
     def set_curr_single(self, chan: int, curr: float):
         """ Set the laser voltage [V]. """
         self.write(f"CH:{chan}:CURR:{curr}")
+        self._settings["CURR"][chan-1] = curr
 
 
-    def set_curr_all(self, currs: List):
+    def set_curr_all(self, currs: List, changed_only: bool=False):
         """ Set the laser voltage [V] for all channels. """
-        for chan in range(self.channel_number):
-            self.set_curr_single(chan+1, currs[chan])
+        self._set_all("CURR", currs, changed_only)
 
     def set_channel(self, chan: int, volt: float, curr: float):
         """ Set a channel's current and voltage. """
         self.set_volt_single(chan, volt)
         self.set_curr_single(chan, curr)
 
+    def _set_all(self, key: str, vals: List, changed_only: bool):
+        """
+        Set a value for all channels in the fewest commands.
+
+        Neighbouring channels with the same voltage are set together with
+        the group syntax CH:min-max:val. The driver has no group syntax for
+        the current and the range, so those are set channel by channel. If
+        changed_only is true, channels that are already at their value
+        are not sent.
+        """
+        vals = np.asarray(vals, dtype=float)
+        if len(vals) != self.channel_number:
+            raise ValueError(f"Expected {self.channel_number} values, got {len(vals)}.")
+        changed = vals != self._settings[key]
+
+        if key == "VOLT":
+            # split the channels into runs of equal values
+            edges = np.flatnonzero(np.diff(vals)) + 1
+            runs = np.split(np.arange(self.channel_number), edges)
+        else:
+            runs = [[chan] for chan in range(self.channel_number)]
+
+        for run in runs:
+            if changed_only and not changed[run].any():
+                continue
+            chmin, chmax, val = run[0] + 1, run[-1] + 1, vals[run[0]]
+            if key == "SVR":
+                # the range is an integer code
+                val = int(val)
+            if chmin == chmax:
+                self.write(f"CH:{chmin}:{key}:{val}")
+            else:
+                self.write(f"CH:{chmin}-{chmax}:{val}")
+        self._settings[key][:] = vals
 
     def read_channel_data(self, chan: int):
         """ Get the real time voltage [V] current [A]. """
@@ -81,6 +121,16 @@ class NicsLabXPOW(BaseInstrument):
         # third and fourth elements wil be voltage and current
         return float(results[2]), float(results[3])
 
+    def read_all_channel_data(self) -> Tuple[np.array, np.array]:
+        """
+        Get the real time voltage [V] current [A] of all channels.
+
+        Each channel is queried in turn, as it is not known whether the
+        XPOW queues the responses of queries sent back to back.
+        """
+        results = np.array([self.read_channel_data(chan + 1) for chan in range(self.channel_number)])
+        return results[:,0], results[:,1]
+
     def set_gpio_state(self, pin: int, state: str):
         """ Set the GPIO state. """
         self.write(f"GPIO:PD{pin}:{state}")
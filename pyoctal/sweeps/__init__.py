@@ -0,0 +1,17 @@
+"""
+Import all sweep tools here to shorten the imports
+"""
+from .engine import Axis, Sweep, SweepResult
+from .checkpoint import Checkpoint
+from .adaptive import Adaptive1D, Adaptive2D
+from .extremum import ExtremumSearch
+
+__all__ = [
+        "Axis",
+        "Sweep",
+        "SweepResult",
+        "Checkpoint",
+        "Adaptive1D",
+        "Adaptive2D",
+        "ExtremumSearch",
+    ]
@@ -0,0 +1,312 @@
+"""
+Adaptive 1D and 2D sweeps.
+
+Instead of a uniform grid, the sweep starts from a coarse grid and
+refines, pass by pass, only where the measured response changes fast.
+Flat regions keep the coarse spacing, so the same features are resolved
+with far fewer instrument points.
+
+Each pass measures its new points in ascending order of the setpoint
+(the outer axis first in 2D), so the sources are never swept back and
+forth within a pass.
+
+e.g.
+    sweep = Adaptive1D(
+        "Voltage [V]", pm.set_volt, start=0, stop=5,
+        measurements={"Power [W]": mm.get_detect_pow},
+        settle=pm.wait_until_stable, tol=0.01, min_step=1e-03,
+    )
+    df = sweep.run()
+"""
+from typing import Callable, Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import griddata
+from tqdm import tqdm
+
+
+def gradient_loss(x: np.array, y: np.array) -> np.array:
+    """
+    Change of the response across each interval, normalised by the
+    range of the response.
+    """
+    scale = np.ptp(y) or 1
+    return np.abs(np.diff(y))/scale
+
+def curvature_loss(x: np.array, y: np.array) -> np.array:
+    """
+    Estimated error of the linear interpolation within each interval,
+    |y''| dx^2/8, normalised by the range of the response.
+    """
+    scale = np.ptp(y) or 1
+    dx = np.diff(x)
+    slope = np.diff(y)/dx
+    if len(x) < 3:
+        return np.abs(np.diff(y))/scale
+    d2 = 2*np.diff(slope)/(x[2:] - x[:-2])
+    # second derivative at both ends of each interval
+    d2 = np.abs(np.concatenate(([d2[0]], d2, [d2[-1]])))
+    return np.maximum(d2[:-1], d2[1:])*dx**2/8/scale
+
+losses = {
+    "gradient": gradient_loss,
+    "curvature": curvature_loss,
+}
+
+
+class Adaptive1D:
+    """
+    Adaptively sample a response against one source.
+
+    Parameters
+    ----------
+    name: str
+        Name of the swept source
+    setter: Callable
+        Function that sets the source to a value
+    start: float
+        Start value
+    stop: float
+        Stop value
+    measurements: Dict
+        Name and function of each measurement taken at every point
+    key: str, default: None
+        Measurement used to decide where to refine. Defaults to the first one.
+    tol: float, default: 0.01
+        Refine the intervals whose loss is above this, relative to the
+        range of the response
+    min_step: float, default: None
+        Do not split intervals narrower than this. Defaults to 1/1000 of the range.
+    max_step: float, default: None
+        Always split intervals wider than this into equal steps of at
+        most max_step
+    init_pts: int, default: 11
+        Number of points of the initial uniform grid
+    max_pts: int, default: 1000
+        Maximum number of points
+    settle: Callable, default: None
+        Function called after the setter to wait until the source is stable
+    loss: Union[str, Callable], default: "curvature"
+        "gradient", "curvature" or a function loss(x, y) that returns the
+        loss of each of the len(x) - 1 intervals
+    """
+    def __init__(self, name: str, setter: Callable, start: float, stop: float,
+                 measurements: Dict, key: str=None, tol: float=0.01, min_step: float=None,
+                 max_step: float=None, init_pts: int=11, max_pts: int=1000,
+                 settle: Callable=None, loss: Union[str, Callable]="curvature"):
+        self.name = name
+        self.setter = setter
+        self.start = start
+        self.stop = stop
+        self.measurements = dict(measurements)
+        self.key = key or next(iter(self.measurements))
+        self.tol = tol
+        self.min_step = min_step or abs(stop - start)*1e-03
+        self.max_step = max_step
+        self.init_pts = init_pts
+        self.max_pts = max_pts
+        self.settle = settle
+        self.loss = losses[loss] if isinstance(loss, str) else loss
+        self.x = np.array([])
+        self.data = {name: np.array([]) for name in self.measurements}
+
+    def _measure(self, xs: np.array, pbar: tqdm):
+        """ Measure at the new points in ascending order. """
+        values = {name: [] for name in self.measurements}
+        for x in np.sort(xs):
+            self.setter(x)
+            if self.settle is not None:
+                self.settle()
+            for name, func in self.measurements.items():
+                values[name].append(func())
+            pbar.update()
+
+        self.x = np.concatenate((self.x, np.sort(xs)))
+        order = np.argsort(self.x, kind="stable")
+        self.x = self.x[order]
+        for name in self.data:
+            self.data[name] = np.concatenate((self.data[name], values[name]))[order]
+
+    def refine(self) -> np.array:
+        """ New points to be measured in the next pass. """
+        dx = np.diff(self.x)
+        loss = self.loss(self.x, self.data[self.key])
+        new = []
+        priority = []
+        for i in range(len(dx)):
+            if self.max_step is not None and dx[i] > self.max_step:
+                # split into equal steps no wider than max_step in one pass,
+                # so repeated halving never ends up below max_step
+                parts = int(np.ceil(dx[i]/self.max_step - 1e-09))
+                points = self.x[i] + dx[i]*np.arange(1, parts)/parts
+            elif loss[i] > self.tol and dx[i] >= 2*self.min_step:
+                points = [self.x[i] + dx[i]/2]
+            else:
+                continue
+            new.extend(points)
+            priority.extend([loss[i]]*len(points))
+
+        new = np.array(new)
+        # the intervals with the largest loss first if there is not enough points left
+        budget = self.max_pts - len(self.x)
+        if len(new) > budget:
+            new = new[np.argsort(-np.array(priority), kind="stable")[:budget]]
+        return new
+
+    def run(self, progress: bool=True) -> pd.DataFrame:
+        """
+        Run the sweep.
+
+        Returns
+        -------
+        pd.DataFrame
+            The setpoints and measurements, sorted by the setpoint
+        """
+        new = np.linspace(self.start, self.stop, self.init_pts)
+        with tqdm(desc="Adaptive sweep", disable=not progress) as pbar:
+            while len(new):
+                self._measure(new, pbar)
+                new = self.refine()
+        return pd.DataFrame({self.name: self.x, **self.data})
+
+
+class Adaptive2D:
+    """
+    Adaptively sample a response against two sources.
+
+    The map starts as a uniform grid of cells. Every cell whose response
+    changes by more than tol across its corners is split into four.
+
+    Parameters
+    ----------
+    names: Tuple[str, str]
+        Names of the outer and inner sources
+    setters: Tuple[Callable, Callable]
+        Functions that set the outer and inner sources
+    bounds: Tuple[Tuple[float, float], Tuple[float, float]]
+        (start, stop) of the outer and inner sources
+    measurements: Dict
+        Name and function of each measurement taken at every point
+    key: str, default: None
+        Measurement used to decide where to refine. Defaults to the first one.
+    tol: float, default: 0.05
+        Split the cells whose response changes by more than this,
+        relative to the range of the response
+    min_step: Tuple[float, float], default: None
+        Do not split cells narrower than this. Defaults to 1/256 of the ranges.
+    init_pts: Tuple[int, int], default: (5, 5)
+        Number of points of the initial grid along each axis
+    max_pts: int, default: 2000
+        Maximum number of points
+    settles: Tuple[Callable, Callable], default: (None, None)
+        Functions called after the outer and inner setters
+    """
+    def __init__(self, names: Tuple[str, str], setters: Tuple[Callable, Callable],
+                 bounds: Tuple[Tuple[float, float], Tuple[float, float]], measurements: Dict,
+                 key: str=None, tol: float=0.05, min_step: Tuple[float, float]=None,
+                 init_pts: Tuple[int, int]=(5, 5), max_pts: int=2000,
+                 settles: Tuple[Callable, Callable]=(None, None)):
+        self.names = tuple(names)
+        self.setters = tuple(setters)
+        self.bounds = tuple(bounds)
+        self.measurements = dict(measurements)
+        self.key = key or next(iter(self.measurements))
+        self.tol = tol
+        self.min_step = min_step or tuple(abs(stop - start)/256 for start, stop in bounds)
+        self.init_pts = init_pts
+        self.max_pts = max_pts
+        self.settles = tuple(settles)
+        self.points = {} # (outer, inner) -> measurements
+        self.cells = []
+
+    def _measure(self, points, pbar: tqdm):
+        """ Measure the new points, sweeping the inner source within each outer value. """
+        prev_outer = None
+        for outer, inner in sorted(points):
+            if outer != prev_outer:
+                self.setters[0](outer)
+                if self.settles[0] is not None:
+                    self.settles[0]()
+                prev_outer = outer
+            self.setters[1](inner)
+            if self.settles[1] is not None:
+                self.settles[1]()
+            self.points[(outer, inner)] = {name: func() for name, func in self.measurements.items()}
+            pbar.update()
+
+    def _cell_loss(self) -> np.array:
+        values = np.array([self.points[key][self.key] for key in self.points])
+        scale = np.ptp(values) or 1
+        corners = np.array([
+            [self.points[(x, y)][self.key] for x in (x0, x1) for y in (y0, y1)]
+            for x0, x1, y0, y1 in self.cells
+        ])
+        return np.ptp(corners, axis=1)/scale
+
+    def refine(self) -> set:
+        """ Split the cells above tol and return the new points to measure. """
+        loss = self._cell_loss()
+        order = np.argsort(-loss)
+        new = set()
+        cells = []
+        for idx in order:
+            x0, x1, y0, y1 = self.cells[idx]
+            xm, ym = (x0 + x1)/2, (y0 + y1)/2
+            split = (loss[idx] > self.tol and x1 - x0 >= 2*self.min_step[0]
+                     and y1 - y0 >= 2*self.min_step[1])
+            points = {(xm, y0), (xm, y1), (x0, ym), (x1, ym), (xm, ym)} - self.points.keys() - new
+            if not split or len(self.points) + len(new) + len(points) > self.max_pts:
+                cells.append(self.cells[idx])
+                continue
+            new |= points
+            cells.extend(((x0, xm, y0, ym), (xm, x1, y0, ym), (x0, xm, ym, y1), (xm, x1, ym, y1)))
+        self.cells = cells
+        return new
+
+    def run(self, progress: bool=True) -> pd.DataFrame:
+        """
+        Run the sweep.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per measured point. Use to_grid to interpolate it onto a grid.
+        """
+        xs = np.linspace(*self.bounds[0], self.init_pts[0])
+        ys = np.linspace(*self.bounds[1], self.init_pts[1])
+        self.cells = [
+            (xs[i], xs[i + 1], ys[j], ys[j + 1])
+            for i in range(len(xs) - 1) for j in range(len(ys) - 1)
+        ]
+        new = {(x, y) for x in xs for y in ys}
+        with tqdm(desc="Adaptive sweep", disable=not progress) as pbar:
+            while new:
+                self._measure(new, pbar)
+                new = self.refine()
+
+        keys = sorted(self.points)
+        df = pd.DataFrame([self.points[key] for key in keys])
+        df.insert(0, self.names[1], [key[1] for key in keys])
+        df.insert(0, self.names[0], [key[0] for key in keys])
+        return df
+
+def to_grid(df: pd.DataFrame, names: Tuple[str, str], key: str,
+            npts: Tuple[int, int]=(101, 101)) -> Tuple[np.array, np.array, np.array]:
+    """
+    Linearly interpolate the scattered points of an adaptive 2D sweep onto a grid.
+
+    Returns
+    -------
+    np.array
+        Outer axis
+    np.array
+        Inner axis
+    np.array
+        The measurement, with shape npts
+    """
+    x = np.linspace(df[names[0]].min(), df[names[0]].max(), npts[0])
+    y = np.linspace(df[names[1]].min(), df[names[1]].max(), npts[1])
+    grid = griddata(df[list(names)].to_numpy(), df[key].to_numpy(),
+                    tuple(np.meshgrid(x, y, indexing="ij")), method="linear")
+    return x, y, grid
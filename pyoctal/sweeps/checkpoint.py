@@ -0,0 +1,94 @@
+"""
+Periodic, atomic checkpoints of a running sweep so that a long sweep
+can be resumed after a crash or timeout.
+
+e.g.
+    checkpoint = Checkpoint("data/map.ckpt.npz", interval=30)
+    result = sweep.run(checkpoint=checkpoint, resume=True)
+"""
+from typing import Dict, Tuple
+from pathlib import Path
+import os
+import time
+
+import numpy as np
+
+
+class Checkpoint:
+    """
+    Save the completed points and the partial results of a sweep.
+
+    The checkpoint is written to a temporary file which then replaces the
+    previous checkpoint, so a crash during the write never corrupts it.
+    Saves are rate limited by interval so the cost per point is negligible.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        File to store the checkpoint in (.npz)
+    interval: float, default: 30
+        Minimum time between two periodic saves [s]
+    """
+    def __init__(self, path, interval: float=30):
+        self.path = Path(path)
+        self.interval = interval
+        self._last_save = time.perf_counter()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def remove(self):
+        """ Remove the checkpoint file. """
+        if self.exists():
+            self.path.unlink()
+
+    def save(self, coords: Dict, data: Dict, timing: Dict, done: np.array):
+        """ Atomically write the current state of the sweep. """
+        arrays = {"done": done}
+        arrays["dims"] = np.array(list(coords.keys()), dtype=str)
+        arrays["names"] = np.array(list(data.keys()), dtype=str)
+        arrays["timing"] = np.array(list(timing.keys()), dtype=str)
+        for i, val in enumerate(coords.values()):
+            arrays[f"coord_{i}"] = val
+        for i, val in enumerate(data.values()):
+            arrays[f"data_{i}"] = val
+        for i, val in enumerate(timing.values()):
+            arrays[f"timing_{i}"] = val
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as file:
+            np.savez(file, **arrays)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.path)
+        self._last_save = time.perf_counter()
+
+    def update(self, coords: Dict, data: Dict, timing: Dict, done: np.array) -> bool:
+        """ Save only if interval has elapsed since the last save. """
+        if time.perf_counter() - self._last_save < self.interval:
+            return False
+        self.save(coords, data, timing, done)
+        return True
+
+    def load(self) -> Tuple[Dict, Dict, Dict, np.array]:
+        """
+        Load a checkpoint.
+
+        Returns
+        -------
+        Dict
+            Values of each axis by name
+        Dict
+            Partial measurements by name
+        Dict
+            Partial timing by name
+        np.array
+            Boolean mask of the completed points
+        """
+        with np.load(self.path, allow_pickle=False) as file:
+            coords = {str(dim): file[f"coord_{i}"] for i, dim in enumerate(file["dims"])}
+            data = {str(name): file[f"data_{i}"] for i, name in enumerate(file["names"])}
+            timing = {str(key): file[f"timing_{i}"] for i, key in enumerate(file["timing"])}
+            done = file["done"]
+        return coords, data, timing, done
@@ -0,0 +1,281 @@
+"""
+A declarative N-dimensional sweep engine.
+
+Instead of hand writing nested loops, describe each swept source as an
+Axis and each reading as a measurement callable. The Sweep runs the
+Cartesian product of the axes and stores every measurement in a
+preallocated N-D array.
+
+e.g.
+    sweep = Sweep(
+        axes=[
+            Axis.linear("Ring [V]", ring_pm.set_volt, start=0, stop=4, step=0.5),
+            Axis.sqrt_power("Heater [V]", heater_pm.set_volt, start=0, stop=2, npts=81,
+                            settle=heater_pm.wait_until_stable),
+        ],
+        measurements={"Power [W]": mm.get_detect_pow, "Current [A]": heater_pm.get_curr},
+    )
+    result = sweep.run()
+    result["Power [W]"] # shape (9, 81)
+"""
+from typing import Callable, Dict, List, Tuple, Union, Iterator
+import time
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from pyoctal.sweeps.checkpoint import Checkpoint
+
+
+class Axis:
+    """
+    A swept source.
+
+    Parameters
+    ----------
+    name: str
+        Name of the axis, used as the coordinate label
+    setter: Callable
+        Function that sets the source to a value
+    values: Union[List, Tuple, np.array]
+        Values to sweep through
+    settle: Callable, default: None
+        Function called after the setter to wait until the source is stable.
+        It is also called when an outer axis moves, so every point is settled.
+    """
+    def __init__(self, name: str, setter: Callable, values: Union[List, Tuple, np.array],
+                 settle: Callable=None):
+        self.name = name
+        self.setter = setter
+        self.values = np.asarray(values)
+        self.settle = settle
+
+    @classmethod
+    def linear(cls, name: str, setter: Callable, start: float, stop: float,
+               step: float=None, npts: int=None, settle: Callable=None):
+        """ Linearly spaced values from start to stop (inclusive) by step or npts. """
+        if step is None and npts is None:
+            raise ValueError(f"Axis {name} needs either a step or a number of points.")
+        if npts is None:
+            values = np.arange(start, stop + step/2, step)
+        else:
+            values = np.linspace(start, stop, npts)
+        return cls(name, setter, values, settle=settle)
+
+    @classmethod
+    def sqrt_power(cls, name: str, setter: Callable, start: float, stop: float,
+                   npts: int, settle: Callable=None):
+        """ Voltages from start to stop that are linearly spaced in electrical power. """
+        values = np.sqrt(np.linspace(start**2, stop**2, num=npts))
+        return cls(name, setter, values, settle=settle)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f"Axis({self.name}, {len(self)} points)"
+
+
+class SweepResult:
+    """
+    Labelled N-D results of a sweep.
+
+    Each measurement is an array of shape (len(axis0), len(axis1), ...)
+    followed by the shape of the measurement itself if it returns an array.
+
+    Parameters
+    ----------
+    coords: Dict
+        Values of each axis by name
+    data: Dict
+        Measured arrays by name
+    timing: Dict
+        Time spent setting, settling and measuring at each point [s]
+    """
+    def __init__(self, coords: Dict, data: Dict, timing: Dict):
+        self.coords = coords
+        self.data = data
+        self.timing = timing
+
+    @property
+    def dims(self) -> Tuple:
+        return tuple(self.coords.keys())
+
+    @property
+    def shape(self) -> Tuple:
+        return tuple(len(val) for val in self.coords.values())
+
+    def __getitem__(self, name: str) -> np.array:
+        return self.data[name]
+
+    def keys(self):
+        return self.data.keys()
+
+    def sel(self, **kwargs) -> Dict:
+        """
+        Select the measurements at the given axis values,
+        i.e. result.sel(**{"Ring [V]": 2.0}).
+        """
+        index = tuple(
+            int(np.argmin(np.abs(self.coords[dim] - kwargs[dim]))) if dim in kwargs else slice(None)
+            for dim in self.dims
+        )
+        return {name: val[index] for name, val in self.data.items()}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """ Flatten the scalar measurements into one row per point. """
+        grids = np.meshgrid(*self.coords.values(), indexing="ij")
+        columns = {dim: grid.ravel() for dim, grid in zip(self.dims, grids)}
+        for name, val in self.data.items():
+            if val.shape == self.shape:
+                columns[name] = val.ravel()
+        return pd.DataFrame(columns)
+
+
+class Sweep:
+    """
+    Run measurements over the Cartesian product of the axes.
+
+    Parameters
+    ----------
+    axes: List[Axis]
+        Axes from the outermost to the innermost
+    measurements: Dict
+        Name and function of each measurement taken at every point
+    settle: Callable, default: None
+        Function called at every point after all setters and axis settles
+    serpentine: bool, default: True
+        If true, reverse the direction of the inner axes every other pass
+        so that no setpoint jumps from the end of its range back to the start.
+    callback: Callable, default: None
+        Function called after every point as callback(index, values)
+    """
+    def __init__(self, axes: List[Axis], measurements: Dict, settle: Callable=None,
+                 serpentine: bool=True, callback: Callable=None):
+        self.axes = list(axes)
+        self.measurements = dict(measurements)
+        self.settle = settle
+        self.serpentine = serpentine
+        self.callback = callback
+
+    @property
+    def shape(self) -> Tuple:
+        return tuple(len(axis) for axis in self.axes)
+
+    def points(self) -> Iterator[Tuple]:
+        """ Indices of all points in the order they are measured. """
+        if not self.serpentine:
+            yield from np.ndindex(*self.shape)
+            return
+
+        def reflect(shape):
+            if not shape:
+                yield ()
+                return
+            inner = list(reflect(shape[1:]))
+            for i in range(shape[0]):
+                for rest in (inner if i % 2 == 0 else reversed(inner)):
+                    yield (i,) + rest
+
+        yield from reflect(self.shape)
+
+    def _allocate(self, values: Dict) -> Dict:
+        """ Preallocate the result arrays from the first measured values. """
+        return {
+            name: np.full(self.shape + np.shape(val), np.nan, dtype=float)
+            for name, val in values.items()
+        }
+
+    def _restore(self, checkpoint: Checkpoint) -> Tuple[Dict, Dict, np.array]:
+        """ Load the partial results of the same sweep from a checkpoint. """
+        coords, data, timing, done = checkpoint.load()
+        if list(coords.keys()) != [axis.name for axis in self.axes] or not all(
+            np.array_equal(coords[axis.name], axis.values) for axis in self.axes
+        ):
+            raise ValueError(f"Checkpoint {checkpoint.path} was written by a different sweep.")
+        return data or None, timing, done
+
+    def run(self, progress: bool=True, checkpoint: Checkpoint=None,
+            resume: bool=False) -> SweepResult:
+        """
+        Run the sweep.
+
+        Only the axes whose index changed since the last point are set, so
+        the outer sources are not set again on every point. The outermost
+        changed axis and all the axes inside it are settled, so a point is
+        never measured without its settle, even when the serpentine order
+        keeps the inner index. On a resume, all axes are set again before
+        the first remaining point.
+
+        Parameters
+        ----------
+        progress: bool, default: True
+            If true, show a progress bar
+        checkpoint: Checkpoint, default: None
+            If provided, the partial results are saved periodically and
+            whenever the sweep stops, including on an error or a sys.exit.
+            It is removed once every point has been measured.
+        resume: bool, default: False
+            If true and the checkpoint of an unfinished sweep exists, skip
+            the completed points. Otherwise the sweep starts from scratch.
+
+        Returns
+        -------
+        SweepResult
+            The measurements and the time spent at each point
+        """
+        coords = {axis.name: axis.values for axis in self.axes}
+        if resume and checkpoint is not None and checkpoint.exists():
+            data, timing, done = self._restore(checkpoint)
+        else:
+            data = None
+            timing = {key: np.full(self.shape, np.nan) for key in ("set", "settle", "measure")}
+            done = np.zeros(self.shape, dtype=bool)
+
+        points = [index for index in self.points() if not done[index]]
+        prev = None
+
+        try:
+            for index in tqdm(points, desc="Sweep", disable=not progress):
+                start = time.perf_counter()
+                changed = [
+                    (i, axis) for i, axis in enumerate(self.axes)
+                    if prev is None or index[i] != prev[i]
+                ]
+                for i, axis in changed:
+                    axis.setter(axis.values[index[i]])
+                set_end = time.perf_counter()
+
+                for axis in self.axes[changed[0][0]:]:
+                    if axis.settle is not None:
+                        axis.settle()
+                if self.settle is not None:
+                    self.settle()
+                settle_end = time.perf_counter()
+
+                values = {name: func() for name, func in self.measurements.items()}
+                if data is None:
+                    data = self._allocate(values)
+                for name, val in values.items():
+                    data[name][index] = val
+                end = time.perf_counter()
+
+                timing["set"][index] = set_end - start
+                timing["settle"][index] = settle_end - set_end
+                timing["measure"][index] = end - settle_end
+                done[index] = True
+                prev = index
+
+                if self.callback is not None:
+                    self.callback(index, values)
+                if checkpoint is not None:
+                    checkpoint.update(coords, data, timing, done)
+        finally:
+            if checkpoint is not None and done.all():
+                # a finished sweep must not be resumed by the next run
+                checkpoint.remove()
+            elif checkpoint is not None and data is not None:
+                checkpoint.save(coords, data, timing, done)
+
+        return SweepResult(coords=coords, data=data or {}, timing=timing)
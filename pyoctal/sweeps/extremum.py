@@ -0,0 +1,175 @@
+"""
+Find the maximum or minimum of a response against one source without a grid.
+
+The extremum is bracketed by walking downhill from a starting point with
+golden ratio steps, then refined with Brent's method inside the bracket.
+Starting from the optimum of the previous setting of the other sources
+(warm start), each search takes O(log(1/tol)) points instead of a full
+sweep.
+
+e.g.
+    search = ExtremumSearch(
+        "Voltage [V]", pm.set_volt, bounds=(0, 2),
+        measurements={"Power [W]": mm.get_detect_pow},
+        settle=pm.wait_until_stable, tol=1e-03,
+    )
+    vmax, pmax = search.find("max")
+    vmin, pmin = search.find("min")
+"""
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize_scalar
+
+_golden = (1 + 5**0.5)/2
+
+
+def bracket(func: Callable[[float], float], x0: float, step: float,
+            bounds: Tuple[float, float], maxiter: int=50) -> Tuple[float, float]:
+    """
+    Find an interval that contains a local minimum of func, walking
+    downhill from x0 with growing steps.
+
+    Parameters
+    ----------
+    func: Callable
+        Function to minimise
+    x0: float
+        Starting point
+    step: float
+        First step
+    bounds: Tuple[float, float]
+        The interval is clipped to these bounds
+    maxiter: int, default: 50
+        Maximum number of steps
+
+    Returns
+    -------
+    Tuple[float, float]
+        Lower and upper ends of the interval
+    """
+    lo, hi = bounds
+    a = min(max(x0, lo), hi)
+    b = min(a + step, hi)
+    if b == a:
+        b = max(a - step, lo)
+    fa, fb = func(a), func(b)
+    if fb > fa:
+        # downhill is the other way
+        a, b, fa, fb = b, a, fb, fa
+
+    for _ in range(maxiter):
+        c = min(max(b + _golden*(b - a), lo), hi)
+        if c == b:
+            # still going down at the bound
+            break
+        fc = func(c)
+        if fc > fb:
+            return min(a, c), max(a, c)
+        a, b, fa, fb = b, c, fb, fc
+    return min(a, b), max(a, b)
+
+
+class ExtremumSearch:
+    """
+    Search for the extremum of a measurement against one source.
+
+    All the measured points are kept, so the maximum and the minimum
+    searches share them and they can be saved like a sweep.
+
+    Parameters
+    ----------
+    name: str
+        Name of the source
+    setter: Callable
+        Function that sets the source to a value
+    bounds: Tuple[float, float]
+        Minimum and maximum value of the source
+    measurements: Dict
+        Name and function of each measurement taken at every point
+    key: str, default: None
+        Measurement to optimise. Defaults to the first one.
+    settle: Callable, default: None
+        Function called after the setter to wait until the source is stable
+    tol: float, default: None
+        Absolute tolerance of the extremum. Defaults to 1/1000 of the range.
+    step: float, default: None
+        First step of the bracketing in a warm start. Defaults to 1/20 of the range.
+    npts: int, default: 9
+        Number of points of the coarse grid used without a warm start
+    """
+    def __init__(self, name: str, setter: Callable, bounds: Tuple[float, float],
+                 measurements: Dict, key: str=None, settle: Callable=None,
+                 tol: float=None, step: float=None, npts: int=9):
+        self.name = name
+        self.setter = setter
+        self.bounds = (min(bounds), max(bounds))
+        self.measurements = dict(measurements)
+        self.key = key or next(iter(self.measurements))
+        self.settle = settle
+        span = self.bounds[1] - self.bounds[0]
+        self.tol = tol or span*1e-03
+        self.step = step or span/20
+        self.npts = npts
+        self.points = {} # setpoint -> measurements
+
+    def measure(self, x: float) -> float:
+        """ Measure at a setpoint, or reuse the point if it has been measured. """
+        x = float(x)
+        if x not in self.points:
+            self.setter(x)
+            if self.settle is not None:
+                self.settle()
+            self.points[x] = {name: func() for name, func in self.measurements.items()}
+        return self.points[x][self.key]
+
+    def find(self, mode: str="max", x0: float=None) -> Tuple[float, float]:
+        """
+        Find the maximum or the minimum.
+
+        Parameters
+        ----------
+        mode: str, default: "max"
+            "max" or "min"
+        x0: float, default: None
+            Warm start, i.e. the optimum of the previous search. Without
+            it, the best point of a coarse grid is used.
+
+        Returns
+        -------
+        float
+            Setpoint of the extremum
+        float
+            Measurement at the extremum
+        """
+        if mode not in ("max", "min"):
+            raise ValueError(f"Unknown mode: {mode}. Choose max or min.")
+        sign = -1 if mode == "max" else 1
+        def func(x):
+            return sign*self.measure(x)
+
+        if x0 is None:
+            grid = np.linspace(*self.bounds, self.npts)
+            i = int(np.argmin([func(x) for x in grid]))
+            lo, hi = grid[max(i - 1, 0)], grid[min(i + 1, len(grid) - 1)]
+        else:
+            lo, hi = bracket(func, x0, self.step, self.bounds)
+
+        if hi - lo > self.tol:
+            minimize_scalar(func, bounds=(lo, hi), method="bounded", options={"xatol": self.tol})
+        # the bounded search never measures the ends of the interval, so
+        # take the best of every point measured so far
+        best = min((x for x in self.points if lo <= x <= hi), key=func)
+        return best, self.points[best][self.key]
+
+    def reset(self):
+        """ Forget the measured points, i.e. after another source has changed. """
+        self.points = {}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """ The measured points sorted by the setpoint. """
+        keys = sorted(self.points)
+        df = pd.DataFrame([self.points[key] for key in keys])
+        df.insert(0, self.name, keys)
+        return df
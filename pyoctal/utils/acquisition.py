@@ -0,0 +1,236 @@
+"""
+Continuous acquisition of waveforms on a background thread
+into a preallocated ring buffer.
+"""
+from typing import Callable, Iterator, Tuple
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    A preallocated ring buffer of frames with shape (n_frames, record_length).
+
+    The writer overwrites the oldest frame once the buffer is full. A reader
+    copies a frame out and then checks that it was not overwritten while
+    it was being copied, so no lock is held during the copy.
+
+    Parameters
+    ----------
+    n_frames: int
+        Number of frames that the buffer holds
+    record_length: int
+        Number of points per frame
+    dtype: default: float
+        Data type of the frames
+    """
+    def __init__(self, n_frames: int, record_length: int, dtype=float):
+        self._frames = np.empty((n_frames, record_length), dtype=dtype)
+        self._timestamps = np.zeros(n_frames)
+        self._count = 0 # number of frames completely written
+        self._writing = -1 # index of the frame being written
+        self._cond = threading.Condition()
+
+    @property
+    def n_frames(self) -> int:
+        return self._frames.shape[0]
+
+    @property
+    def record_length(self) -> int:
+        return self._frames.shape[1]
+
+    @property
+    def count(self) -> int:
+        """ Total number of frames written since the start. """
+        return self._count
+
+    def put(self, frame: np.array, timestamp: float):
+        """ Write a frame into the oldest slot. """
+        idx = self._count
+        slot = idx % self.n_frames
+        self._writing = idx
+        self._frames[slot] = frame
+        self._timestamps[slot] = timestamp
+        with self._cond:
+            self._count = idx + 1
+            self._cond.notify_all()
+
+    def get(self, idx: int, out: np.array=None) -> Tuple[np.array, float]:
+        """
+        Copy a frame out of the buffer.
+
+        Returns
+        -------
+        np.array
+            The frame, or None if it has already been overwritten
+        float
+            The timestamp of the frame [s]
+        """
+        if idx >= self._count:
+            raise IndexError(f"Frame {idx} has not been written yet.")
+        slot = idx % self.n_frames
+        if out is None:
+            out = np.empty(self.record_length, dtype=self._frames.dtype)
+        np.copyto(out, self._frames[slot])
+        timestamp = self._timestamps[slot]
+        # the writer may have started on this slot during the copy
+        if self._writing >= idx + self.n_frames:
+            return None, timestamp
+        return out, timestamp
+
+    def latest(self, num: int) -> np.array:
+        """ Copy the latest frames (oldest first) into a new array. """
+        count = self._count
+        num = min(num, count, self.n_frames - 1)
+        slots = np.arange(count - num, count) % self.n_frames
+        return self._frames[slots]
+
+    def wait(self, idx: int, timeout: float=None) -> bool:
+        """ Wait until the frame idx has been written. """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._count > idx, timeout=timeout)
+
+    def wake(self):
+        """ Wake up all the waiting readers. """
+        with self._cond:
+            self._cond.notify_all()
+
+
+class BackgroundAcquisition:
+    """
+    Continuously read waveforms on a background thread into a ring buffer.
+
+    e.g.
+        scope = TektronixScope(rm=rm)
+        with BackgroundAcquisition(lambda: scope.capture(("CH1",))[1][0], n_frames=1000) as acq:
+            for idx, timestamp, frame in acq.frames():
+                ...
+
+    Parameters
+    ----------
+    read: Callable
+        Function that returns one waveform as a 1D array
+    n_frames: int
+        Number of frames the ring buffer holds
+    record_length: int, default: None
+        Number of points per waveform. If not provided, it is taken from
+        the first waveform read.
+    """
+    def __init__(self, read: Callable[[], np.array], n_frames: int, record_length: int=None):
+        self._read = read
+        self._n_frames = n_frames
+        self._record_length = record_length
+        self._buffer = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._error = None
+        self._start_time = None
+        self.dropped = 0 # frames overwritten before a consumer got to them
+
+    @property
+    def buffer(self) -> RingBuffer:
+        return self._buffer
+
+    @property
+    def acquired(self) -> int:
+        """ Number of frames acquired so far. """
+        return self._buffer.count if self._buffer else 0
+
+    @property
+    def rate(self) -> float:
+        """ Average acquisition rate [frames/s]. """
+        if not self._start_time or not self.acquired:
+            return 0
+        return self.acquired/(time.perf_counter() - self._start_time)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """ Start acquiring on the background thread. """
+        first = None
+        if self._record_length is None:
+            first = np.asarray(self._read())
+            self._record_length = len(first)
+        self._buffer = RingBuffer(self._n_frames, self._record_length)
+        self._start_time = time.perf_counter()
+        if first is not None:
+            self._buffer.put(first, 0)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop acquiring and wait for the thread to finish. """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                frame = self._read()
+                self._buffer.put(frame, time.perf_counter() - self._start_time)
+        except Exception as error: # pylint: disable=broad-except
+            # hand the error over to the consumers
+            self._error = error
+        finally:
+            self._stop.set()
+            self._buffer.wake()
+
+    def frames(self, copy: bool=True, timeout: float=None) -> Iterator[Tuple[int, float, np.array]]:
+        """
+        Iterate over new frames as they arrive.
+
+        If the consumer falls more than the buffer length behind, the
+        overwritten frames are skipped and counted in dropped.
+
+        Parameters
+        ----------
+        copy: bool, default: True
+            If false, the same array is reused for each frame to avoid allocation
+        timeout: float, default: None
+            Stop iterating if no new frame arrives within this time [s]
+
+        Yields
+        ------
+        int
+            Frame index since the start
+        float
+            Timestamp since the start [s]
+        np.array
+            The frame
+        """
+        idx = self._buffer.count
+        out = np.empty(self._buffer.record_length)
+        while True:
+            # wake up regularly to notice that the acquisition has stopped
+            if not self._buffer.wait(idx, timeout=0.1 if timeout is None else timeout):
+                if self._error is not None:
+                    raise self._error
+                if self._stop.is_set() or timeout is not None:
+                    return
+                continue
+
+            oldest = self._buffer.count - self._buffer.n_frames + 1
+            if idx < oldest:
+                self.dropped += oldest - idx
+                idx = oldest
+
+            frame, timestamp = self._buffer.get(idx, out=None if copy else out)
+            if frame is None:
+                self.dropped += 1
+            else:
+                yield idx, timestamp, frame
+            idx += 1
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
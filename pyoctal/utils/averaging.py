@@ -0,0 +1,192 @@
+"""
+Average power readings until they are precise enough.
+
+A fixed number of reads is too many at high power and too few near
+extinction. The Averager keeps reading, updating the mean and variance
+on the fly (Welford), until the standard error of the mean reaches the
+target precision.
+
+e.g.
+    averager = Averager(mm.get_detect_pow, rtol=0.01, atol=1e-09)
+    power = averager()
+"""
+from typing import Callable, Sequence, Tuple
+import math
+import time
+
+from scipy.stats import t as student
+
+# averaging times supported by the Agilent 816xB power sensors [s]
+AVGTIMES = (
+    100e-06, 200e-06, 500e-06, 1e-03, 2e-03, 5e-03, 10e-03, 20e-03,
+    50e-03, 100e-03, 200e-03, 500e-03, 1, 2, 5, 10,
+)
+
+
+class Welford:
+    """ Running mean and variance of a stream of readings. """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float, weight: float=1):
+        """
+        Add a reading. A reading averaged over weight times as long as the
+        others counts as weight readings.
+        """
+        self.count += weight
+        delta = value - self.mean
+        self.mean += weight*delta/self.count
+        self._m2 += weight*delta*(value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """ Sample variance of a single reading. """
+        if self.count < 2:
+            return math.inf
+        return self._m2/(self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def sem(self) -> float:
+        """ Standard error of the mean. """
+        if self.count < 2:
+            return math.inf
+        return math.sqrt(self.variance/self.count)
+
+
+class Averager:
+    """
+    Read a sensor until the standard error of the mean is within
+    max(atol, rtol*|mean|).
+
+    With only a few reads the noise estimate is uncertain, so the
+    standard error is scaled by the Student t quantile before it is
+    compared with the target. If the first reads are identical, at
+    least one more is taken.
+
+    If the function that sets the instrument averaging time is given,
+    and the remaining reads would take longer than one read with a
+    longer averaging time, the remaining reads are replaced by that
+    read. The averaging time is restored afterwards.
+
+    Parameters
+    ----------
+    read: Callable
+        Function that returns one reading
+    rtol: float, default: 0.01
+        Target standard error relative to the mean
+    atol: float, default: 0
+        Target absolute standard error, i.e. the noise floor near extinction
+    min_count: int, default: 2
+        Minimum number of reads, used to estimate the noise. At least 2.
+    max_count: int, default: 100
+        Maximum number of reads
+    set_avgtime: Callable, default: None
+        Function that sets the instrument averaging time [s], i.e.
+        Agilent816xB.set_detect_avgtime
+    avgtime: float, default: None
+        The instrument averaging time [s] used by the reads. Required with
+        set_avgtime, i.e. Agilent816xB.get_detect_avgtime().
+    avgtimes: Sequence[float], default: AVGTIMES
+        Averaging times supported by the instrument [s]
+    """
+    def __init__(self, read: Callable[[], float], rtol: float=0.01, atol: float=0,
+                 min_count: int=2, max_count: int=100, set_avgtime: Callable[[float], None]=None,
+                 avgtime: float=None, avgtimes: Sequence[float]=AVGTIMES):
+        if set_avgtime is not None and not avgtime:
+            raise ValueError("The current averaging time is required to fall back on the instrument.")
+        self.read = read
+        self.rtol = rtol
+        self.atol = atol
+        self.min_count = max(min_count, 2)
+        self.max_count = max(max_count, self.min_count)
+        self.set_avgtime = set_avgtime
+        self.avgtime = avgtime
+        self.avgtimes = sorted(avgtimes)
+        self.stats = None # statistics of the last call
+
+    def _target(self, stats: Welford) -> float:
+        return max(self.atol, self.rtol*abs(stats.mean))
+
+    @staticmethod
+    def _error(stats: Welford) -> float:
+        """
+        Standard error scaled by the Student t quantile of one sigma, so
+        that a noise estimate from only a few reads that happen to agree
+        does not stop the averaging too early.
+        """
+        return stats.sem*student.ppf(0.8413, stats.count - 1)
+
+    def _unresolved(self, stats: Welford) -> bool:
+        """
+        Whether the first reads agree exactly, i.e. a quantised meter
+        near extinction. A zero variance says nothing about the noise,
+        so one more read is taken unless atol sets a noise floor.
+        """
+        return stats.count == self.min_count and stats.variance == 0 and not self.atol
+
+    def _instrument(self, stats: Welford, per_read: float) -> bool:
+        """
+        Replace the remaining reads with one longer instrument average
+        if that is faster. Returns whether it was used.
+        """
+        target = self._target(stats)
+        if not target or not stats.variance:
+            return False
+        needed = min(math.ceil(stats.variance/target**2), self.max_count)
+        remaining = needed - stats.count
+        if remaining <= 1:
+            return False
+        # query overhead on top of the averaging time, paid again to set and restore it
+        overhead = max(per_read - self.avgtime, 0)
+        avgtime = next((val for val in self.avgtimes if val >= remaining*self.avgtime), None)
+        if avgtime is None or avgtime + 3*overhead >= remaining*per_read:
+            return False
+
+        self.set_avgtime(avgtime)
+        try:
+            stats.add(self.read(), weight=avgtime/self.avgtime)
+        finally:
+            self.set_avgtime(self.avgtime)
+        return True
+
+    def __call__(self) -> float:
+        """ The averaged reading. The statistics are kept in stats. """
+        stats = Welford()
+        start = time.perf_counter()
+        for _ in range(self.min_count):
+            stats.add(self.read())
+        per_read = (time.perf_counter() - start)/self.min_count
+
+        while stats.count < self.max_count and (self._error(stats) > self._target(stats)
+                                                or self._unresolved(stats)):
+            # the noise estimate improves with every read, so check again each time
+            if self.set_avgtime is not None and self._instrument(stats, per_read):
+                continue
+            stats.add(self.read())
+        self.stats = stats
+        return stats.mean
+
+
+def average(read: Callable[[], float], rtol: float=0.01, atol: float=0, min_count: int=2,
+            max_count: int=100) -> Tuple[float, float, int]:
+    """
+    Read a sensor until the standard error of the mean is within max(atol, rtol*|mean|).
+
+    Returns
+    -------
+    float
+        Mean
+    float
+        Standard error of the mean
+    int
+        Number of reads
+    """
+    averager = Averager(read, rtol=rtol, atol=atol, min_count=min_count, max_count=max_count)
+    mean = averager()
+    return mean, averager.stats.sem, averager.stats.count
@@ -0,0 +1,258 @@
+"""
+An SQLite catalogue of the saved measurement files.
+
+Each file is recorded with its sweep parameters, the identities of the
+instruments used, a timestamp and the shape of its data as it is written,
+so datasets can be found by query instead of by walking the directories
+and parsing file names.
+
+e.g.
+    catalogue = Catalogue(Path("data/catalogue.db"))
+    catalogue.add(folder / "2.0V.csv", params={"chip": 3, "voltage": 2.0},
+                  instruments={"source": pm}, sweep="simple_ilme", shape=(20001, 2))
+    ...
+    for dataset in catalogue.find(chip=3, voltage=2.0):
+        df = pd.read_csv(dataset.path)
+"""
+from typing import Dict, List, NamedTuple, Tuple, Union
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from pyoctal.instruments.base import BaseInstrument, DeviceID
+
+_schema = """
+create table if not exists datasets (
+    id integer primary key,
+    path text unique not null,
+    sweep text,
+    created real not null,
+    shape text
+);
+create table if not exists params (
+    dataset_id integer not null references datasets(id) on delete cascade,
+    name text not null,
+    value real,
+    text text
+);
+create table if not exists instruments (
+    dataset_id integer not null references datasets(id) on delete cascade,
+    role text not null,
+    vendor text,
+    modelno text,
+    serialno text,
+    version text,
+    addr text
+);
+create index if not exists params_name_value on params(name, value);
+create index if not exists params_name_text on params(name, text);
+create index if not exists params_dataset on params(dataset_id);
+create index if not exists instruments_serialno on instruments(serialno);
+create index if not exists instruments_modelno on instruments(modelno);
+create index if not exists instruments_dataset on instruments(dataset_id);
+create index if not exists datasets_sweep on datasets(sweep);
+create index if not exists datasets_created on datasets(created);
+"""
+
+
+class Dataset(NamedTuple):
+    """ A catalogued file. """
+    id: int
+    path: Path
+    sweep: str
+    created: float
+    shape: Tuple
+    params: Dict
+    instruments: Dict
+
+
+def _identity(instr: Union[BaseInstrument, DeviceID, str]) -> Tuple:
+    """ (vendor, modelno, serialno, version, addr) of an instrument. """
+    if isinstance(instr, BaseInstrument):
+        idn = instr.identity
+        addr = instr.address
+    else:
+        idn, addr = instr, None
+    if isinstance(idn, DeviceID):
+        return idn.vendor, idn.modelno, idn.serialno, idn.version, addr
+    modelno = None if idn is None else str(idn)
+    return None, modelno, None, None, addr
+
+
+class Catalogue:
+    """
+    An indexed SQLite catalogue of measurement files.
+
+    It is safe to add files from the worker threads of an ExportQueue.
+
+    Parameters
+    ----------
+    path: Path
+        The database file. It is created if it does not exist.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma foreign_keys=on")
+        self._conn.executescript(_schema)
+
+    def add(self, path: Path, params: Dict=None, instruments: Dict=None, sweep: str=None,
+            shape: Tuple=None, created: float=None) -> int:
+        """
+        Record a saved file. An existing record of the same path is replaced.
+
+        Parameters
+        ----------
+        path: Path
+            The saved file
+        params: Dict, default: None
+            Sweep parameters, i.e. {"chip": 3, "voltage": 2.0}
+        instruments: Dict, default: None
+            Instruments by role. Either connected instruments, DeviceIDs or names.
+        sweep: str, default: None
+            Name of the sweep that wrote the file
+        shape: Tuple, default: None
+            Shape of the data in the file
+        created: float, default: None
+            Timestamp [s since epoch]. Defaults to now.
+
+        Returns
+        -------
+        int
+            The id of the dataset
+        """
+        path = str(Path(path).absolute())
+        created = time.time() if created is None else created
+        shape = None if shape is None else json.dumps([int(i) for i in shape])
+
+        param_rows = []
+        for name, val in (params or {}).items():
+            if isinstance(val, (bool, int, float, np.number)):
+                param_rows.append((name, float(val), None))
+            else:
+                param_rows.append((name, None, str(val)))
+        instr_rows = [(role, *_identity(instr)) for role, instr in (instruments or {}).items()]
+
+        with self._lock, self._conn:
+            self._conn.execute("delete from datasets where path = ?", (path,))
+            cursor = self._conn.execute(
+                "insert into datasets (path, sweep, created, shape) values (?, ?, ?, ?)",
+                (path, sweep, created, shape),
+            )
+            dataset_id = cursor.lastrowid
+            self._conn.executemany(
+                "insert into params values (?, ?, ?, ?)",
+                [(dataset_id, *row) for row in param_rows],
+            )
+            self._conn.executemany(
+                "insert into instruments values (?, ?, ?, ?, ?, ?, ?)",
+                [(dataset_id, *row) for row in instr_rows],
+            )
+        return dataset_id
+
+    def remove(self, path: Path):
+        """ Remove the record of a file. """
+        with self._lock, self._conn:
+            self._conn.execute("delete from datasets where path = ?", (str(Path(path).absolute()),))
+
+    def find(self, sweep: str=None, serialno: str=None, modelno: str=None,
+             since: float=None, until: float=None, tol: float=1e-09, **params) -> List[Dataset]:
+        """
+        Find the datasets matching all the given conditions.
+
+        Parameters
+        ----------
+        sweep: str, default: None
+            Name of the sweep
+        serialno: str, default: None
+            Serial number of any instrument used
+        modelno: str, default: None
+            Model number of any instrument used
+        since: float, default: None
+            Earliest timestamp [s since epoch]
+        until: float, default: None
+            Latest timestamp [s since epoch]
+        tol: float, default: 1e-09
+            Tolerance when comparing numerical parameters
+        **params:
+            Parameter values. A tuple (min, max) matches a range.
+
+        Returns
+        -------
+        List[Dataset]
+            Matching datasets, oldest first
+        """
+        conds = []
+        args = []
+        if sweep is not None:
+            conds.append("d.sweep = ?")
+            args.append(sweep)
+        if since is not None:
+            conds.append("d.created >= ?")
+            args.append(since)
+        if until is not None:
+            conds.append("d.created <= ?")
+            args.append(until)
+        for col, val in (("serialno", serialno), ("modelno", modelno)):
+            if val is not None:
+                conds.append(f"d.id in (select dataset_id from instruments where {col} = ?)")
+                args.append(val)
+        for name, val in params.items():
+            sub = "d.id in (select dataset_id from params where name = ? and "
+            if isinstance(val, tuple):
+                conds.append(sub + "value between ? and ?)")
+                args.extend((name, val[0], val[1]))
+            elif isinstance(val, (bool, int, float, np.number)):
+                conds.append(sub + "value between ? and ?)")
+                args.extend((name, float(val) - tol, float(val) + tol))
+            else:
+                conds.append(sub + "text = ?)")
+                args.extend((name, str(val)))
+
+        query = "select id, path, sweep, created, shape from datasets d"
+        if conds:
+            query += " where " + " and ".join(conds)
+        query += " order by created"
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+            return [self._dataset(row) for row in rows]
+
+    def _dataset(self, row: Tuple) -> Dataset:
+        dataset_id, path, sweep, created, shape = row
+        params = {
+            name: text if value is None else value
+            for name, value, text in self._conn.execute(
+                "select name, value, text from params where dataset_id = ?", (dataset_id,)
+            )
+        }
+        instruments = {
+            role: {"vendor": vendor, "modelno": modelno, "serialno": serialno,
+                   "version": version, "addr": addr}
+            for role, vendor, modelno, serialno, version, addr in self._conn.execute(
+                "select role, vendor, modelno, serialno, version, addr from instruments "
+                "where dataset_id = ?", (dataset_id,)
+            )
+        }
+        shape = None if shape is None else tuple(json.loads(shape))
+        return Dataset(dataset_id, Path(path), sweep, created, shape, params, instruments)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("select count(*) from datasets").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,170 @@
+"""
+A memory-mapped N-D measurement cube on disk.
+
+The data is stored in a .npy file that is memory-mapped, so a sweep can
+write spectra into it by index and the analysis can slice it without
+loading the whole map. The axis names and coordinates are stored next
+to it in a .json file.
+
+e.g.
+    cube = MeasurementCube.create(
+        Path("data/map"),
+        axes={"Ring [V]": ring_voltages, "Heater [V]": heater_voltages, "Wavelength": 20001},
+    )
+    cube[i, j] = loss
+    ...
+    cube = MeasurementCube.open(Path("data/map"))
+    spectra = cube.sel(**{"Ring [V]": 3.5}) # only this slice is read from disk
+"""
+from typing import Dict, Tuple, Union
+from pathlib import Path
+import json
+
+import numpy as np
+
+
+class MeasurementCube:
+    """
+    A memory-mapped array with named axes.
+
+    Use MeasurementCube.create or MeasurementCube.open rather than the
+    constructor.
+
+    Parameters
+    ----------
+    path: Path
+        Path of the cube without the suffix
+    data: np.memmap
+        The memory-mapped data
+    coords: Dict
+        Coordinates of each axis by name
+    attrs: Dict
+        Additional metadata, i.e. units or instrument settings
+    """
+    def __init__(self, path: Path, data: np.memmap, coords: Dict, attrs: Dict):
+        self.path = Path(path)
+        self.data = data
+        self.coords = coords
+        self.attrs = attrs
+
+    @staticmethod
+    def _files(path: Path) -> Tuple[Path, Path]:
+        path = Path(path)
+        return path.with_name(path.name + ".npy"), path.with_name(path.name + ".json")
+
+    @classmethod
+    def create(cls, path: Path, axes: Dict[str, Union[int, np.array]], dtype=np.float64,
+               fill_value: float=np.nan, attrs: Dict=None):
+        """
+        Create a new cube on disk.
+
+        Parameters
+        ----------
+        path: Path
+            Path of the cube without the suffix
+        axes: Dict[str, Union[int, np.array]]
+            Coordinates of each axis by name, or only its length (int) if
+            the coordinates are not known yet (see set_coords)
+        dtype: default: np.float64
+            Data type
+        fill_value: float, default: np.nan
+            Value of the points that have not been measured
+        attrs: Dict, default: None
+            Additional metadata
+        """
+        for name, val in axes.items():
+            if np.ndim(val) == 0 and not isinstance(val, (int, np.integer)):
+                raise ValueError(f"The length of axis {name} must be an integer, not {val!r}.")
+        coords = {
+            name: np.arange(val) if np.ndim(val) == 0 else np.asarray(val)
+            for name, val in axes.items()
+        }
+        shape = tuple(len(val) for val in coords.values())
+        data_file, _ = cls._files(path)
+        data_file.parent.mkdir(parents=True, exist_ok=True)
+        data = np.lib.format.open_memmap(data_file, mode="w+", dtype=dtype, shape=shape)
+        # fill one slice at a time to keep the memory bounded
+        for i in range(shape[0]):
+            data[i] = fill_value
+
+        cube = cls(path, data, coords, attrs or {})
+        cube.save_metadata()
+        return cube
+
+    @classmethod
+    def open(cls, path: Path, mode: str="r"):
+        """
+        Open an existing cube.
+
+        Parameters
+        ----------
+        path: Path
+            Path of the cube without the suffix
+        mode: str, default: "r"
+            "r" for read only, "r+" to continue writing into it
+        """
+        data_file, meta_file = cls._files(path)
+        data = np.load(data_file, mmap_mode=mode)
+        with open(meta_file, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        coords = {name: np.asarray(val) for name, val in meta["coords"].items()}
+        return cls(path, data, coords, meta.get("attrs", {}))
+
+    def save_metadata(self):
+        """ Write the axis names, coordinates and attributes. """
+        _, meta_file = self._files(self.path)
+        meta = {
+            "coords": {name: val.tolist() for name, val in self.coords.items()},
+            "attrs": self.attrs,
+        }
+        with open(meta_file, "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=1)
+
+    def set_coords(self, name: str, values: np.array):
+        """ Set the coordinates of an axis once they are known. """
+        values = np.asarray(values)
+        if len(values) != len(self.coords[name]):
+            raise ValueError(f"Axis {name} has {len(self.coords[name])} points, not {len(values)}.")
+        self.coords[name] = values
+        self.save_metadata()
+
+    @property
+    def dims(self) -> Tuple:
+        return tuple(self.coords.keys())
+
+    @property
+    def shape(self) -> Tuple:
+        return self.data.shape
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __setitem__(self, index, val):
+        self.data[index] = val
+
+    def index(self, **kwargs) -> Tuple:
+        """ Index of the nearest coordinates, i.e. cube.index(**{"Ring [V]": 3.5}). """
+        return tuple(
+            int(np.argmin(np.abs(self.coords[dim] - kwargs[dim]))) if dim in kwargs else slice(None)
+            for dim in self.dims
+        )
+
+    def sel(self, **kwargs) -> np.array:
+        """ Read the slice at the nearest coordinates from disk. """
+        return np.asarray(self.data[self.index(**kwargs)])
+
+    def flush(self):
+        """ Write the changes to disk. """
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+    def close(self):
+        """ Flush and release the memory map. """
+        self.flush()
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,99 @@
+"""
+Write result files on a background thread so that the next
+measurement can start while the previous result is written to disk.
+
+e.g.
+    with ExportQueue() as exports:
+        for volt in voltages:
+            ...
+            wavelength, loss, omr_data = ilme.get_result()
+            exports.submit(df.to_csv, folder / f"{volt}V.csv", index=False)
+"""
+from typing import Callable
+import queue
+import threading
+
+
+class ExportQueue:
+    """
+    A bounded queue of export jobs processed by worker threads.
+
+    submit blocks when max_pending jobs are waiting, so a slow disk
+    throttles the acquisition instead of filling up the memory. An error
+    in a job is raised again by the next call to submit, flush or close.
+
+    Parameters
+    ----------
+    max_pending: int, default: 8
+        Maximum number of jobs waiting to be written
+    workers: int, default: 1
+        Number of worker threads
+    initializer: Callable, default: None
+        Function called once in each worker thread before any job,
+        i.e. pythoncom.CoInitialize for COM objects.
+    """
+    def __init__(self, max_pending: int=8, workers: int=1, initializer: Callable=None):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._initializer = initializer
+        self._error = None
+        self.completed = 0
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        if self._initializer is not None:
+            self._initializer()
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                break
+            func, args, kwargs = job
+            try:
+                func(*args, **kwargs)
+                self.completed += 1
+            except Exception as error: # pylint: disable=broad-except
+                # raised again in the acquisition thread
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    @property
+    def pending(self) -> int:
+        """ Number of jobs waiting to be written. """
+        return self._queue.qsize()
+
+    def submit(self, func: Callable, *args, **kwargs):
+        """ Queue func(*args, **kwargs), blocking while the queue is full. """
+        self._check()
+        if not any(thread.is_alive() for thread in self._threads):
+            raise RuntimeError("Export queue is closed.")
+        self._queue.put((func, args, kwargs))
+
+    def flush(self):
+        """ Wait until all the queued jobs have been written. """
+        self._queue.join()
+        self._check()
+
+    def close(self):
+        """ Write all the queued jobs and stop the workers. """
+        for thread in self._threads:
+            if thread.is_alive():
+                self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
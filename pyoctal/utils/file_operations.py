@@ -1,12 +1,28 @@
 """ 
-Functions related to CSV or Excel operations 
+Functions related to CSV, Excel and binary file operations 
+
+The binary formats (Parquet, Feather and NPZ) are much faster than Excel
+for long spectra and carry the metadata (i.e. units, instrument settings)
+inside the file. Use export to pick the format from the configuration and
+convert to Excel or CSV afterwards, away from the measurement.
 """
-from typing import Union, List, Tuple
+from typing import Callable, Dict, Union, List, Tuple
 from os import makedirs
 from pathlib import Path
+import json
 
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXCEL_MAX_ROWS = 1048575 # excluding the header
+
 def export_to_excel(data: Union[pd.DataFrame, List, Tuple],
                     filename: Path, sheet_names: Union[Tuple, List]):
     """
@@ -27,3 +43,161 @@ def export_to_excel(data: Union[pd.DataFrame, List, Tuple],
         elif isinstance(data, Union[List, Tuple]):
             for i, df in enumerate(data):
                 df.to_excel(writer, sheet_name=f"{sheet_names[i]}", index=False)
+
+
+def _require_pyarrow(fmt: str):
+    if pa is None:
+        raise ImportError(f"pyarrow is required to export to {fmt}. Install pyoctal[io].")
+
+
+def _to_table(data: pd.DataFrame, metadata: Dict):
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    schema_meta = dict(table.schema.metadata or {})
+    schema_meta[b"pyoctal"] = json.dumps(metadata or {}).encode()
+    return table.replace_schema_metadata(schema_meta)
+
+
+def export_to_csv(data: pd.DataFrame, filename: Path, metadata: Dict=None):
+    """
+    Export data to a CSV file. The metadata is saved next to it in a JSON file.
+    """
+    makedirs(filename.parent, exist_ok=True)
+    data.to_csv(filename, index=False)
+    if metadata:
+        with open(filename.with_suffix(".json"), "w", encoding="utf-8") as file:
+            json.dump(metadata, file, indent=1)
+
+
+def export_to_parquet(data: pd.DataFrame, filename: Path, metadata: Dict=None):
+    """ Export data to a Parquet file with the metadata in its schema. """
+    _require_pyarrow("parquet")
+    makedirs(filename.parent, exist_ok=True)
+    pq.write_table(_to_table(data, metadata), filename)
+
+
+def export_to_feather(data: pd.DataFrame, filename: Path, metadata: Dict=None):
+    """ Export data to a Feather (Arrow IPC) file with the metadata in its schema. """
+    _require_pyarrow("feather")
+    makedirs(filename.parent, exist_ok=True)
+    feather.write_feather(_to_table(data, metadata), filename)
+
+
+def export_to_npz(data: pd.DataFrame, filename: Path, metadata: Dict=None):
+    """ Export the columns of data to a NumPy .npz file with the metadata as JSON. """
+    makedirs(filename.parent, exist_ok=True)
+    np.savez(
+        filename,
+        columns=np.array(data.columns, dtype=str),
+        metadata=np.array(json.dumps(metadata or {})),
+        **{f"col_{i}": data[col].to_numpy() for i, col in enumerate(data.columns)},
+    )
+
+
+exporters: Dict[str, Tuple[Callable, str]] = {
+    "csv": (export_to_csv, ".csv"),
+    "parquet": (export_to_parquet, ".parquet"),
+    "feather": (export_to_feather, ".feather"),
+    "npz": (export_to_npz, ".npz"),
+}
+
+
+def _with_suffix(filename: Path, suffix: str) -> Path:
+    """
+    Give the file the suffix of the format. Only the suffix of another
+    export format is replaced, so dots in the name (i.e. ring3.5,
+    09.12.2024) are kept.
+    """
+    known = {".xlsx", *(ext for _, ext in exporters.values())}
+    if filename.suffix.lower() == suffix:
+        return filename
+    if filename.suffix.lower() in known:
+        return filename.with_suffix(suffix)
+    return filename.with_name(filename.name + suffix)
+
+
+def export(data: pd.DataFrame, filename: Path, fmt: str="excel", metadata: Dict=None) -> Path:
+    """
+    Export data in the given format.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Data to be exported
+    filename: Path
+        File name to be saved. The suffix of the format is added, or
+        replaces the suffix of another export format.
+    fmt: str, default: "excel"
+        "excel", "csv", "parquet", "feather" or "npz"
+    metadata: Dict, default: None
+        JSON-serialisable metadata, i.e. {"units": {...}, "settings": {...}}
+
+    Returns
+    -------
+    Path
+        The file that was written
+    """
+    filename = Path(filename)
+    if fmt == "excel":
+        filename = _with_suffix(filename, ".xlsx")
+        sheets = [data] if metadata is None else [data, _metadata_frame(metadata)]
+        export_to_excel(sheets, filename, sheet_names=["data", "metadata"])
+        return filename
+    if fmt not in exporters:
+        raise ValueError(f"Unsupported export format: {fmt}. Choose from excel, {', '.join(exporters)}.")
+    func, suffix = exporters[fmt]
+    filename = _with_suffix(filename, suffix)
+    func(data, filename, metadata=metadata)
+    return filename
+
+
+def load_export(filename: Path) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Load a file written by export.
+
+    Returns
+    -------
+    pd.DataFrame
+        The data
+    Dict
+        The metadata
+    """
+    filename = Path(filename)
+    suffix = filename.suffix.lower()
+    if suffix in (".parquet", ".feather"):
+        _require_pyarrow(suffix[1:])
+        table = pq.read_table(filename) if suffix == ".parquet" else feather.read_table(filename)
+        metadata = json.loads((table.schema.metadata or {}).get(b"pyoctal", b"{}"))
+        return table.to_pandas(), metadata
+    if suffix == ".npz":
+        with np.load(filename, allow_pickle=False) as file:
+            data = pd.DataFrame({
+                str(col): file[f"col_{i}"] for i, col in enumerate(file["columns"])
+            })
+            return data, json.loads(str(file["metadata"]))
+    if suffix == ".csv":
+        meta_file = filename.with_suffix(".json")
+        metadata = {}
+        if meta_file.exists():
+            with open(meta_file, "r", encoding="utf-8") as file:
+                metadata = json.load(file)
+        return pd.read_csv(filename), metadata
+    raise ValueError(f"Unsupported file format: {filename.suffix}")
+
+
+def _metadata_frame(metadata: Dict) -> pd.DataFrame:
+    """ Flatten the metadata into a two-column table for Excel. """
+    flat = pd.json_normalize(metadata).iloc[0] if metadata else pd.Series(dtype=object)
+    return pd.DataFrame({"key": flat.index, "value": flat.astype(str).to_numpy()})
+
+
+def convert_export(filename: Path, fmt: str="excel") -> Path:
+    """
+    Convert a file written by export into another format, i.e. to Excel or CSV.
+
+    Excel sheets are limited to EXCEL_MAX_ROWS rows.
+    """
+    data, metadata = load_export(filename)
+    if fmt == "excel" and len(data) > EXCEL_MAX_ROWS:
+        raise ValueError(f"{filename} has {len(data)} rows, more than an Excel sheet can hold. "
+                         "Convert it to csv instead.")
+    return export(data, filename, fmt=fmt, metadata=metadata)
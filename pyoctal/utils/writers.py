@@ -0,0 +1,232 @@
+"""
+Append-only streaming writers for sweep results.
+
+Rows are collected into a preallocated column chunk. Full chunks are
+handed over to a background thread that appends them to the file, so
+writing a row has a constant cost and a crash only loses the rows that
+have not been flushed yet.
+
+The format is picked from the file suffix:
+    .parquet            Parquet row groups (pyarrow)
+    .arrow, .feather    Arrow IPC record batches (pyarrow)
+    .h5, .hdf5          Resizable HDF5 datasets, one per column (h5py)
+    .csv                CSV
+
+If the optional dependency of the format is not installed, the data is
+written to a CSV with the same name instead.
+
+e.g.
+    with StreamWriter(Path("data/map.parquet"), ["Volt [V]", "Power [W]"]) as writer:
+        for volt in voltages:
+            pm.set_volt(volt)
+            writer.write_row(volt, mm.get_detect_pow())
+"""
+from typing import List, Tuple, Union
+from pathlib import Path
+from os import makedirs
+import logging
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+logger = logging.getLogger(__name__)
+
+
+class _CSVBackend:
+    """ Append chunks to a CSV file. """
+    def __init__(self, filename: Path, columns: List[str]):
+        self.filename = filename
+        self.columns = columns
+        pd.DataFrame(columns=columns).to_csv(filename, index=False)
+
+    def write(self, chunk: np.array):
+        pd.DataFrame(chunk, columns=self.columns).to_csv(
+            self.filename, mode="a", header=False, index=False
+        )
+
+    def close(self):
+        pass
+
+
+class _ParquetBackend:
+    """ Append chunks as Parquet row groups. """
+    def __init__(self, filename: Path, columns: List[str]):
+        self.columns = columns
+        self.schema = pa.schema([(name, pa.float64()) for name in columns])
+        self.writer = pq.ParquetWriter(filename, self.schema)
+
+    def write(self, chunk: np.array):
+        table = pa.Table.from_arrays([chunk[:, i] for i in range(len(self.columns))],
+                                     schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+class _ArrowBackend:
+    """ Append chunks as Arrow IPC record batches. """
+    def __init__(self, filename: Path, columns: List[str]):
+        self.columns = columns
+        self.schema = pa.schema([(name, pa.float64()) for name in columns])
+        self.sink = pa.OSFile(str(filename), "wb")
+        self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def write(self, chunk: np.array):
+        batch = pa.RecordBatch.from_arrays([chunk[:, i] for i in range(len(self.columns))],
+                                           schema=self.schema)
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+class _HDF5Backend:
+    """ Append chunks to resizable HDF5 datasets, one per column. """
+    def __init__(self, filename: Path, columns: List[str]):
+        self.file = h5py.File(filename, "w")
+        self.datasets = [
+            self.file.create_dataset(name.replace("/", "_"), shape=(0,), maxshape=(None,),
+                                     dtype="f8", chunks=True)
+            for name in columns
+        ]
+        for dset, name in zip(self.datasets, columns):
+            dset.attrs["name"] = name
+
+    def write(self, chunk: np.array):
+        for i, dset in enumerate(self.datasets):
+            start = dset.shape[0]
+            dset.resize((start + len(chunk),))
+            dset[start:] = chunk[:, i]
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+_backends = {
+    ".csv": (_CSVBackend, True),
+    ".parquet": (_ParquetBackend, pa is not None),
+    ".arrow": (_ArrowBackend, pa is not None),
+    ".feather": (_ArrowBackend, pa is not None),
+    ".h5": (_HDF5Backend, h5py is not None),
+    ".hdf5": (_HDF5Backend, h5py is not None),
+}
+
+
+class StreamWriter:
+    """
+    Write rows to a file at a constant cost per row.
+
+    Memory is bounded to chunk_size*(max_pending + 1) rows: if the disk
+    falls behind, write_row blocks until a chunk has been written.
+
+    Parameters
+    ----------
+    filename: Path
+        The file to write to. The suffix selects the format.
+    columns: Union[List[str], Tuple[str]]
+        Column names
+    chunk_size: int, default: 1024
+        Number of rows per chunk
+    max_pending: int, default: 4
+        Maximum number of chunks waiting to be written
+    """
+    def __init__(self, filename: Path, columns: Union[List[str], Tuple[str]],
+                 chunk_size: int=1024, max_pending: int=4):
+        filename = Path(filename)
+        backend, available = _backends.get(filename.suffix.lower(), (None, False))
+        if backend is None:
+            raise ValueError(f"Unsupported file format: {filename.suffix}")
+        if not available:
+            logger.warning("Missing dependency for %s files. Writing CSV instead.", filename.suffix)
+            backend, filename = _CSVBackend, filename.with_suffix(".csv")
+
+        makedirs(filename.parent, exist_ok=True)
+        self.filename = filename
+        self.columns = list(columns)
+        self.chunk_size = chunk_size
+        self.rows = 0 # total number of rows written
+        self._backend = backend(filename, self.columns)
+        self._chunk = np.empty((chunk_size, len(self.columns)))
+        self._idx = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            try:
+                if self._error is None:
+                    self._backend.write(chunk)
+            except Exception as error: # pylint: disable=broad-except
+                # raised again in the thread that writes the rows
+                self._error = error
+            finally:
+                self._queue.task_done()
+        self._backend.close()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def _submit(self):
+        if self._idx:
+            self._queue.put(self._chunk[:self._idx])
+            self._chunk = np.empty_like(self._chunk)
+            self._idx = 0
+
+    def write_row(self, *values):
+        """ Append one row of values in the order of the columns. """
+        self._check()
+        if len(values) == 1 and isinstance(values[0], dict):
+            values = [values[0][name] for name in self.columns]
+        self._chunk[self._idx] = values
+        self._idx += 1
+        self.rows += 1
+        if self._idx == self.chunk_size:
+            self._submit()
+
+    def write_rows(self, rows: np.array):
+        """ Append a 2D array of rows. """
+        for row in np.atleast_2d(rows):
+            self.write_row(*row)
+
+    def flush(self):
+        """ Write all the buffered rows and wait until they are on disk. """
+        self._check()
+        self._submit()
+        self._queue.join()
+        self._check()
+
+    def close(self):
+        """ Write all the buffered rows and close the file. """
+        if not self._thread.is_alive():
+            return
+        self._submit()
+        self._queue.put(None)
+        self._thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+
+from pyoctal.utils.acquisition import RingBuffer, BackgroundAcquisition
+
+
+def test_ring_buffer_overwrite():
+    buf = RingBuffer(n_frames=3, record_length=2)
+    for i in range(5):
+        buf.put(np.full(2, i), timestamp=i)
+    assert buf.count == 5
+    frame, timestamp = buf.get(4)
+    assert np.all(frame == 4) and timestamp == 4
+    assert np.all(buf.latest(2)[:, 0] == [3, 4])
+
+def test_background_acquisition():
+    counter = iter(range(10**9))
+
+    def read():
+        time.sleep(1e-03)
+        return np.full(4, next(counter))
+
+    with BackgroundAcquisition(read, n_frames=8) as acq:
+        frames = []
+        for idx, _, frame in acq.frames():
+            frames.append((idx, frame[0]))
+            if len(frames) == 20:
+                break
+    assert not acq.running
+    idxs, values = zip(*frames)
+    assert list(idxs) == sorted(idxs)
+    assert all(idx == value for idx, value in frames)
+
+def test_background_acquisition_error():
+    def read():
+        raise TimeoutError("scope timed out")
+
+    acq = BackgroundAcquisition(read, n_frames=4, record_length=4)
+    acq.start()
+    try:
+        list(acq.frames())
+    except TimeoutError:
+        pass
+    else:
+        assert False, "error was not raised in the consumer"
+    acq.stop()
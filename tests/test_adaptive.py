@@ -0,0 +1,61 @@
+import numpy as np
+
+from pyoctal.sweeps import Adaptive1D, Adaptive2D
+from pyoctal.sweeps.adaptive import to_grid
+
+
+class FakeDevice:
+    """ A source and a detector with a narrow dip in the response. """
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.history = []
+
+    def set_x(self, x):
+        self.x = x
+        self.history.append(x)
+
+    def set_y(self, y):
+        self.y = y
+
+    def power(self):
+        return 1 - 0.9/(1 + ((self.x - 3.21)/0.02)**2)
+
+    def power_2d(self):
+        return np.tanh((self.x + self.y - 1)/0.05)
+
+
+def test_adaptive_1d():
+    dev = FakeDevice()
+    sweep = Adaptive1D("volt", dev.set_x, 0, 5, measurements={"power": dev.power},
+                       tol=0.005, min_step=1e-03, max_step=0.1)
+    df = sweep.run(progress=False)
+
+    # far fewer points than a uniform grid at the finest step
+    assert len(df) < 300
+    assert np.all(np.diff(df["volt"]) > 0)
+    assert abs(df["volt"][df["power"].idxmin()] - 3.21) < 2e-03
+    assert df["power"].min() < 0.15
+
+def test_adaptive_1d_max_step():
+    # a flat response is sampled at max_step, no finer
+    sweep = Adaptive1D("volt", lambda _: None, 0, 5, measurements={"power": lambda: 1.0},
+                       min_step=1e-03, max_step=0.025, init_pts=11)
+    df = sweep.run(progress=False)
+    assert len(df) == 201
+    assert np.allclose(np.diff(df["volt"]), 0.025)
+
+def test_adaptive_2d():
+    dev = FakeDevice()
+    sweep = Adaptive2D(("x", "y"), (dev.set_x, dev.set_y), ((0, 1), (0, 1)),
+                       measurements={"power": dev.power_2d}, tol=0.05, max_pts=1000)
+    df = sweep.run(progress=False)
+
+    assert len(df) <= 1000
+    # the points concentrate along the edge at x + y = 1
+    distance = np.abs(df["x"] + df["y"] - 1)
+    assert (distance < 0.05).sum() > 0.4*len(df)
+
+    x, y, grid = to_grid(df, ("x", "y"), "power")
+    xx, yy = np.meshgrid(x, y, indexing="ij")
+    assert np.nanmax(np.abs(grid - np.tanh((xx + yy - 1)/0.05))) < 0.2
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from pyoctal.utils.averaging import Averager, Welford, average
+
+
+class FakeSensor:
+    """ A power meter with white noise that averages over its averaging time. """
+    def __init__(self, power, noise, avgtime=1e-03, delay=0):
+        self.power = power
+        self.noise = noise
+        self.avgtime = avgtime
+        self.delay = delay
+        self.reads = 0
+        self.avgtimes = []
+        self.rng = np.random.default_rng(0)
+
+    def set_avgtime(self, avgtime):
+        self.avgtimes.append(avgtime)
+        self.avgtime = avgtime
+
+    def read(self):
+        self.reads += 1
+        time.sleep(self.delay)
+        return self.power + self.noise*np.sqrt(1e-03/self.avgtime)*self.rng.standard_normal()
+
+
+def test_welford():
+    data = np.random.default_rng(1).normal(size=100)
+    stats = Welford()
+    for val in data:
+        stats.add(val)
+    assert np.isclose(stats.mean, data.mean())
+    assert np.isclose(stats.variance, data.var(ddof=1))
+
+
+def test_average_stops_at_precision():
+    # high power: two reads are enough, fewer than the old fixed three
+    sensor = FakeSensor(1e-03, 1e-07)
+    mean, sem, count = average(sensor.read, rtol=0.01)
+    assert count == 2 and sensor.reads == 2 and abs(mean - 1e-03) < 1e-05
+
+    # near extinction: more reads, capped at max_count
+    sensor = FakeSensor(1e-08, 1e-08)
+    mean, sem, count = average(sensor.read, rtol=0.01, atol=2e-09, max_count=1000)
+    assert 2 < count < 1000 and sem <= 2e-09
+    _, _, count = average(sensor.read, rtol=0.01, max_count=20)
+    assert count == 20
+
+    # a quantised meter: identical first reads do not stop the averaging
+    reads = iter([0.0, 0.0, 1e-09] + [0.0, 1e-09]*50)
+    _, _, count = average(lambda: next(reads), rtol=0.01)
+    assert count > 2
+
+
+def test_instrument_averaging_fallback():
+    # slow queries: one long instrument average is cheaper than many reads
+    sensor = FakeSensor(1e-06, 1e-07, delay=0.002)
+    averager = Averager(sensor.read, rtol=0.01, set_avgtime=sensor.set_avgtime, avgtime=1e-03)
+    mean = averager()
+    assert sensor.reads < 10
+    assert sensor.avgtimes[-1] == 1e-03 and sensor.avgtimes[0] > 1e-03
+    assert abs(mean - 1e-06) < 3e-08
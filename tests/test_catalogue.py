@@ -0,0 +1,26 @@
+from pyoctal.instruments.base import DeviceID
+from pyoctal.utils.catalogue import Catalogue
+
+
+def test_catalogue(tmp_path):
+    idn = DeviceID("Agilent Technologies,E3640A,MY123,1.0")
+    with Catalogue(tmp_path / "catalogue.db") as catalogue:
+        for chip in (1, 3):
+            for volt in (0.5, 1.0, 2.0):
+                catalogue.add(tmp_path / f"chip{chip}" / f"{volt}V.csv", sweep="ilme",
+                              params={"chip": chip, "voltage": volt, "mode": "ACC"},
+                              instruments={"source": idn}, shape=(100, 2))
+        # adding the same path again replaces the record
+        catalogue.add(tmp_path / "chip3" / "2.0V.csv", sweep="ilme",
+                      params={"chip": 3, "voltage": 2.0, "mode": "ACC"}, shape=(200, 2))
+        assert len(catalogue) == 6
+
+        found = catalogue.find(chip=3, voltage=2.0)
+        assert [dataset.path.name for dataset in found] == ["2.0V.csv"]
+        assert found[0].shape == (200, 2)
+        assert found[0].params["mode"] == "ACC"
+
+        assert len(catalogue.find(voltage=(0.5, 1.0), mode="ACC")) == 4
+        assert len(catalogue.find(serialno="MY123", chip=3)) == 2
+        assert catalogue.find(serialno="MY123")[0].instruments["source"]["modelno"] == "E3640A"
+        assert not catalogue.find(sweep="other")
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from pyoctal.control.bias_lock import QuadratureLock
+from pyoctal.control.resonance import ResonanceTracker
+
+
+class FakeMZI:
+    """ A thermally tuned MZI whose phase drifts with every read. """
+    def __init__(self, drift=0.0):
+        self.volt = 0
+        self.offset = 0.3
+        self.drift = drift
+        self.amplitude = 1e-03
+
+    def set_volt(self, volt):
+        self.volt = volt
+
+    @staticmethod
+    def reads_per_step(mode):
+        return 1 if mode == "pi" else 3
+
+    def power(self):
+        self.offset += self.drift
+        return self.amplitude/2*(1 + np.cos(np.pi/2*self.volt + self.offset)) + 1e-06
+
+
+def quadrature_error(mzi, lock):
+    return np.pi/2*lock.bias + mzi.offset - np.pi/2
+
+
+@pytest.mark.parametrize("mode", ["pi", "dither"])
+def test_quadrature_lock(mode):
+    mzi = FakeMZI()
+    lock = QuadratureLock(mzi.set_volt, mzi.power, limits=(0, 4), mode=mode, kp=0.5, ki=20)
+    bias = lock.calibrate(np.linspace(0, 4, 401))
+    assert abs(np.pi/2*bias + 0.3 - np.pi/2) < 0.02
+
+    mzi.drift = 2e-04
+    for _ in range(500):
+        lock.step(dt=0.01)
+    # the integral follows the drift and keeps the MZI at quadrature
+    assert abs(quadrature_error(mzi, lock)) < 0.02
+    assert abs(lock.integral + 0.1*2/np.pi*mzi.reads_per_step(mode)) < 0.02
+
+    telemetry = lock.run(steps=10)
+    assert abs(telemetry["phase"][-1] - np.pi/2) < 0.02
+    assert QuadratureLock.loop_stats(telemetry)["rate"] > 0
+    if mode == "dither":
+        # insensitive to the optical power
+        mzi.amplitude *= 0.5
+        for _ in range(200):
+            lock.step(dt=0.01)
+        assert abs(quadrature_error(mzi, lock)) < 0.02
+
+def test_proportional_only_leaves_an_offset():
+    mzi = FakeMZI()
+    lock = QuadratureLock(mzi.set_volt, mzi.power, limits=(0, 4), kp=0.5, ki=0)
+    lock.calibrate(np.linspace(0, 4, 401))
+    mzi.offset -= 0.15
+    for _ in range(100):
+        lock.step(dt=0.01)
+    # positional P control leaves error/(1 + kp), independent of the loop rate
+    assert abs(quadrature_error(mzi, lock) + 0.1) < 0.005
+
+def test_lock_anti_windup():
+    mzi = FakeMZI()
+    lock = QuadratureLock(mzi.set_volt, mzi.power, limits=(0, 4), kp=0.5, ki=20)
+    lock.calibrate(np.linspace(0, 4, 401))
+    lock.limits = (0, 1.2)
+
+    # quadrature moves beyond the upper limit: the output saturates
+    mzi.offset -= 1.0
+    for _ in range(300):
+        lock.step(dt=0.01)
+    assert lock.bias == pytest.approx(1.2)
+    assert lock.bias0 + lock.integral <= 1.2 + 1e-09
+
+    # it comes back: no wound up integral to unwind
+    mzi.offset += 1.0
+    for _ in range(30):
+        lock.step(dt=0.01)
+    assert abs(quadrature_error(mzi, lock)) < 0.02
+
+def test_lock_needs_calibration():
+    mzi = FakeMZI()
+    with pytest.raises(RuntimeError):
+        QuadratureLock(mzi.set_volt, mzi.power, limits=(0, 4)).run(steps=1)
+
+
+class FakeRing:
+    """ A laser and a detector around a ring resonance that moves. """
+    def __init__(self, centre=1555.0):
+        self.centre = centre
+        self.wavelength = 1550.0
+        self.reads = 0
+
+    def set_laser_wav(self, wavelength):
+        self.wavelength = wavelength
+
+    def get_detect_pow(self):
+        self.reads += 1
+        detuning = (self.wavelength - self.centre)/0.01 # 20 pm linewidth
+        return 1e-03*(1 - 0.95/(1 + detuning**2))
+
+
+def test_resonance_tracking():
+    ring = FakeRing()
+    tracker = ResonanceTracker(ring, window=0.01, span=1)
+    assert abs(tracker.acquire(1555.2) - 1555.0) < 1e-03
+
+    ring.reads = 0
+    for _ in range(100):
+        ring.centre += 0.004 # 4 pm per bias step
+        wavelength, _ = tracker.update()
+        assert abs(wavelength - ring.centre) < 5e-03
+    assert ring.reads == 300
+    assert tracker.get_history()["locked"].all()
+
+    # a jump far outside the window is recovered with a wide search
+    ring.centre += 0.3
+    for _ in range(tracker.patience + 1):
+        wavelength, _ = tracker.update()
+    assert abs(wavelength - ring.centre) < 5e-03
+    assert tracker.searches == 2
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from pyoctal.utils.cube import MeasurementCube
+
+
+def test_cube_roundtrip(tmp_path):
+    path = tmp_path / "map"
+    with MeasurementCube.create(path, axes={"ring": [1.0, 2.0], "heater": [0, 1, 2], "wl": 4},
+                                attrs={"unit": "dB"}) as cube:
+        assert cube.shape == (2, 3, 4)
+        assert np.isnan(cube[1, 2]).all()
+        cube.set_coords("wl", [1550, 1551, 1552, 1553])
+        with pytest.raises(ValueError):
+            cube.set_coords("wl", [1550])
+        cube[1, 2] = np.arange(4)
+
+    cube = MeasurementCube.open(path)
+    assert cube.dims == ("ring", "heater", "wl")
+    assert cube.attrs["unit"] == "dB"
+    assert isinstance(cube.data, np.memmap)
+    assert np.array_equal(cube.sel(ring=2.1, heater=2), np.arange(4))
+    assert cube.sel(wl=1551).shape == (2, 3)
+
+
+def test_cube_rejects_float_length(tmp_path):
+    # i.e. KeysightILME.get_dpts after the unit conversions
+    with pytest.raises(ValueError):
+        MeasurementCube.create(tmp_path / "map", axes={"wl": 4001.0000000000227})
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+from pyoctal.utils.export_queue import ExportQueue
+
+
+def test_export_queue():
+    written = []
+    gate = threading.Event()
+
+    def write(name):
+        gate.wait()
+        written.append(name)
+
+    exports = ExportQueue(max_pending=2)
+    for i in range(3):
+        exports.submit(write, i)
+    # one job is being written and two are waiting
+    assert exports.pending == 2
+    gate.set()
+    exports.close()
+    assert written == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        exports.submit(write, 3)
+
+def test_export_queue_error():
+    def fail():
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        with ExportQueue() as exports:
+            exports.submit(fail)
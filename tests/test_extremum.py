@@ -0,0 +1,42 @@
+import numpy as np
+
+from pyoctal.sweeps import ExtremumSearch
+from pyoctal.sweeps.extremum import bracket
+
+
+class FakeMZI:
+    """ A heater on an MZI whose fringe is shifted by a ring. """
+    def __init__(self):
+        self.volt = 0
+        self.phase = 0.3
+
+    def set_volt(self, volt):
+        self.volt = volt
+
+    def power(self):
+        return 0.5*(1 + np.cos(np.pi*self.volt**2/2 + self.phase))
+
+
+def test_bracket_at_bound():
+    lo, hi = bracket(lambda x: -x, 0.5, 0.1, (0, 1))
+    assert hi == 1 and lo < 1
+
+
+def test_extremum_warm_start():
+    mzi = FakeMZI()
+    search = ExtremumSearch("volt", mzi.set_volt, (0, 2), {"power": mzi.power}, tol=1e-03)
+    grid = np.linspace(0, 2, 801)
+    vmax = vmin = None
+    counts = []
+    for phase in np.linspace(0.3, 1.0, 8):
+        mzi.phase = phase
+        search.reset()
+        vmax, _ = search.find("max", x0=vmax)
+        vmin, _ = search.find("min", x0=vmin)
+        counts.append(len(search.points))
+
+        # the same fringe as the argmax/argmin of a full grid
+        powers = 0.5*(1 + np.cos(np.pi*grid**2/2 + phase))
+        assert abs(vmax - grid[np.argmax(powers)]) < 5e-03
+        assert abs(vmin - grid[np.argmin(powers)]) < 5e-03
+    assert max(counts[1:]) < 30
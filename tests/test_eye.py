@@ -0,0 +1,41 @@
+import numpy as np
+
+from pyoctal.analysis.eye import crossing_times, eye_histogram, eye_stats
+
+
+def nrz(nbits: int=2000, sps: int=32, ui: float=1e-10, noise: float=0.0, seed: int=0):
+    """ Make a band-limited NRZ waveform between 0.1 and 1. """
+    rng = np.random.default_rng(seed)
+    bits = rng.integers(0, 2, nbits)
+    y = np.repeat(bits, sps).astype(float)
+    kernel = np.ones(sps//4)/(sps//4)
+    y = np.convolve(y, kernel, mode="same")*0.9 + 0.1
+    y += rng.normal(0, noise, y.shape)
+    t = np.arange(len(y))*ui/sps
+    return t, y
+
+def test_crossing_times():
+    t = np.arange(5.0)
+    y = np.array([[0, 1, 0, 1, 1], [1, 1, 0, 0, 1]], dtype=float)
+    assert np.allclose(np.sort(crossing_times(t, y, 0.5)), [0.5, 1.5, 1.5, 2.5, 3.5])
+
+def test_eye_stats():
+    ui = 1e-10
+    t, y = nrz(ui=ui, noise=0.01)
+    stats = eye_stats(t, y, ui)
+
+    assert np.isclose(stats["one level"], 1.0, atol=0.02)
+    assert np.isclose(stats["zero level"], 0.1, atol=0.02)
+    assert np.isclose(stats["extinction ratio"], 10, atol=0.5)
+    assert stats["q factor"] > 20
+    assert 0 < stats["eye height"] < 0.9
+    assert stats["jitter rms"] < 0.05*ui
+
+def test_eye_histogram_acquisitions():
+    ui = 1e-10
+    t, y = nrz(ui=ui, nbits=512)
+    y = y.reshape(4, -1)
+    hist, xedges, _ = eye_histogram(t[:y.shape[1]], y, ui, bins=(64, 32))
+    assert hist.shape == (64, 32)
+    assert hist.sum() == y.size
+    assert np.isclose(xedges[-1], 2)
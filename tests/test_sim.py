@@ -17,7 +17,8 @@ class TestClassCalls:
     untestable_files = ("thorlabsAPT", 'keysightPAS', "fiberlabsAMP","base")
     untestable_modules = [
         'BaseInstrument','BaseSweeps', 'DeviceID','KeysightFlexDCA',
-        'KeysightILME','ThorlabsAPT', 'FiberlabsAMP', "Agilent816xB"
+        'KeysightILME','ThorlabsAPT', 'FiberlabsAMP', "Agilent816xB",
+        "AmetekDSP72XX", # abstract base of the Ametek lock-ins
     ]
 
     def test_instr_initialization(self):
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from pyoctal.analysis.spectrum import find_resonances, normalise
+from pyoctal.analysis.__main__ import main
+
+
+def ring(wavelength, centre, fwhm=0.05, depth=0.9):
+    """ Transmission [dB] of a ring with a tilted envelope. """
+    lorentz = 1 - depth/(1 + ((wavelength - centre)/(fwhm/2))**2)
+    return 10*np.log10(lorentz) - 5 - 0.01*(wavelength - 1550)
+
+def test_find_resonances():
+    wavelength = np.linspace(1545, 1555, 10001)
+    res = find_resonances(wavelength, normalise(wavelength, ring(wavelength, 1551.0)))
+    assert len(res["wavelength"]) == 1
+    assert abs(res["wavelength"][0] - 1551.0) < 2e-03
+    assert abs(res["fwhm"][0] - 0.05) < 5e-03
+    assert abs(res["depth"][0] - 10) < 0.5
+
+def test_batch_cli(tmp_path, monkeypatch, capsys):
+    wavelength = np.linspace(1545, 1555, 2001)
+    for volt in (0.0, 1.0, 2.0):
+        pd.DataFrame({
+            "Wavelength": wavelength, "Loss [dB]": -ring(wavelength, 1550 + volt)
+        }).to_csv(tmp_path / f"ring{volt}.csv", index=False)
+    (tmp_path / "broken.csv").write_text("nothing")
+
+    output = tmp_path / "results.csv"
+    monkeypatch.setattr("sys.argv", ["pyoctal.analysis", str(tmp_path), "--loss", "--jobs", "2",
+                                     "--output", str(output)])
+    main()
+
+    df = pd.read_csv(output).set_index("param")
+    assert df["error"].notna().sum() == 1
+    assert np.allclose(df.loc[[0.0, 1.0, 2.0], "resonance wavelength"], [1550, 1551, 1552], atol=0.01)
+    assert "normalise" in capsys.readouterr().out
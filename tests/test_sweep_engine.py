@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from pyoctal.sweeps import Axis, Sweep, Checkpoint
+
+
+class FakeSource:
+    """ Record every value that is set. """
+    def __init__(self):
+        self.value = None
+        self.history = []
+
+    def set(self, value):
+        self.value = value
+        self.history.append(value)
+
+
+def test_axis_spacing():
+    assert np.allclose(Axis.linear("v", lambda _: None, 0, 1, step=0.25).values, [0, 0.25, 0.5, 0.75, 1])
+    powers = Axis.sqrt_power("v", lambda _: None, 0, 2, npts=5).values**2
+    assert np.allclose(np.diff(powers), 1)
+
+def test_serpentine_order():
+    sweep = Sweep(axes=[Axis("a", lambda _: None, [0, 1, 2]), Axis("b", lambda _: None, [0, 1])], measurements={})
+    assert list(sweep.points()) == [(0, 0), (0, 1), (1, 1), (1, 0), (2, 0), (2, 1)]
+    sweep.serpentine = False
+    assert list(sweep.points()) == [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1)]
+
+def test_sweep_run():
+    outer, inner = FakeSource(), FakeSource()
+    sweep = Sweep(
+        axes=[Axis("outer", outer.set, [1, 2, 3]), Axis("inner", inner.set, [10, 20, 30, 40])],
+        measurements={
+            "sum": lambda: outer.value + inner.value,
+            "spectrum": lambda: np.full(5, outer.value),
+        },
+    )
+    result = sweep.run(progress=False)
+
+    assert result.shape == (3, 4)
+    assert np.array_equal(result["sum"], np.add.outer([1, 2, 3], [10, 20, 30, 40]))
+    assert result["spectrum"].shape == (3, 4, 5)
+    # outer source is only set when it changes
+    assert outer.history == [1, 2, 3]
+    assert np.all(np.isfinite(result.timing["measure"]))
+
+    df = result.to_dataframe()
+    assert list(df.columns) == ["outer", "inner", "sum"]
+    assert len(df) == 12
+    assert result.sel(outer=2)["sum"].tolist() == [12, 22, 32, 42]
+
+def test_checkpoint_resume(tmp_path):
+    outer, inner = FakeSource(), FakeSource()
+    calls = []
+
+    def measure():
+        calls.append((outer.value, inner.value))
+        if len(calls) == 5:
+            raise TimeoutError("VISA timeout")
+        return outer.value*inner.value
+
+    sweep = Sweep(
+        axes=[Axis("outer", outer.set, [1, 2, 3]), Axis("inner", inner.set, [1, 10])],
+        measurements={"product": measure},
+    )
+    checkpoint = Checkpoint(tmp_path / "sweep.npz", interval=1e+03)
+    with pytest.raises(TimeoutError):
+        sweep.run(progress=False, checkpoint=checkpoint)
+    assert checkpoint.exists()
+
+    outer.history.clear()
+    result = sweep.run(progress=False, checkpoint=checkpoint, resume=True)
+    # the failed point and the rest are measured again, with all setpoints restored
+    assert len(calls) == 7
+    assert outer.history == [3]
+    assert np.array_equal(result["product"], np.outer([1, 2, 3], [1, 10]))
+    assert result.timing["measure"].shape == (3, 2)
+    # a completed sweep leaves no checkpoint, so running it again measures every point
+    assert not checkpoint.exists()
+    result = sweep.run(progress=False, checkpoint=checkpoint, resume=True)
+    assert len(calls) == 13
+    assert np.array_equal(result["product"], np.outer([1, 2, 3], [1, 10]))
+
+def test_settle_after_outer_move():
+    events = []
+    sweep = Sweep(
+        axes=[
+            Axis("ring", lambda v: events.append(("ring", v)), [0, 1]),
+            Axis("heater", lambda v: events.append(("heater", v)), [0, 1],
+                 settle=lambda: events.append("settle")),
+        ],
+        measurements={"power": lambda: events.append("meas")},
+    )
+    sweep.run(progress=False)
+    # serpentine keeps the heater at 1 when the ring moves, but it is still settled
+    assert events == [
+        ("ring", 0), ("heater", 0), "settle", "meas",
+        ("heater", 1), "settle", "meas",
+        ("ring", 1), "settle", "meas",
+        ("heater", 0), "settle", "meas",
+    ]
+
+def test_axis_needs_step_or_npts():
+    with pytest.raises(ValueError):
+        Axis.linear("v", lambda _: None, 0, 1)
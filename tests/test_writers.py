@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from pyoctal.utils.writers import StreamWriter
+from pyoctal.utils.file_operations import export, load_export, convert_export
+
+
+def test_stream_csv(tmp_path):
+    filename = tmp_path / "data.csv"
+    rows = np.random.default_rng(0).random((25, 3))
+    with StreamWriter(filename, ["a", "b", "c"], chunk_size=4, max_pending=1) as writer:
+        writer.write_rows(rows[:20])
+        writer.flush()
+        assert len(pd.read_csv(filename)) == 20
+        for row in rows[20:]:
+            writer.write_row(dict(zip(["a", "b", "c"], row)))
+
+    df = pd.read_csv(filename)
+    assert list(df.columns) == ["a", "b", "c"]
+    assert np.allclose(df.to_numpy(), rows)
+    assert writer.rows == 25
+
+def test_stream_fallback(tmp_path):
+    with StreamWriter(tmp_path / "data.parquet", ["x"]) as writer:
+        writer.write_row(1.0)
+    assert writer.filename.exists()
+    if writer.filename.suffix == ".csv":
+        assert pd.read_csv(writer.filename)["x"].tolist() == [1.0]
+
+def test_export_npz(tmp_path):
+    data = pd.DataFrame({"Wavelength [nm]": np.linspace(1500, 1600, 11), "Loss [dB]": np.arange(11.0)})
+    metadata = {"units": {"Loss [dB]": "dB"}, "settings": {"power": 10}}
+    filename = export(data, tmp_path / "spectrum.xlsx", fmt="npz", metadata=metadata)
+    assert filename.suffix == ".npz"
+
+    loaded, loaded_meta = load_export(filename)
+    pd.testing.assert_frame_equal(loaded, data)
+    assert loaded_meta == metadata
+
+    csv = convert_export(filename, fmt="csv")
+    assert load_export(csv)[1] == metadata
+
+def test_export_keeps_dots(tmp_path):
+    data = pd.DataFrame({"x": [1.0]})
+    assert export(data, tmp_path / "ring3.0", fmt="npz").name == "ring3.0.npz"
+    assert export(data, tmp_path / "ring3.5", fmt="npz").name == "ring3.5.npz"
+    assert export(data, tmp_path / "ring3.5.npz", fmt="npz").name == "ring3.5.npz"
+    assert export(data, tmp_path / "09.12.2024.csv", fmt="npz").name == "09.12.2024.npz"
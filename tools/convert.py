@@ -0,0 +1,29 @@
+"""
+convert.py
+==========
+This script converts files written by pyoctal.utils.file_operations.export
+(Parquet, Feather, NPZ or CSV) into Excel or CSV after the measurement.
+
+To run this script:
+    python -m tools.convert <files> [--format excel|csv]
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+
+from pyoctal.utils.file_operations import convert_export
+
+def main():
+    """ Entry point."""
+    parser = ArgumentParser()
+    parser.add_argument("files", nargs="+", help="Files to convert")
+    parser.add_argument("--format", help="Output format", choices=("excel", "csv"),
+                        default="excel", required=False)
+
+    args = parser.parse_args()
+
+    for filename in args.files:
+        output = convert_export(Path(filename), fmt=args.format)
+        print(f"{filename} -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -16,12 +16,16 @@ import pickle
 from tqdm import tqdm
 import pandas as pd
 import numpy as np
+import pythoncom
 from pyvisa import ResourceManager
 
 from sklearn.linear_model import LinearRegression
 
 from pyoctal.instruments import FiberlabsAMP, KeysightILME
-from pyoctal.instruments.keysightPAS import export_to_omr
+from pyoctal.instruments.keysightPAS import marshal_omr, export_marshalled_omr
+from pyoctal.utils.export_queue import ExportQueue
+from pyoctal.utils.cube import MeasurementCube
+from pyoctal.utils.catalogue import Catalogue
 
 def linear_regression(data: np.array):
     """ 
@@ -70,13 +74,15 @@ def predict(model, fpath: str, wavelength: float, loss: float):
 
 
 def run_curr(rm: ResourceManager, amp_config: dict,
-             folder: Path, ilme_config: Path=None, prediction: bool=False):
+             folder: Path, ilme_config: Path=None, prediction: bool=False,
+             catalogue: Catalogue=None):
     """
     Obtain wavelength v.s. loss at different current levels.
 
     You only need to set the min and max current that you want to set
     and the program will automatically set the driving current of each
     channel for you starting from the smallest channel.
+    If a catalogue is given, every saved file is recorded in it.
     """
     currents = np.linspace(amp_config["start"], amp_config["stop"], amp_config["step"])
 
@@ -89,34 +95,50 @@ def run_curr(rm: ResourceManager, amp_config: dict,
     ilme = KeysightILME()
     ilme.connect(config_path=ilme_config)
 
-    if prediction:
-        loss_2d_arr = np.zeros(shape=(ilme.get_dpts(), len(currents)))
-
-    for j, curr in tqdm(enumerate(currents), desc="Currents", total=len(currents)):
-        amp.set_curr_smart(mode=amp_config.get("mode"), val=curr)
-        ilme.start_meas()
-        wavelength, loss, omr_data = ilme.get_result()
-
-        if prediction:
-            loss_2d_arr[:,j] = loss
-
-        pd.DataFrame(
-            {"Wavelength": wavelength, "Loss [dB]": loss}
-        ).to_csv(folder / f"{curr}A.csv", index=False)
-        export_to_omr(omr_data, filename=folder / f"{curr}A.omr")
+    cube = None
+
+    # the files are written while the next current is measured
+    with ExportQueue(initializer=pythoncom.CoInitialize) as exports:
+        for j, curr in tqdm(enumerate(currents), desc="Currents", total=len(currents)):
+            amp.set_curr_smart(mode=amp_config.get("mode"), val=curr)
+            ilme.start_meas()
+            wavelength, loss, omr_data = ilme.get_result()
+
+            if cube is None:
+                # sized by the first spectrum, get_dpts is not an exact integer
+                cube = MeasurementCube.create(
+                    folder / "loss",
+                    axes={"Current": currents, "Wavelength": wavelength},
+                    attrs={"unit": "dB", "mode": amp_config.get("mode")},
+                )
+            cube[j] = loss
+
+            exports.submit(
+                pd.DataFrame({"Wavelength": wavelength, "Loss [dB]": loss}).to_csv,
+                folder / f"{curr}A.csv", index=False
+            )
+            exports.submit(export_marshalled_omr, marshal_omr(omr_data), folder / f"{curr}A.omr")
+            if catalogue is not None:
+                # recorded once the files have been written
+                params = {"current": curr, "mode": amp_config.get("mode")}
+                for suffix, shape in ((".csv", (len(loss), 2)), (".omr", None)):
+                    exports.submit(
+                        catalogue.add, folder / f"{curr}A{suffix}", params=params,
+                        instruments={"amplifier": amp, "ilme": "KeysightILME"},
+                        sweep="amp.curr", shape=shape,
+                    )
+    cube.flush()
 
     if prediction:
-        dpts = []
-        for i, curr in enumerate(currents):
-            for j, wlength in enumerate(wavelength):
-                dpts.append((curr, wlength, loss_2d_arr[i,j]))
-        dpts = np.array(dpts)
+        grid_curr, grid_wlength = np.meshgrid(currents, cube.coords["Wavelength"], indexing="ij")
+        dpts = np.column_stack((grid_curr.ravel(), grid_wlength.ravel(), np.ravel(cube[:])))
         # Save the data for developing model in the future.
         np.save(folder / "model_data.npy", dpts)
-        model = linear_regression(dpts)
+        model = linear_regression(dpts.T)
         # save the model to a .pkl file for future usage
         with open(folder / "model.pkl", "wb") as file:
             pickle.dump(model, file)
+    cube.close()
 
     amp.set_output_state(state=0)
     rm.close()
@@ -135,7 +157,8 @@ def main():
     folder = Path("data")
     makedirs(folder, exist_ok=True)
 
-    run_curr(rm, amp_config, folder, prediction=True)
+    with Catalogue(folder / "catalogue.db") as catalogue:
+        run_curr(rm, amp_config, folder, prediction=True, catalogue=catalogue)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+"""
+mzi_bias_lock.py
+================
+This script locks an MZI to quadrature with the heater and logs the bias
+and the detected power while it drifts. The fringe is swept once to
+find quadrature, after which the lock holds it in real time.
+
+To run this script:
+    python -m tools.sweeps.dc.mzi_bias_lock
+"""
+from os import makedirs
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pyvisa import ResourceManager
+
+from pyoctal.instruments import AgilentE3640A, Agilent8163B
+from pyoctal.control.bias_lock import QuadratureLock
+
+
+def run_bias_lock(rm: ResourceManager, pm_config: dict, mm_config: dict,
+                  lock_config: dict, filename: Path):
+    """
+    Lock the MZI at quadrature and save the telemetry.
+
+    Parameters
+    ----------
+    rm: ResourceManager
+        Pyvisa resource manager
+    pm_config: dict
+        Heater power supply configuration
+    mm_config: dict
+        Lightwave multimeter configuration
+    lock_config: dict
+        Lock configuration
+    filename: Path
+        The filename to save the data to
+    """
+    pm = AgilentE3640A(rm=rm)
+    pm.connect(addr=pm_config["addr"])
+    mm = Agilent8163B(rm=rm)
+    mm.connect(addr=mm_config["addr"])
+
+    mm.setup(reset=0, wavelength=mm_config["wavelength"], power=mm_config["power"],
+             period=mm_config["period"])
+    pm.set_params(pm_config["stop"], 0.1)
+    pm.set_output_state(1)
+
+    lock = QuadratureLock(
+        pm.set_volt, mm.get_detect_pow, limits=(pm_config["start"], pm_config["stop"]),
+        mode=lock_config["mode"], kp=lock_config["kp"], ki=lock_config["ki"],
+        dither=lock_config["dither"], readback=pm.get_curr,
+    )
+    bias = lock.calibrate(
+        np.linspace(pm_config["start"], pm_config["stop"], pm_config["npts"]),
+        slope=lock_config["slope"],
+    )
+    print(f"Quadrature at {bias:.4f} V")
+
+    telemetry = lock.run(duration=lock_config["duration"])
+    stats = QuadratureLock.loop_stats(telemetry)
+    print(f"Loop rate: {stats['rate']:.1f} Hz, jitter: {stats['jitter']*1e+03:.2f} ms")
+
+    df = pd.DataFrame({
+        "Time [s]": telemetry["time"],
+        "Bias [V]": telemetry["bias"],
+        "Power [W]": telemetry["power"],
+        "Error [V]": telemetry["error"],
+        "Phase [rad]": telemetry["phase"],
+    })
+    if "readback" in telemetry:
+        # the heater current is only read back every readback_every loops
+        current = np.full(len(df), np.nan)
+        current[telemetry["readback index"]] = telemetry["readback"]
+        df["Current [A]"] = current
+    df.to_csv(filename, index=False)
+
+    pm.set_volt(0)
+    pm.set_output_state(0)
+    rm.close()
+
+def main():
+    """ Entry point."""
+    pm_config = {
+        "addr": "GPIB0::5::INSTR",
+        "start": 0, # [V]
+        "stop": 4, # [V]
+        "npts": 201, # calibration sweep
+    }
+    mm_config = {
+        "addr": "GPIB0::20::INSTR",
+        "wavelength": 1550, # [nm]
+        "power": 10, # [dBm]
+        "period": 1e-03, # [s]
+    }
+    lock_config = {
+        "mode": "pi", # pi or dither
+        "kp": 0.5,
+        "ki": 5, # [1/s]
+        "dither": 0.01, # [V] dither only
+        "slope": -1, # lock on the falling (-1) or rising (+1) side
+        "duration": 600, # [s]
+    }
+
+    filename = Path("data/bias_lock.csv")
+    makedirs(filename.parent, exist_ok=True)
+    rm = ResourceManager()
+
+    run_bias_lock(rm, pm_config, mm_config, lock_config, filename)
+
+if __name__ == "__main__":
+    main()
@@ -12,16 +12,24 @@ import numpy as np
 from pyvisa import ResourceManager
 
 from pyoctal.instruments import AgilentE3640A, Agilent8164B
+from pyoctal.utils.averaging import Averager
 
-def run_one_source_mzi(rm: ResourceManager, pm_config: dict, mm_config: dict, filename: Path):
-    """ Run only with instrument. Require one voltage source """
+def run_one_source_mzi(rm: ResourceManager, pm_config: dict, mm_config: dict, filename: Path,
+                       avg_config: dict=None):
+    """
+    Run only with instrument. Require one voltage source.
+
+    The power is averaged until its standard error is within the
+    tolerances of avg_config, see pyoctal.utils.averaging.Averager.
+    """
     pm = AgilentE3640A(rm=rm)
-    pm.connect(addr=pm_config.pop["addr"])
+    pm.connect(addr=pm_config.pop("addr"))
     mm = Agilent8164B(rm=rm)
-    mm.connect(addr=mm_config.pop["addr"])
-    mm.setup(**mm_config)
+    mm.connect(addr=mm_config.pop("addr"))
+    mm.setup(reset=0, **mm_config)
 
-    avg = 3
+    get_power = Averager(mm.get_detect_pow, set_avgtime=mm.set_detect_avgtime,
+                         avgtime=mm.get_detect_avgtime(), **(avg_config or {}))
 
     powers = []
     currents = []
@@ -33,15 +41,12 @@ def run_one_source_mzi(rm: ResourceManager, pm_config: dict, mm_config: dict, fi
     for volt in tqdm(voltages):
 
         pm.set_volt(volt)
-        power = 0
 
         # wait until the current is stable
         pm.wait_until_stable()
         time.sleep(0.1)
 
-        for _ in range(avg):
-            power += mm.get_detect_pow()
-        powers.append(power/avg)
+        powers.append(get_power())
         currents.append(pm.get_curr())
 
     pm.set_volt(0)
@@ -71,13 +76,20 @@ def main():
         "wavelength": 1553.15
     }
 
+    avg_config = {
+        "rtol": 0.01, # standard error relative to the power
+        "atol": 1e-09, # [W], noise floor near extinction
+        "min_count": 2, # enough at high power
+        "max_count": 20,
+    }
+
     filename = Path(r"C:\Users\Lab2052\Desktop\Users\Christina \
                     \2024-5-07\s4_2_ramzi_ring_g200_3\ring3v_max_with_heater.csv")
 
     makedirs(filename.parent, exist_ok=True)
     rm = ResourceManager()
 
-    run_one_source_mzi(rm, pm_config, mm_config, filename=filename)
+    run_one_source_mzi(rm, pm_config, mm_config, filename=filename, avg_config=avg_config)
 
     
 
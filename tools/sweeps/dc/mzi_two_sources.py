@@ -8,12 +8,17 @@ from tqdm import tqdm
 import pandas as pd
 
 from pyoctal.instruments import AgilentE3640A, Agilent8164B, KeysightILME
-from pyoctal.utils.file_operations import export_to_csv
+from pyoctal.utils.cube import MeasurementCube
+from pyoctal.sweeps import Axis, Sweep, Checkpoint, ExtremumSearch
+from pyoctal.utils.averaging import Averager
 
-def run_ring_assisted_mzi_res_mapping(rm: ResourceManager, rpm_config: dict, hpm_config: dict, folder: str):
+def run_ring_assisted_mzi_res_mapping(rm: ResourceManager, rpm_config: dict, hpm_config: dict, folder: Path):
     """ 
     Try to see how the output power of a specific wavelength
     changes with the voltage of the MZI and the ring.
+
+    The spectra are written into a memory-mapped cube of
+    (ring voltage, heater voltage, wavelength) in the folder.
     """
     heater_pm = AgilentE3640A(rm=rm)
     heater_pm.connect(addr=hpm_config.pop("addr"))
@@ -32,11 +37,11 @@ def run_ring_assisted_mzi_res_mapping(rm: ResourceManager, rpm_config: dict, hpm
     heater_pm.set_params(hpm_config["stop"], 0.5)
     ring_pm.set_output_state(1)
     ring_pm.set_params(rpm_config["stop"], 0.1)
-    
-    for ring_v in ring_voltages:
+
+    cube = None
+    for i, ring_v in enumerate(ring_voltages):
         ring_pm.set_volt(ring_v)
-        df = pd.DataFrame()
-        for heat_v in heater_voltages:
+        for j, heat_v in enumerate(heater_voltages):
             print(f"ring volt: {ring_v}, heater volt: {heat_v}")
             heater_pm.set_volt(heat_v)
             
@@ -45,71 +50,145 @@ def run_ring_assisted_mzi_res_mapping(rm: ResourceManager, rpm_config: dict, hpm
 
             ilme.start_meas()
             wavelength, loss, _ = ilme.get_result()
-            if heat_v == heater_voltages[0]:
-                df["Wavelength"] = wavelength
-            df[heat_v] = loss
-            export_to_csv(data=df, filename=join(folder, f"ring{ring_v}.csv"))
+            if cube is None:
+                # sized by the first spectrum, get_dpts is not an exact integer
+                cube = MeasurementCube.create(
+                    folder / "res_mapping",
+                    axes={"Ring [V]": ring_voltages, "Heater [V]": heater_voltages, "Wavelength": wavelength},
+                    attrs={"unit": "dB"},
+                )
+            cube[i, j] = loss
+        cube.flush()
+    cube.close()
 
-        
     heater_pm.set_volt(0)
     heater_pm.set_output_state(0)
     ring_pm.set_volt(0)
     ring_pm.set_output_state(0)
     rm.close()
 
-def run_ring_assisted_mzi(rm: ResourceManager, rpm_config: dict, hpm_config: dict, mm_config: dict, folder: str):
+def run_ring_assisted_mzi(rm: ResourceManager, rpm_config: dict, hpm_config: dict, mm_config: dict,
+                          folder: Path, resume: bool=False, avg_config: dict=None):
     """ 
     Try to see how the output power of a specific wavelength
     changes with the voltage of the MZI and the ring.
+
+    The map is checkpointed in the folder. If resume is true, the
+    instruments are reconnected, the setpoints restored and the map
+    continues from the last completed point. The power is averaged
+    until its standard error is within the tolerances of avg_config,
+    see pyoctal.utils.averaging.Averager.
     """
-    avg = 3 
-    heater_pm = AgilentE3640A(addr=hpm_config.pop("addr"), rm=rm)
-    ring_pm = AgilentE3640A(addr=rpm_config.pop("addr"), rm=rm)
-    mm = Agilent8164B(addr=mm_config.pop("addr"), rm=rm)
+    heater_pm = AgilentE3640A(rm=rm)
+    heater_pm.connect(addr=hpm_config["addr"])
+    ring_pm = AgilentE3640A(rm=rm)
+    ring_pm.connect(addr=rpm_config["addr"])
+    mm = Agilent8164B(rm=rm)
+    mm.connect(addr=mm_config["addr"])
 
-    heater_voltages = np.arange(
-        hpm_config["start"], hpm_config["stop"] + hpm_config["step"], hpm_config["step"]
-    )
-    ring_voltages = np.arange(
-        rpm_config["start"], rpm_config["stop"] + rpm_config["step"], rpm_config["step"]
+    heater_pm.set_output_state(1)
+    heater_pm.set_params(hpm_config["stop"], 0.5)
+    ring_pm.set_output_state(1)
+    ring_pm.set_params(rpm_config["stop"], 0.1)
+
+    def heater_settle():
+        # wait until the current is stable
+        heater_pm.wait_until_stable()
+        time.sleep(0.2)
+
+    get_power = Averager(mm.get_detect_pow, set_avgtime=mm.set_detect_avgtime,
+                         avgtime=mm.get_detect_avgtime(), **(avg_config or {}))
+
+    sweep = Sweep(
+        axes=[
+            Axis.linear("Ring [V]", ring_pm.set_volt, rpm_config["start"], rpm_config["stop"],
+                        step=rpm_config["step"]),
+            Axis.linear("Voltage [V]", heater_pm.set_volt, hpm_config["start"], hpm_config["stop"],
+                        step=hpm_config.get("step"), npts=hpm_config.get("npts"),
+                        settle=heater_settle),
+        ],
+        measurements={"Power [W]": get_power, "Current [A]": heater_pm.get_curr},
     )
+    checkpoint = Checkpoint(folder / "ring_assisted_mzi.ckpt.npz")
+    result = sweep.run(checkpoint=checkpoint, resume=resume)
+
+    heater_voltages = result.coords["Voltage [V]"]
+    ring_voltages = result.coords["Ring [V]"]
+    for i, ring_v in enumerate(ring_voltages):
+        currents = result["Current [A]"][i]
+        pd.DataFrame({
+            "Voltage [V]": heater_voltages,
+            "Current [A]": currents,
+            "Electrical Power [W]": heater_voltages*currents,
+            "Power [W]": result["Power [W]"][i]}
+        ).to_csv(folder / f"ring{ring_v}.csv", index=False)
+
+    powers = result["Power [W]"]
+    pd.DataFrame({
+        "Ring [V]": ring_voltages,
+        "Max [V]": heater_voltages[np.argmax(powers, axis=1)],
+        "Min [V]": heater_voltages[np.argmin(powers, axis=1)],
+    }).to_csv(folder / "max_min.csv", index=False)
+
+    heater_pm.set_volt(0)
+    heater_pm.set_output_state(0)
+    ring_pm.set_volt(0)
+    ring_pm.set_output_state(0)
+    rm.close()
+
+def run_ring_assisted_mzi_search(rm: ResourceManager, rpm_config: dict, hpm_config: dict,
+                                 mm_config: dict, folder: Path, avg_config: dict=None):
+    """
+    Find the heater voltages of the maximum and minimum output power
+    for every ring voltage without measuring the full heater sweep.
+
+    Each search starts from the optimum of the previous ring voltage.
+    The measured points of each ring voltage and the max/min voltages
+    are saved as in run_ring_assisted_mzi.
+    """
+    heater_pm = AgilentE3640A(rm=rm)
+    heater_pm.connect(addr=hpm_config["addr"])
+    ring_pm = AgilentE3640A(rm=rm)
+    ring_pm.connect(addr=rpm_config["addr"])
+    mm = Agilent8164B(rm=rm)
+    mm.connect(addr=mm_config["addr"])
 
     heater_pm.set_output_state(1)
     heater_pm.set_params(hpm_config["stop"], 0.5)
     ring_pm.set_output_state(1)
     ring_pm.set_params(rpm_config["stop"], 0.1)
 
-    max_min_voltages = np.zeros(shape=(len(ring_voltages), 3))
-    for i, ring_v in tqdm(enumerate(ring_voltages), total=len(ring_voltages)):
-        powers = []
-        currents = []
-
-        ring_pm.set_volt(ring_v)
+    def heater_settle():
+        # wait until the current is stable
+        heater_pm.wait_until_stable()
+        time.sleep(0.2)
 
-        for volt in heater_voltages:
-            print(f"ring volt: {ring_v}, heater volt: {volt}")
-            heater_pm.set_volt(volt)
+    get_power = Averager(mm.get_detect_pow, set_avgtime=mm.set_detect_avgtime,
+                         avgtime=mm.get_detect_avgtime(), **(avg_config or {}))
 
-            # wait until the current is stable
-            heater_pm.wait_until_stable()
+    search = ExtremumSearch(
+        "Voltage [V]", heater_pm.set_volt, bounds=(hpm_config["start"], hpm_config["stop"]),
+        measurements={"Power [W]": get_power, "Current [A]": heater_pm.get_curr},
+        settle=heater_settle, tol=hpm_config.get("tol"),
+    )
 
-            time.sleep(0.2)
-            power = 0
-            for _ in range(avg):
-                power += mm.get_detect_pow()
-            powers.append(power/avg)
-            currents.append(heater_pm.get_curr())
+    ring_voltages = np.arange(rpm_config["start"], rpm_config["stop"] + rpm_config["step"], rpm_config["step"])
+    vmax = vmin = None
+    max_min_voltages = []
+    for ring_v in tqdm(ring_voltages, desc="Extremum search"):
+        ring_pm.set_volt(ring_v)
+        search.reset()
+        vmax, _ = search.find("max", x0=vmax)
+        vmin, _ = search.find("min", x0=vmin)
+        max_min_voltages.append((ring_v, vmax, vmin))
 
-        pd.DataFrame({
-            "Voltage [V]": heater_voltages,
-            "Current [A]":currents,
-            "Electrical Power [W]": heater_voltages*currents,
-            "Power [W]": powers}
-        ).to_csv(filename=folder / f"ring{ring_v}.csv", index=False)
+        df = search.to_dataframe()
+        df["Electrical Power [W]"] = df["Voltage [V]"]*df["Current [A]"]
+        df[["Voltage [V]", "Current [A]", "Electrical Power [W]", "Power [W]"]].to_csv(
+            folder / f"ring{ring_v}.csv", index=False)
 
-        max_v = heater_voltages[np.argmax(powers)]
-        min_v = heater_voltages[np.argmin(powers)]
-        max_min_voltages[i] = [ring_v, max_v, min_v]
+    pd.DataFrame(max_min_voltages, columns=["Ring [V]", "Max [V]", "Min [V]"]).to_csv(
+        folder / "max_min.csv", index=False)
 
     heater_pm.set_volt(0)
     heater_pm.set_output_state(0)
@@ -120,7 +199,7 @@ def run_ring_assisted_mzi(rm: ResourceManager, rpm_config: dict, hpm_config: dic
 def main():
     """ Entry point."""
     rm = ResourceManager()
-    folder = r"C:\Users\Lab2052\Desktop\Users\Christina\2024-6-04\ramzi_g200\mapping"
+    folder = Path(r"C:\Users\Lab2052\Desktop\Users\Christina\2024-6-04\ramzi_g200\mapping")
 
     rpm_config = {
         "addr": "GPIB0::5::INSTR",
@@ -133,21 +212,33 @@ def main():
         "start": 0, # [V]
         "stop": 2, # [V]
         "npts": 81, # [V]
+        "tol": 1e-03, # [V], only used by run_ring_assisted_mzi_search
     }
     mm_config = {
         "addr": "GPIB0::20::INSTR",
         "wavelength": 1551.85 # [nm]
     }
+    avg_config = {
+        "rtol": 0.01, # standard error relative to the power
+        "atol": 1e-09, # [W], noise floor near extinction
+        "min_count": 2, # enough at high power
+        "max_count": 20,
+    }
 
-    makedirs(folder.parent, exist_ok=True)
+    makedirs(folder, exist_ok=True)
 
     run_ring_assisted_mzi(
         rm=rm,
         rpm_config=rpm_config,
         hpm_config=hpm_config,
         mm_config=mm_config,
-        folder=folder
+        folder=folder,
+        resume=True,
+        avg_config=avg_config,
     )
+    # only the max/min heater voltages, without the full heater sweep
+    # run_ring_assisted_mzi_search(rm=rm, rpm_config=rpm_config, hpm_config=hpm_config,
+    #                              mm_config=mm_config, folder=folder, avg_config=avg_config)
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,7 @@ To run this script:
 python -m tools.sweeps.dc.simple_dc
 """
 from os import makedirs
+from pathlib import Path
 
 import numpy as np
 from tqdm import tqdm
@@ -16,6 +17,7 @@ from pyvisa import ResourceManager
 import matplotlib.pyplot as plt
 
 from pyoctal.instruments import AgilentE3640A, Agilent8164B
+from pyoctal.control.resonance import ResonanceTracker
 
 
 def run(rm: ResourceManager, pm_config: dict, pm2_config: dict, mm_config: dict, filename: str):
@@ -29,9 +31,15 @@ def run(rm: ResourceManager, pm_config: dict, pm2_config: dict, mm_config: dict,
     pm_config: dict
         Power meter configuration
     mm_config: dict
-        Laser/detector source configuration
+        Laser/detector source configuration. With "track", the laser follows
+        the resonance near "wavelength" instead of staying at a fixed wavelength.
     filename: Path
         The filename to save the data to
+
+    Returns
+    -------
+    pd.DataFrame
+        The measured data
     """
     pm = AgilentE3640A(rm=rm)
     pm.connect(addr=pm_config["addr"])
@@ -44,6 +52,7 @@ def run(rm: ResourceManager, pm_config: dict, pm2_config: dict, mm_config: dict,
     powers = []
     opowers = []
     detected_voltages = []
+    resonances = []
 
     # power in linear scale
     ideal_powers = np.linspace(pm_config["start"]**2, pm_config["stop"]**2, num=pm_config["npts"])
@@ -60,23 +69,36 @@ def run(rm: ResourceManager, pm_config: dict, pm2_config: dict, mm_config: dict,
     # turn on the power meter if it is not already on
     pm.set_output_state(1)
 
+    tracker = None
+    if mm_config.get("track"):
+        tracker = ResonanceTracker(mm, **mm_config["track"])
+        tracker.acquire(mm_config["wavelength"])
+
     for volt in tqdm(voltages, desc="DC Sweep - linear power"):
         pm.set_volt(volt)
 
         pm.wait_until_stable()
-        
-        # wavelength = mm.find_resonance()
-        # mm.set_wavelength(wavelength)
+
         volt = pm.get_volt()
         curr = pm.get_curr()
         detected_voltages.append(volt)
         currents.append(curr) # get the current value
         powers.append(volt*curr)
-        opowers.append(mm.get_detect_pow())
-        
+        if tracker is None:
+            opowers.append(mm.get_detect_pow())
+        else:
+            # a few points around the last resonance instead of a full search
+            wavelength, opower = tracker.update()
+            resonances.append(wavelength)
+            opowers.append(opower)
+
     df = pd.DataFrame({"Voltage [V]": voltages, "Detected Voltage [V]": detected_voltages, "Current [A]": currents, "Electrical Power [W]": powers, "Optical power [W]": opowers})
+    if tracker is not None:
+        df["Resonance [nm]"] = resonances
+        df["Locked"] = tracker.get_history()["locked"]
     pm.set_volt(0)
     rm.close()
+    return df
 
 
 def main():
@@ -100,6 +122,11 @@ def main():
         "wavelength": 1555.65, # [nm]
         "power": 10, # [dBm]
         "period": 0.1, # [s]
+        # follow the resonance near the wavelength, remove to measure at a fixed wavelength
+        "track": {
+            "window": 0.01, # [nm], about half of the linewidth
+            "span": 1, # [nm], span of the search when the lock is lost
+        },
     }
     
     filename = Path(f"s7_{pm2_config['v']}v_g200_3db_{mm_config['wavelength']}nm.csv")
@@ -16,11 +16,18 @@ import pandas as pd
 from pyvisa import ResourceManager
 
 from pyoctal.instruments import AgilentE3640A, Agilent8163B
-from pyoctal.utils.file_operations import export_to_excel
+from pyoctal.utils.file_operations import export
 
 
-def run(rm: ResourceManager, pm_config: dict, mm_config: dict, filename: Path):
-    """ Run only with instrument. Require one voltage source """
+def run(rm: ResourceManager, pm_config: dict, mm_config: dict, filename: Path,
+        export_config: dict=None):
+    """
+    Run only with instrument. Require one voltage source.
+
+    The format of the file is set by export_config["format"]: excel (default),
+    csv, parquet, feather or npz.
+    """
+    export_config = export_config or {}
     pm = AgilentE3640A(rm=rm)
     pm.connect(addr=pm_config["addr"])
     mm = Agilent8163B(rm=rm)
@@ -56,7 +63,7 @@ def run(rm: ResourceManager, pm_config: dict, mm_config: dict, filename: Path):
         powers.append(volt*curr)
         opowers.append(mm.get_detect_pow())
 
-    export_to_excel(
+    export(
         data=pd.DataFrame({
             "Voltage [V]": voltages,
             "Detected Voltage [V]": detected_voltages,
@@ -65,7 +72,14 @@ def run(rm: ResourceManager, pm_config: dict, mm_config: dict, filename: Path):
             "Optical power [W]": opowers
         }),
         filename=filename,
-        sheet_names=["data"]
+        fmt=export_config.get("format", "excel"),
+        metadata={
+            "units": {
+                "Voltage [V]": "V", "Detected Voltage [V]": "V", "Current [A]": "A",
+                "Electrical Power [W]": "W", "Optical power [W]": "W",
+            },
+            "settings": {key: val for key, val in mm_config.items() if key != "addr"},
+        },
     )
     pm.set_volt(0)
     rm.close()
@@ -88,13 +102,19 @@ def main():
         "period": 0.1, # [s]
     }
 
+    # excel, csv, parquet, feather or npz
+    # binary files can be converted afterwards with python -m tools.convert
+    export_config = {
+        "format": "excel",
+    }
+
     filename = Path(r"Y:\Christina\ktn tests\KTN 2024 Nov\09.12.2024")
 
     # check that the directory exists first, else create it.
     makedirs(filename.parent, exist_ok=True)
     rm = ResourceManager()
 
-    run(rm, pm_config, mm_config, filename)
+    run(rm, pm_config, mm_config, filename, export_config)
 
 if __name__ == "__main__":
     main()
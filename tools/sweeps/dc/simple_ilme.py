@@ -6,14 +6,18 @@ from os import makedirs
 from pathlib import Path
 
 import numpy as np
+import pythoncom
 from pyvisa import ResourceManager
 from tqdm import tqdm
 
 from pyoctal.instruments import AgilentE3640A, KeysightILME
-from pyoctal.instruments.keysightPAS import export_to_omr
+from pyoctal.instruments.keysightPAS import marshal_omr, export_marshalled_omr
+from pyoctal.utils.export_queue import ExportQueue
+from pyoctal.utils.catalogue import Catalogue
 
-def run_ilme(rm: ResourceManager, pm_config: dict, ilme_config: dict, folder: Path, ilme_config_path: Path=None):
-    """ Run with ILME engine """
+def run_ilme(rm: ResourceManager, pm_config: dict, ilme_config: dict, folder: Path, ilme_config_path: Path=None,
+             catalogue: Catalogue=None):
+    """ Run with ILME engine. If a catalogue is given, every saved file is recorded in it. """
     voltages = np.arange(pm_config["start"], pm_config["stop"]+pm_config["step"], pm_config["step"])
 
     pm = AgilentE3640A(rm=rm)
@@ -21,16 +25,23 @@ def run_ilme(rm: ResourceManager, pm_config: dict, ilme_config: dict, folder: Pa
     pm.set_output_state(1)
 
     ilme = KeysightILME(config=ilme_config, config_path=ilme_config_path)
-    for volt in tqdm(voltages, desc="Sweeping voltages"):
-        pm.set_params(volt, 0.1)
-        pm.wait_until_stable()
+    # the OMR files are written while the next voltage is measured
+    with ExportQueue(initializer=pythoncom.CoInitialize) as exports:
+        for volt in tqdm(voltages, desc="Sweeping voltages"):
+            pm.set_params(volt, 0.1)
+            pm.wait_until_stable()
 
-        ilme.start_meas()
-        _, _, omr_data = ilme.get_result()
-        ilme.start_meas()
-        _, _, omr_data = ilme.get_result()
+            ilme.start_meas()
+            _, _, omr_data = ilme.get_result()
+            ilme.start_meas()
+            _, _, omr_data = ilme.get_result()
 
-        export_to_omr(omr_data, folder / f"ring_{volt}V.omr")
+            exports.submit(export_marshalled_omr, marshal_omr(omr_data), folder / f"ring_{volt}V.omr")
+            if catalogue is not None:
+                exports.submit(
+                    catalogue.add, folder / f"ring_{volt}V.omr", params={"voltage": volt, **ilme_config},
+                    instruments={"source": pm, "ilme": "KeysightILME"}, sweep="dc.simple_ilme",
+                )
 
     pm.set_volt(0)
     rm.close()
@@ -61,7 +72,8 @@ def main():
     makedirs(folder, exist_ok=True)
     rm = ResourceManager()
 
-    run_ilme(rm, pm_config, ilme_config, folder)
+    with Catalogue(folder.parent / "catalogue.db") as catalogue:
+        run_ilme(rm, pm_config, ilme_config, folder, catalogue=catalogue)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,6 @@
 from pathlib import Path
 from typing import Dict
 
-import pandas as pd
 import numpy as np
 from pyvisa import ResourceManager
 from tqdm import tqdm
@@ -10,6 +9,8 @@ from pyoctal.instruments import (
     AmetekDSP7265,
     AgilentE3640A,
 )
+from pyoctal.sweeps import Axis, Sweep
+from pyoctal.utils.writers import StreamWriter
 
 
 def run_DSP7265_one(rm: ResourceManager, amp_config: Dict,
@@ -36,30 +37,25 @@ def run_DSP7265_one(rm: ResourceManager, amp_config: Dict,
     pm.set_volt(0)
     pm.set_output_state(1)
 
-    currents = []
-    opowers = []
-    voltages = np.linspace(
-        pm_config["start"], pm_config["stop"] + pm_config["step"], pm_config["step"]
+    voltages = np.arange(
+        pm_config["start"], pm_config["stop"] + pm_config["step"]/2, pm_config["step"]
     )
 
-    for volt in tqdm(voltages):
-        pm.set_volt(volt)
+    with StreamWriter(filename, ["Voltage [V]", "Current [A]", "Optical Power [W]"]) as writer:
+        for volt in tqdm(voltages):
+            pm.set_volt(volt)
+            amp.start_settle()
 
-        pm.wait_until_stable()
-
-        currents.append(pm.get_curr())
-        opowers.append(amp.get_mag())
+            # lock-in settles while waiting for the power meter
+            pm.wait_until_stable()
 
+            curr = pm.get_curr()
+            amp.wait_settle()
+            writer.write_row(volt, curr, amp.get_mag())
 
     pm.set_volt(0)
     pm.set_output_state(0)
     amp.set_mag(0)
-
-    pd.DataFrame({
-        "Voltage [V]": voltages,
-        "Current [A]": currents,
-        "Optical Power [W]": opowers 
-    }).to_csv(filename, index=False)
     rm.close()
 
 def run_DSP7265_dual(rm: ResourceManager, amp_config: Dict,
@@ -92,40 +88,39 @@ def run_DSP7265_dual(rm: ResourceManager, amp_config: Dict,
     pm2.set_volt(0)
     pm2.set_output_state(1)
 
-    df = pd.DataFrame(
-        columns=["Volt1 [V]", "Volt2 [V]", "Current1 [A]", "Current2 [A]", "Optical [W]"]
-    )
-
-    pm1_voltages = np.linspace(
-        pm1_config["start"], pm1_config["stop"] + pm1_config["step"], pm1_config["step"]
-    )
-
-    pm2_voltages = np.linspace(
-        pm2_config["start"], pm2_config["stop"] + pm2_config["step"], pm2_config["step"]
+    def settle():
+        amp.start_settle()
+        # lock-in settles while waiting for the power meter
+        pm2.wait_until_stable()
+        amp.wait_settle()
+
+    sweep = Sweep(
+        axes=[
+            Axis.linear("Volt1 [V]", pm1.set_volt, pm1_config["start"],
+                        pm1_config["stop"], step=pm1_config["step"]),
+            Axis.linear("Volt2 [V]", pm2.set_volt, pm2_config["start"],
+                        pm2_config["stop"], step=pm2_config["step"]),
+        ],
+        measurements={
+            "Current1 [A]": pm1.get_curr,
+            "Current2 [A]": pm2.get_curr,
+            "Optical [W]": amp.get_mag,
+        },
+        settle=settle,
     )
+    columns = [axis.name for axis in sweep.axes] + list(sweep.measurements.keys())
 
-    for volt1 in tqdm(pm1_voltages):
-
-        pm1.set_volt(volt1)
-        curr1 = pm1.get_curr()
-
-        for volt2 in pm2_voltages:
-            pm2.set_volt(volt2)
-
-            pm2.wait_until_stable()
-
-            curr2 = pm2.get_curr()
-            opower = amp.get_mag()
-            data = (volt1, volt2, curr1, curr2, opower)
-            df.loc[len(df)] = data
+    with StreamWriter(filename, columns) as writer:
+        sweep.callback = lambda index, values: writer.write_row(
+            *(axis.values[i] for axis, i in zip(sweep.axes, index)), *values.values()
+        )
+        sweep.run()
 
     pm1.set_volt(0)
     pm1.set_output_state(0)
     pm2.set_volt(0)
     pm2.set_output_state(0)
     amp.set_mag(0)
-
-    df.to_csv(filename, index=False)
     rm.close()
 
 
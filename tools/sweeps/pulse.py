@@ -11,6 +11,8 @@ import pandas as pd
 from pyvisa import ResourceManager
 
 from pyoctal.instruments import AgilentE3640A, Agilent8163B
+from pyoctal.instruments.xpow import NicsLabXPOW
+from pyoctal.sweeps import Adaptive1D
 
 
 def phase_calculation(
@@ -87,6 +89,61 @@ def get_pulse_response_sw(rm: ResourceManager, mm_config: dict, pm_config: dict)
 
     return volt_curr_data, powers, phases
 
+def get_pulse_response_adaptive(rm: ResourceManager, mm_config: dict, pm_config: dict) -> pd.DataFrame:
+    """
+    Get pulse response at a single wavelength with adaptive voltage steps.
+
+    Same idea as get_pulse_response_sw, but the steps are refined by
+    bisection wherever the phase changes by more than pm_config["tol"]
+    between two points, from pm_config["max_step"] down to pm_config["min_step"].
+    At each voltage the pulse is applied pm_config["cycle"] times and the
+    powers are averaged.
+    """
+    mm = Agilent8163B(rm=rm)
+    mm.connect(addr=mm_config["addr"])
+    pm = NicsLabXPOW(rm=rm)
+    pm.connect(addr=pm_config["addr"])
+
+    mm.set_detect_autorange(auto=True)
+    mm.set_wavelength(mm_config["wavelength"])
+
+    chan = pm_config["channel"]
+    last = {}
+
+    def pulse(volt: float):
+        last["target"] = volt
+
+    def get_power() -> float:
+        powers = []
+        for _ in range(pm_config["cycle"]):
+            pm.set_channel(chan, last["target"], 20e-03)
+            last["volt"], last["curr"] = pm.read_channel_data(chan)
+            pm.set_channel(chan, 0, 0)
+            powers.append(np.mean([mm.get_detect_pow() for _ in range(pm_config["avg_pts"])]))
+        last["power"] = np.mean(powers)
+        return last["power"]
+
+    def get_phase() -> float:
+        data = np.clip(last["power"]/pm_config["avg_transmission_at_quad"] - 1, -1, 1)
+        return math.acos(data)
+
+    sweep = Adaptive1D(
+        "Voltage set [V]", pulse, pm_config["start"], pm_config["stop"],
+        measurements={
+            "Power [W]": get_power,
+            "Phase": get_phase,
+            "Voltage [V]": lambda: last["volt"],
+            "Current [A]": lambda: last["curr"],
+        },
+        key="Phase",
+        tol=pm_config["tol"],
+        min_step=pm_config["min_step"],
+        max_step=pm_config["max_step"],
+        # absolute phase change between neighbouring points
+        loss=lambda x, y: np.abs(np.diff(y)),
+    )
+    return sweep.run()
+
 def main():
     """ Entry point."""
     mm_config = {
@@ -101,6 +158,10 @@ def main():
         "channel": 1,
         "avg_pts": 10,
         "avg_transmission_at_quad": 0.5,
+        # adaptive sweep only
+        "tol": 0.005, # [rad]
+        "min_step": 0.001, # [V]
+        "max_step": 0.025, # [V]
     }
     current_fname = "current.csv"
     power_fname = "power.csv"
@@ -0,0 +1,190 @@
+"""
+wn_scan.py
+==========
+This script is used to step the QCL through a wavenumber scan and
+record the lock-in signal at the same time. The laser position and the
+lock-in signal are aligned and resampled onto a uniform wavenumber grid.
+
+To run this script:
+    python -m tools.sweeps.qcl.wn_scan
+"""
+import time
+from pathlib import Path
+from os import makedirs
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from pyvisa import ResourceManager
+
+from pyoctal.instruments import DaylightQCL, AmetekDSP7230, AmetekDSP7265
+
+
+def resample_uniform(wns: np.array, signals: np.array, grid: np.array) -> np.array:
+    """
+    Resample the signal onto a uniform wavenumber grid.
+
+    Repeated wavenumbers (i.e. from a forward-backward sweep or a step scan
+    dwelling on a point) are averaged before interpolating.
+
+    Parameters
+    ----------
+    wns: np.array
+        Measured wavenumbers
+    signals: np.array
+        Signals measured at each wavenumber
+    grid: np.array
+        The uniform wavenumber grid to resample onto
+
+    Returns
+    -------
+    np.array
+        The signal on the grid. Grid points outside of the scanned range are nan.
+    """
+    unique_wns, inverse = np.unique(wns, return_inverse=True)
+    sums = np.bincount(inverse, weights=signals)
+    counts = np.bincount(inverse)
+    return np.interp(grid, unique_wns, sums/counts, left=np.nan, right=np.nan)
+
+
+def setpoints(qcl_config: dict) -> np.array:
+    """ Wavenumbers of the step scan from start to stop, both included. """
+    start, stop, step = qcl_config["start"], qcl_config["stop"], abs(qcl_config["step"])
+    if stop < start:
+        step = -step
+    return np.arange(start, stop + step/2, step)
+
+
+def scan_point(qcl: DaylightQCL, amp: AmetekDSP7230, qcl_config: dict) -> Tuple[np.array, np.array]:
+    """
+    Step the QCL and read the laser position and the lock-in magnitude
+    in pairs once the lock-in has settled at each step.
+    """
+    wns = []
+    signals = []
+
+    for wn in setpoints(qcl_config):
+        qcl.set_wn(wn)
+        amp.start_settle()
+        time.sleep(qcl_config.get("dwell", 0))
+        amp.wait_settle()
+        wns.append(qcl.get_awn())
+        signals.append(amp.get_mag())
+
+    return np.array(wns), np.array(signals)
+
+
+def scan_buffer(qcl: DaylightQCL, amp: AmetekDSP7265, qcl_config: dict,
+                amp_config: dict) -> Tuple[np.array, np.array]:
+    """
+    Store the lock-in magnitude in its curve buffer while the QCL steps.
+
+    Only the laser position is read at each step. Every stored point is
+    assigned to the step it was taken in, and the points within the
+    lock-in settle time after a step are dropped.
+    """
+    curve = f"mag{amp_config.get('chan', 1)}"
+    interval_ms = amp.setup_curves((curve,), amp_config["npts"], amp_config["interval"])
+    # keep at least one settled point at each step
+    dwell = qcl_config.get("dwell", 0) + amp.get_settle_time() + interval_ms*1e-03
+
+    wns = []
+    timestamps = []
+
+    amp.start_curve()
+    start = time.perf_counter()
+    for wn in setpoints(qcl_config):
+        qcl.set_wn(wn)
+        timestamps.append(time.perf_counter() - start)
+        time.sleep(dwell)
+        wns.append(qcl.get_awn())
+    end = time.perf_counter() - start
+    amp.stop_curve()
+
+    signals = amp.get_curve(curve)
+    npts = min(len(signals), amp.get_curve_status()[3])
+    signals = signals[:npts]
+    signal_timestamps = np.arange(npts)*interval_ms*1e-03
+
+    # the step each point was stored in
+    step = np.searchsorted(timestamps, signal_timestamps, side="right") - 1
+    inside = (step >= 0) & (signal_timestamps <= end)
+    step, signals, signal_timestamps = step[inside], signals[inside], signal_timestamps[inside]
+
+    # drop the points stored while the lock-in was settling after a step
+    settled = signal_timestamps - np.asarray(timestamps)[step] >= amp.get_settle_time()
+    return np.asarray(wns)[step[settled]], signals[settled]
+
+
+def run_wn_scan(rm: ResourceManager, qcl_config: dict, amp_config: dict, filename: Path):
+    """
+    Run the QCL wavenumber scan with lock-in detection.
+
+    The laser is stepped with set_wn. The internal scan modes of the
+    controller (set_mode) are not used, as their start, stop and run
+    commands are not part of this driver.
+
+    Parameters
+    ----------
+    rm: ResourceManager
+        Pyvisa resource manager
+    qcl_config: dict
+        QCL configuration
+    amp_config: dict
+        Lock-in amplifier configuration. If "buffer" is true, a DSP7265 curve
+        buffer is used. Otherwise the DSP7230 is read point by point.
+    filename: Path
+        The filename to save the data to
+    """
+    qcl = DaylightQCL(rm=rm)
+    qcl.connect(addr=qcl_config["addr"])
+
+    if amp_config.get("buffer"):
+        amp = AmetekDSP7265(rm=rm)
+        amp.connect(addr=amp_config["addr"])
+        wns, signals = scan_buffer(qcl, amp, qcl_config, amp_config)
+    else:
+        amp = AmetekDSP7230(rm=rm)
+        amp.connect(addr=amp_config["addr"])
+        wns, signals = scan_point(qcl, amp, qcl_config)
+
+    start, stop = sorted((qcl_config["start"], qcl_config["stop"]))
+    grid = np.arange(start, stop + qcl_config["grid"]/2, qcl_config["grid"])
+
+    pd.DataFrame({
+        "Wavenumber [cm-1]": grid,
+        "Signal [V]": resample_uniform(wns, signals, grid),
+    }).to_csv(filename, index=False)
+    pd.DataFrame({
+        "Wavenumber [cm-1]": wns,
+        "Signal [V]": signals,
+    }).to_csv(filename.with_name(f"{filename.stem}_raw.csv"), index=False)
+    rm.close()
+
+
+def main():
+    """ Entry point."""
+    qcl_config = {
+        "addr": "GPIB0::1::INSTR",
+        "start": 9300, # [cm-1]
+        "stop": 9900, # [cm-1]
+        "step": 1, # [cm-1]
+        "dwell": 0, # [s] extra wait at each step on top of the lock-in settle time
+        "grid": 0.5, # [cm-1] resampled grid spacing
+    }
+    amp_config = {
+        "addr": "GPIB0::12::INSTR",
+        "buffer": False, # use the DSP7265 curve buffer
+        "chan": 1,
+        "npts": 10000, # buffer only
+        "interval": 10e-03, # [s] buffer only
+    }
+
+    filename = Path("data/qcl_scan.csv")
+    makedirs(filename.parent, exist_ok=True)
+    rm = ResourceManager()
+
+    run_wn_scan(rm, qcl_config, amp_config, filename)
+
+if __name__ == "__main__":
+    main()